@@ -0,0 +1,133 @@
+
+""" Módulo agentes: define o protocolo das personagens como objetos.
+
+    No protocolo original, cada personagem é um módulo (personagem*.py)
+    com as funções inicializa, planejar e agir, que guardam todo o seu
+    estado em variáveis globais do módulo; assim só pode existir uma
+    personagem viva de cada módulo por processo. No protocolo de objetos,
+    o módulo define uma classe Agente (derivada da classe Agente abaixo),
+    e cada partida usa a sua própria instância, de modo que várias
+    personagens independentes podem jogar lado a lado.
+
+    Em vez de uma ação, agir pode devolver um Plano (ou uma string com
+    várias ações): o mundo executa as ações uma por turno, sem chamar a
+    personagem, até o plano acabar ou ser interrompido.
+"""
+
+from gravacao import FEDOR, BRISA, IMPACTO, URRO, ENCONTRO
+
+# bit de interrupção de um Plano: percepção diferente da do turno anterior
+NOVIDADE = 32
+# interrompe o plano diante de qualquer percepção
+QUALQUER = FEDOR|BRISA|IMPACTO|URRO|ENCONTRO
+
+
+class Agente:
+    """ Classe Agente: classe base das personagens. Antes de chamar
+        inicializa, o mundo define os atributos nFlechas (o número de
+        flechas da personagem) e mundoCompartilhado (uma BaseConhecimento
+        onde a personagem recebe o que outras personagens compartilham).
+    """
+    nFlechas = 0
+    mundoCompartilhado = None
+
+    def inicializa(self,N):
+        """ Prepara a personagem para uma partida em um mundo NxN.
+        """
+        raise NotImplementedError
+
+    def planejar(self,percepcao):
+        """ Atualiza o conhecimento da personagem com a percepção
+            (lista de strings) da sala atual.
+        """
+        raise NotImplementedError
+
+    def agir(self):
+        """ Devolve a ação escolhida: "A", "D", "E", "T" ou "C" (ou um
+            Plano, ou uma string com várias dessas ações).
+        """
+        raise NotImplementedError
+
+
+class Plano:
+    """ Classe Plano: uma sequência de ações (string ou lista de "A",
+        "D", "E", "T" e "C") que o mundo executa, uma por turno, sem chamar
+        planejar nem agir. O plano é interrompido (e a personagem volta a
+        ser chamada, com a percepção do turno) quando a percepção de um
+        turno tiver algum dos bits de interrompa (FEDOR, BRISA, IMPACTO,
+        URRO e ENCONTRO, como em gravacao.bitsPercepcao, ou NOVIDADE),
+        ou quando uma ação for inviável. Um plano vazio conta como uma
+        ação inviável.
+        Quando a personagem volta a ser chamada, executadas diz quantas
+        ações do plano foram executadas, e percepcoes traz os bits das
+        percepções dos turnos em que ela não foi chamada (a de índice n
+        é a percepção antes da ação n+1).
+    """
+    def __init__(self,acoes,interrompa=QUALQUER):
+        self.acoes = acoes
+        self.interrompa = interrompa
+        self.executadas = 0
+        self.percepcoes = []
+        # bits da percepção do turno anterior (para NOVIDADE)
+        self.ultima = 0
+
+
+def interpreteResposta(resposta):
+    """ Classifica a resposta de agir: devolve (acao, None) se ela for uma
+        ação, isto é, uma string de um caractere (ou qualquer coisa que não
+        seja ação nem plano, que conta como uma ação inviável), ou (None,
+        plano) com o Plano dado, ou um Plano com a string, lista ou tupla
+        de ações.
+    """
+    if isinstance(resposta,Plano):
+        return None,resposta
+    if isinstance(resposta,(str,list,tuple)) and not (isinstance(resposta,str) and len(resposta) == 1):
+        return None,Plano(resposta)
+    return resposta,None
+
+
+class AdaptadorModulo(Agente):
+    """ Classe AdaptadorModulo: apresenta um módulo de personagem no
+        protocolo original (funções e variáveis globais) como um Agente.
+        Como o estado continua nas globais do módulo, só pode haver um
+        adaptador em uso por módulo de cada vez.
+    """
+    def __init__(self,modulo):
+        self.modulo = modulo
+
+    # nFlechas e mundoCompartilhado são lidos e escritos no próprio módulo
+    @property
+    def nFlechas(self):
+        return self.modulo.nFlechas
+
+    @nFlechas.setter
+    def nFlechas(self,valor):
+        self.modulo.nFlechas = valor
+
+    @property
+    def mundoCompartilhado(self):
+        return self.modulo.mundoCompartilhado
+
+    @mundoCompartilhado.setter
+    def mundoCompartilhado(self,valor):
+        self.modulo.mundoCompartilhado = valor
+
+    def inicializa(self,N):
+        self.modulo.inicializa(N)
+
+    def planejar(self,percepcao):
+        self.modulo.planejar(percepcao)
+
+    def agir(self):
+        return self.modulo.agir()
+
+
+def criaAgente(modulo):
+    """ Devolve uma nova personagem do módulo dado: uma instância da
+        classe Agente do módulo, se houver, ou um AdaptadorModulo. Também
+        aceita a própria classe (derivada de Agente) no lugar do módulo.
+    """
+    classe = modulo if isinstance(modulo,type) else getattr(modulo,"Agente",None)
+    if isinstance(classe,type) and issubclass(classe,Agente):
+        return classe()
+    return AdaptadorModulo(modulo)
@@ -0,0 +1,227 @@
+
+""" ANALISADOR DE MUNDOS DE WUMPUS
+
+    Analisa um mundo (no formato de MundoDeWumpus.mundo) antes de qualquer
+    simulação, com conhecimento total do mundo:
+      - a região alcançável: as salas livres a que se chega a partir da
+        sala inicial sem passar por muros, poços ou Wumpus;
+      - a solução ótima: o menor número de turnos para matar todos os
+        Wumpus, por uma busca em largura no espaço de estados (sala,
+        orientação, flechas, Wumpus já mortos), com as mesmas regras do
+        MundoDeWumpus (andar, girar para a direita ou esquerda e atirar).
+
+    As análises são guardadas por hash do mundo (e, se for dado um arquivo,
+    também em disco), de modo que corpus de mundos usados em medidas de
+    desempenho possam pular os mundos sem solução e comparar as
+    personagens com o ótimo.
+
+    Uso:
+        python3 analisador.py N [SEMENTE]
+"""
+
+import json
+import os
+from collections import deque
+from hashlib import blake2b
+
+from mundo import LIVRE, WUMPUS, acoes, ANDAR, GIRARDIREITA, GIRARESQUERDA, ATIRAR
+
+# orientações reais, na ordem de planejador.orientacoes: girar para a
+# direita vai de o para o-1, e girar para a esquerda de o para o+1
+orientacoes = [ (1,0), (0,1), (-1,0), (0,-1) ]
+# o MundoDeWumpus começa com a personagem olhando para a direita
+ORIENTACAO_INICIAL = 1
+# bit do código da ação (no mapa de estados) que indica que o tiro matou
+MATOU = 4
+# maior número de estados aceito pela busca (um byte por estado)
+MAXIMO_ESTADOS = 1<<30
+
+
+class Analise:
+    """ Classe Analise: o resultado da análise de um mundo. turnos é o
+        menor número de turnos para vencer (None se não houver solução),
+        salas é o número de salas da região alcançável e plano é a lista
+        de ações ("A", "D", "E", "T") de uma solução ótima, quando pedida.
+    """
+    def __init__(self,turnos,salas,plano=None):
+        self.turnos = turnos
+        self.salas = salas
+        self.plano = plano
+
+    def solucionavel(self):
+        return self.turnos is not None
+
+    def __repr__(self):
+        return "Analise(%s turnos, %d salas alcançáveis)" % (self.turnos,self.salas)
+
+
+def regiaoAlcancavel(mundo,N,inicio=None):
+    """ Devolve um bytearray de N*N posições com 1 nas salas livres
+        alcançáveis a partir da sala inicio (por padrão o centro), no
+        toro, sem passar por muros, poços ou Wumpus.
+    """
+    if inicio is None:
+        inicio = (N//2,N//2)
+    alcancavel = bytearray(N*N)
+    k = inicio[0]*N+inicio[1]
+    alcancavel[k] = 1
+    fila = [k]
+    while fila:
+        k = fila.pop()
+        i,j = divmod(k,N)
+        for v in ((i+1)%N*N+j, (i-1)%N*N+j, i*N+(j+1)%N, i*N+(j-1)%N):
+            if not alcancavel[v] and mundo[v] == LIVRE:
+                alcancavel[v] = 1
+                fila.append(v)
+    return alcancavel
+
+
+def solucaoOtima(mundo,N,inicio=None,flechas=1,plano=False):
+    """ Devolve uma Analise do mundo: o menor número de turnos para matar
+        todos os Wumpus, partindo da sala inicio (por padrão o centro)
+        olhando para a direita com o número de flechas dado, e o tamanho
+        da região alcançável. Se plano for True, também reconstrói uma
+        sequência ótima de ações.
+    """
+    if inicio is None:
+        inicio = (N//2,N//2)
+    salas = sum(regiaoAlcancavel(mundo,N,inicio))
+    wumpus = [ k for k in range(N*N) if mundo[k] == WUMPUS ]
+    numero = { k: w for w,k in enumerate(wumpus) }
+    todos = (1<<len(wumpus))-1
+    if len(wumpus) > flechas:
+        return Analise(None,salas)
+    if not wumpus:
+        return Analise(0,salas,[] if plano else None)
+    NN = N*N
+    F = flechas+1
+    total = NN*4*F*(todos+1)
+    if total > MAXIMO_ESTADOS:
+        raise ValueError("espaço de estados grande demais (%d estados)" % total)
+
+    # estado = ((mortos*F+flechas)*4+o)*NN+k; o mapa guarda, para cada
+    # estado visitado, 1 + o código da ação que levou a ele (255 no início)
+    def codifica(k,o,f,mortos):
+        return ((mortos*F+f)*4+o)*NN+k
+    mapa = bytearray(total)
+    inicial = codifica(inicio[0]*N+inicio[1],ORIENTACAO_INICIAL,flechas,0)
+    mapa[inicial] = 255
+    fila = deque([(inicial,0)])
+    final = None
+    while fila:
+        estado,turnos = fila.popleft()
+        k = estado%NN
+        resto = estado//NN
+        o = resto%4
+        resto //= 4
+        f = resto%F
+        mortos = resto//F
+        i,j = divmod(k,N)
+        di,dj = orientacoes[o]
+        frente = (i+di)%N*N+(j+dj)%N
+        sucessores = []
+        # andar: muros só fazem perder o turno; poços e Wumpus vivos matam
+        sala = mundo[frente]
+        if sala == LIVRE or (sala == WUMPUS and mortos>>numero[frente] & 1):
+            sucessores.append((codifica(frente,o,f,mortos),ANDAR))
+        sucessores.append((codifica(k,(o-1)%4,f,mortos),GIRARDIREITA))
+        sucessores.append((codifica(k,(o+1)%4,f,mortos),GIRARESQUERDA))
+        if f > 0:
+            if sala == WUMPUS and not mortos>>numero[frente] & 1:
+                novos = mortos|1<<numero[frente]
+                if novos == todos:
+                    mapa[codifica(k,o,f-1,novos)] = 1+ATIRAR+MATOU
+                    final = (codifica(k,o,f-1,novos),turnos+1)
+                    break
+                sucessores.append((codifica(k,o,f-1,novos),ATIRAR+MATOU))
+            else:
+                sucessores.append((codifica(k,o,f-1,mortos),ATIRAR))
+        for sucessor,acao in sucessores:
+            if not mapa[sucessor]:
+                mapa[sucessor] = 1+acao
+                fila.append((sucessor,turnos+1))
+    if final is None:
+        return Analise(None,salas)
+    return Analise(final[1],salas,reconstroi(mapa,final[0],N,F,wumpus) if plano else None)
+
+
+def reconstroi(mapa,estado,N,F,wumpus):
+    """ Refaz, de trás para a frente, as ações que levaram ao estado,
+        desfazendo cada ação guardada no mapa de estados.
+    """
+    NN = N*N
+    plano = []
+    while mapa[estado] != 255:
+        acao = mapa[estado]-1
+        k = estado%NN
+        resto = estado//NN
+        o = resto%4
+        resto //= 4
+        f = resto%F
+        mortos = resto//F
+        i,j = divmod(k,N)
+        di,dj = orientacoes[o]
+        if acao == ANDAR:
+            k = (i-di)%N*N+(j-dj)%N
+        elif acao == GIRARDIREITA:
+            o = (o+1)%4
+        elif acao == GIRARESQUERDA:
+            o = (o-1)%4
+        else:
+            f += 1
+            if acao & MATOU:
+                mortos &= ~(1<<wumpus.index((i+di)%N*N+(j+dj)%N))
+            acao = ATIRAR
+        plano.append(acoes[acao])
+        estado = ((mortos*F+f)*4+o)*NN+k
+    plano.reverse()
+    return plano
+
+
+def hashMundo(mundo,N,inicio=None,flechas=1):
+    """ Identifica um mundo (e as condições iniciais da análise).
+    """
+    h = blake2b(digest_size=16)
+    h.update(("%d %s %d " % (N,inicio,flechas)).encode())
+    h.update(bytes(mundo))
+    return h.hexdigest()
+
+
+class Analisador:
+    """ Classe Analisador: analisa mundos, guardando as análises por hash
+        do mundo. Se for dado um arquivo (JSON), as análises são lidas dele
+        e gravadas de volta por grave().
+    """
+    def __init__(self,arquivo=None):
+        self.arquivo = arquivo
+        self.analises = {}
+        if arquivo is not None and os.path.exists(arquivo):
+            with open(arquivo) as f:
+                for chave,(turnos,salas) in json.load(f).items():
+                    self.analises[chave] = Analise(turnos,salas)
+
+    def analise(self,mundo,N=None,inicio=None,flechas=1):
+        """ Devolve a Analise do mundo, calculando-a só na primeira vez.
+        """
+        if N is None:
+            N = int(len(mundo)**0.5)
+        chave = hashMundo(mundo,N,inicio,flechas)
+        analise = self.analises.get(chave)
+        if analise is None:
+            analise = self.analises[chave] = solucaoOtima(mundo,N,inicio,flechas)
+        return analise
+
+    def grave(self):
+        with open(self.arquivo,"w") as f:
+            json.dump({ chave: (a.turnos,a.salas) for chave,a in self.analises.items() },f)
+
+
+if __name__=="__main__":
+    import sys
+    from gerador import geraMundo
+    N = int(sys.argv[1])
+    semente = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    analise = solucaoOtima(geraMundo(N,semente),N,plano=True)
+    print(analise)
+    if analise.solucionavel():
+        print("".join(analise.plano))
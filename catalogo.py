@@ -0,0 +1,243 @@
+
+""" Módulo catalogo: registro das personagens disponíveis.
+
+    O catálogo procura uma única vez (por processo) os arquivos
+    personagem*.py dos diretórios dados, e guarda de cada personagem o
+    nome, o caminho, a data de modificação e a versão do contrato (o
+    protocolo original, de funções do módulo, ou o de objetos, de
+    agentes.Agente), lida da árvore sintática do arquivo, sem importá-lo.
+    Também aceita personagens instaladas como pacotes, pelo grupo de
+    pontos de entrada "mundodewumpus.agentes", e personagens registradas
+    explicitamente por nome.
+
+    Uma personagem só é importada quando uma partida precisa dela, e uma
+    só vez: programas que criam muitos MundoDeWumpus (torneio.py,
+    desempenho.py, hospedeiro.py) pagam a busca e a importação uma vez
+    por processo, e não uma vez por partida. Se for dado um arquivo, os
+    dados das personagens são guardados nele (JSON), e os arquivos que
+    não mudaram desde então nem precisam ser lidos de novo.
+"""
+
+import ast
+import importlib
+import importlib.util
+import json
+import os
+import sys
+from importlib.metadata import entry_points
+
+# grupo dos pontos de entrada das personagens instaladas como pacotes
+GRUPO = "mundodewumpus.agentes"
+# prefixo dos arquivos (e módulos) de personagens
+PREFIXO = "personagem"
+
+# versões do contrato das personagens: funções inicializa, planejar e agir
+# com o estado em variáveis globais, ou uma classe Agente (veja agentes.py)
+CONTRATO_MODULO,CONTRATO_OBJETOS = 1,2
+
+
+class Entrada:
+    """ Classe Entrada: uma personagem do catálogo. modulo é o nome do
+        módulo (ou, para um ponto de entrada, "modulo:objeto"), caminho e
+        modificacao vêm do arquivo (None se não houver) e contrato é a
+        versão do contrato (None se só for conhecida ao importar).
+    """
+    def __init__(self,nome,modulo,caminho=None,modificacao=None,contrato=None):
+        self.nome = nome
+        self.modulo = modulo
+        self.caminho = caminho
+        self.modificacao = modificacao
+        self.contrato = contrato
+        # o módulo (ou a classe Agente) depois de importado
+        self.carregado = None
+
+    def __repr__(self):
+        return "Entrada(%s, %s, contrato %s)" % (self.nome,self.caminho or self.modulo,self.contrato)
+
+
+def contratoDoArquivo(caminho):
+    """ Lê (sem importar) o arquivo de uma personagem e devolve a versão
+        do seu contrato, ou None se ele não parecer uma personagem. Um
+        arquivo que não pode ser lido ou interpretado levanta OSError,
+        SyntaxError ou ValueError (como UnicodeDecodeError).
+    """
+    with open(caminho,"rb") as f:
+        arvore = ast.parse(f.read(),caminho)
+    nomes = { no.name for no in arvore.body if isinstance(no,(ast.ClassDef,ast.FunctionDef)) }
+    if "Agente" in nomes:
+        return CONTRATO_OBJETOS
+    if {"inicializa","planejar","agir"} <= nomes:
+        return CONTRATO_MODULO
+    return None
+
+
+class Catalogo:
+    """ Classe Catalogo: as personagens dos arquivos personagem*.py dos
+        diretórios dados, dos pontos de entrada instalados e as
+        registradas por nome, indexadas pelo nome (o nome do arquivo
+        sem "personagem" e sem ".py", como "10736987").
+    """
+    def __init__(self,diretorios=(".",),arquivo=None,pontosDeEntrada=True):
+        self.diretorios = diretorios
+        self.arquivo = arquivo
+        self.pontosDeEntrada = pontosDeEntrada
+        self.entradas = None
+        self.explicitas = {}
+        # módulos importáveis pedidos pelo nome, fora do catálogo
+        self.avulsas = {}
+
+    def varra(self):
+        """ Procura as personagens (de novo, se já tiverem sido
+            procuradas): só os arquivos novos ou modificados são lidos, e
+            as personagens modificadas serão reimportadas ao carregar.
+        """
+        anteriores = self.entradas
+        if anteriores is None:
+            anteriores = {}
+            if self.arquivo is not None and os.path.exists(self.arquivo):
+                with open(self.arquivo) as f:
+                    for nome,(modulo,caminho,modificacao,contrato) in json.load(f).items():
+                        anteriores[nome] = Entrada(nome,modulo,caminho,modificacao,contrato)
+        entradas = {}
+        for diretorio in self.diretorios:
+            for arquivo in sorted(os.listdir(diretorio)):
+                if not (arquivo.startswith(PREFIXO) and arquivo.endswith(".py")):
+                    continue
+                modulo = arquivo[:-3]
+                nome = modulo[len(PREFIXO):]
+                if nome in entradas:
+                    continue
+                caminho = os.path.abspath(os.path.join(diretorio,arquivo))
+                try:
+                    modificacao = os.stat(caminho).st_mtime
+                except OSError:
+                    continue # o arquivo sumiu durante a busca
+                entrada = anteriores.get(nome)
+                if entrada is not None and entrada.caminho == caminho and entrada.modificacao == modificacao:
+                    entradas[nome] = entrada
+                    continue
+                try:
+                    contrato = contratoDoArquivo(caminho)
+                except (OSError,SyntaxError,ValueError):
+                    # arquivo com erro: a personagem fica no catálogo (com o
+                    # contrato desconhecido), sem impedir a busca das outras,
+                    # e o erro só aparece se uma partida precisar dela
+                    contrato = None
+                else:
+                    if contrato is None:
+                        continue
+                entradas[nome] = Entrada(nome,modulo,caminho,modificacao,contrato)
+                if entrada is not None and entrada.carregado is not None:
+                    # o arquivo mudou: a próxima carga reimporta o módulo
+                    sys.modules.pop(modulo,None)
+        if self.pontosDeEntrada:
+            for ponto in entry_points(group=GRUPO):
+                if ponto.name not in entradas:
+                    entradas[ponto.name] = anteriores.get(ponto.name) or Entrada(ponto.name,ponto.value)
+        self.entradas = entradas
+
+    def registre(self,nome,modulo):
+        """ Registra uma personagem com o nome dado: modulo pode ser um
+            módulo, uma classe Agente ou o nome de um módulo importável
+            (que só será importado ao carregar).
+        """
+        if isinstance(modulo,str):
+            entrada = Entrada(nome,modulo)
+        else:
+            entrada = Entrada(nome,modulo.__name__)
+            entrada.carregado = modulo
+        self.explicitas[nome] = entrada
+
+    def nomes(self):
+        """ Devolve os nomes das personagens do catálogo, em ordem.
+        """
+        if self.entradas is None:
+            self.varra()
+        return sorted(set(self.entradas)|set(self.explicitas))
+
+    def entrada(self,nome):
+        """ Devolve a Entrada da personagem com o nome dado; aceita também
+            o nome do módulo (como "personagem10736987") e, para manter o
+            comportamento do __import__, qualquer módulo importável.
+        """
+        if self.entradas is None:
+            self.varra()
+        for chave in (nome,nome[len(PREFIXO):] if nome.startswith(PREFIXO) else None):
+            entrada = self.explicitas.get(chave) or self.entradas.get(chave)
+            if entrada is not None:
+                return entrada
+        if nome in self.avulsas:
+            return self.avulsas[nome]
+        try:
+            encontrado = importlib.util.find_spec(nome) is not None
+        except (ImportError,ValueError):
+            encontrado = False
+        if not encontrado:
+            raise KeyError("personagem desconhecida: %s" % nome)
+        entrada = self.avulsas[nome] = Entrada(nome[len(PREFIXO):] if nome.startswith(PREFIXO) else nome,nome)
+        return entrada
+
+    def primeira(self):
+        """ Devolve a Entrada da primeira personagem do catálogo.
+        """
+        nomes = self.nomes()
+        if not nomes:
+            raise LookupError("nenhuma personagem encontrada")
+        return self.entrada(nomes[0])
+
+    def carregue(self,nome):
+        """ Importa (só na primeira vez) e devolve o módulo da personagem,
+            ou a classe Agente dada por um ponto de entrada. nome pode ser
+            o nome da personagem ou a sua Entrada.
+        """
+        entrada = nome if isinstance(nome,Entrada) else self.entrada(nome)
+        if entrada.carregado is None:
+            modulo,_,objeto = entrada.modulo.partition(":")
+            if modulo in sys.modules or entrada.caminho is None:
+                carregado = importlib.import_module(modulo)
+            else:
+                especificacao = importlib.util.find_spec(modulo)
+                if especificacao is not None and os.path.abspath(especificacao.origin or "") == entrada.caminho:
+                    carregado = importlib.import_module(modulo)
+                else:
+                    # o diretório da personagem não está no sys.path
+                    especificacao = importlib.util.spec_from_file_location(modulo,entrada.caminho)
+                    carregado = importlib.util.module_from_spec(especificacao)
+                    sys.modules[modulo] = carregado
+                    especificacao.loader.exec_module(carregado)
+            for parte in objeto.split(".") if objeto else ():
+                carregado = getattr(carregado,parte)
+            if entrada.contrato is None:
+                entrada.contrato = CONTRATO_OBJETOS if isinstance(carregado,type) or hasattr(carregado,"Agente") \
+                                   else CONTRATO_MODULO
+            entrada.carregado = carregado
+        return entrada.carregado
+
+    def grave(self):
+        """ Grava no arquivo os dados das personagens dos arquivos.
+        """
+        if self.entradas is None:
+            self.varra()
+        with open(self.arquivo,"w") as f:
+            json.dump({ nome: (e.modulo,e.caminho,e.modificacao,e.contrato)
+                        for nome,e in self.entradas.items() if e.caminho is not None },f,indent=1)
+
+
+# catálogo usado pelo MundoDeWumpus quando a personagem é dada pelo nome
+padrao = None
+
+
+def catalogoPadrao():
+    """ Devolve o catálogo padrão do processo (das personagens do
+        diretório atual e dos pontos de entrada), criado no primeiro uso.
+    """
+    global padrao
+    if padrao is None:
+        padrao = Catalogo()
+    return padrao
+
+
+if __name__=="__main__":
+    catalogo = catalogoPadrao()
+    for nome in catalogo.nomes():
+        print(catalogo.entrada(nome))
@@ -0,0 +1,112 @@
+
+""" Módulo conhecimento: define a BaseConhecimento, uma representação
+    compacta do que uma personagem sabe sobre o Mundo de Wumpus.
+
+    Em vez de uma matriz NxN de listas de rótulos ("V", "L", "P?", ...),
+    cada sala é guardada como um inteiro em um array contíguo de N*N
+    posições (a sala (i,j) fica na posição i*N+j), em que cada rótulo
+    corresponde a um bit. Testar um rótulo passa a ser uma operação de
+    bits, em vez de uma busca linear em uma lista de strings.
+"""
+
+from array import array
+
+# rótulos usados pelas personagens para anotar o conhecimento das salas:
+# "V" = visitada, "L" = livre, "M" = muro, "P"/"W" = poço/Wumpus,
+# "P?"/"W?" = possível poço/Wumpus, "B" = brisa, "F" = fedor e
+# "D" = sala onde outra personagem (a dummy) foi encontrada.
+rotulos = ["V","L","M","P","W","P?","W?","B","F","D"]
+
+# associa a cada rótulo um bit (V=1, L=2, M=4, ...)
+V,L,M,P,W,PS,WS,B,F,D = ( 1<<n for n in range(len(rotulos)) )
+mascaras = { rotulo: 1<<n for n,rotulo in enumerate(rotulos) }
+
+
+class BaseConhecimento:
+    """ Classe BaseConhecimento: matriz NxN (dobrada na forma de um toro)
+        em que cada sala é uma máscara de bits com os rótulos conhecidos.
+        Os índices i e j podem estar fora de 0..N-1: são sempre corrigidos
+        com o operador módulo, como nos movimentos das personagens.
+    """
+    def __init__(self,N):
+        """ Construtor: cria uma base NxN sem nenhum rótulo.
+        """
+        self.N = N
+        self.salas = array("H",bytes(2*N*N))
+        # versão da base: muda sempre que algum rótulo é alterado, para que
+        # quem guarda cálculos feitos sobre a base saiba quando refazê-los
+        self.versao = 0
+        # funções chamadas (com o índice k da sala) a cada sala alterada
+        self.observadores = []
+
+    def observe(self,observador):
+        """ Registra uma função observador(k), chamada sempre que os
+            rótulos da sala k (índice i*N+j) forem alterados.
+        """
+        self.observadores.append(observador)
+
+    def marque(self,i,j,mascara):
+        """ Acrescenta os rótulos da máscara à sala (i,j).
+        """
+        self.defina(i,j,self.salas[(i%self.N)*self.N+j%self.N] | mascara)
+
+    def desmarque(self,i,j,mascara):
+        """ Retira os rótulos da máscara da sala (i,j).
+        """
+        self.defina(i,j,self.salas[(i%self.N)*self.N+j%self.N] & ~mascara)
+
+    def defina(self,i,j,mascara):
+        """ Substitui todos os rótulos da sala (i,j) pelos da máscara.
+        """
+        k = (i%self.N)*self.N+j%self.N
+        if self.salas[k] != mascara:
+            self.salas[k] = mascara
+            self.versao += 1
+            for observador in self.observadores:
+                observador(k)
+
+    def tem(self,i,j,mascara):
+        """ Devolve (como inteiro, diferente de zero se verdadeiro) quais
+            rótulos da máscara estão presentes na sala (i,j).
+        """
+        return self.salas[(i%self.N)*self.N+j%self.N] & mascara
+
+    def mescle(self,outra):
+        """ Acrescenta a esta base todos os rótulos conhecidos pela outra
+            (que deve ter a mesma dimensão e o mesmo sistema de coordenadas).
+        """
+        salas = self.salas
+        for k,mascara in enumerate(outra.salas):
+            if mascara and salas[k] | mascara != salas[k]:
+                salas[k] |= mascara
+                self.versao += 1
+                for observador in self.observadores:
+                    observador(k)
+
+    def rotulos(self,i,j):
+        """ Devolve a lista de rótulos (strings) da sala (i,j).
+        """
+        mascara = self.salas[(i%self.N)*self.N+j%self.N]
+        return [ rotulo for n,rotulo in enumerate(rotulos) if mascara & (1<<n) ]
+
+    def visao(self):
+        """ Devolve uma visão da base como matriz de listas de rótulos,
+            de modo que visao[i][j] == base.rotulos(i,j) (útil para mostrar
+            o conhecimento na tela ou para código antigo que usa rótulos).
+        """
+        return VisaoRotulos(self)
+
+
+class VisaoRotulos:
+    """ Classe VisaoRotulos: permite ler uma BaseConhecimento como se fosse
+        uma matriz NxN de listas de rótulos, sem copiá-la.
+    """
+    def __init__(self,base):
+        self.base = base
+
+    def __len__(self):
+        return self.base.N
+
+    def __getitem__(self,i):
+        base = self.base
+        return [ base.rotulos(i,j) for j in range(base.N) ]
@@ -0,0 +1,141 @@
+
+""" CORPUS DE MUNDOS DE WUMPUS
+
+    Guarda muitos mundos em um único arquivo binário, para que torneios e
+    medidas de desempenho usem sempre os mesmos conjuntos de mapas, sem
+    sortear nem interpretar cada mapa de novo.
+
+    Formato (inteiros little-endian):
+      - cabeçalho: a assinatura b"WCRP", a versão do formato (2 bytes),
+        o número de mundos (4 bytes) e a posição do índice no arquivo
+        (8 bytes);
+      - as salas de cada mundo, um byte por sala (sala (i,j) no byte
+        i*N+j, como em MundoDeWumpus.mundo), um mundo depois do outro;
+      - o índice: para cada mundo, a posição de suas salas (8 bytes),
+        N (4 bytes) e o número de Wumpus (4 bytes).
+
+    O índice fica no final para que os mundos possam ser escritos um a um,
+    sem conhecer o total de antemão. O Corpus mapeia o arquivo na memória
+    (mmap), de modo que ler o k-ésimo mundo custa apenas a cópia das suas
+    salas, e percorrer o corpus usa memória constante.
+
+    Uso:
+        python3 corpus.py ARQUIVO QUANTIDADE N [SEMENTE]
+"""
+
+import mmap
+import struct
+
+from mundo import WUMPUS
+
+ASSINATURA = b"WCRP"
+VERSAO = 1
+cabecalho = struct.Struct("<4sHIQ")
+entrada = struct.Struct("<QII")
+
+
+class EscritorCorpus:
+    """ Classe EscritorCorpus: escreve um arquivo de corpus, um mundo de
+        cada vez. Pode ser usada em um bloco with, que grava o índice e
+        fecha o arquivo.
+    """
+    def __init__(self,arquivo):
+        self.arquivo = open(arquivo,"wb")
+        # o cabeçalho definitivo só é escrito no final
+        self.arquivo.write(bytes(cabecalho.size))
+        self.indice = bytearray()
+        self.nMundos = 0
+
+    def acrescente(self,mundo,N=None):
+        """ Acrescenta um mundo (bytearray de N*N salas) ao corpus.
+        """
+        if N is None:
+            N = int(len(mundo)**0.5)
+        if len(mundo) != N*N:
+            raise ValueError("o mundo tem %d salas, e não %dx%d" % (len(mundo),N,N))
+        self.indice += entrada.pack(self.arquivo.tell(),N,mundo.count(WUMPUS))
+        self.arquivo.write(mundo)
+        self.nMundos += 1
+
+    def feche(self):
+        if self.arquivo.closed:
+            return
+        posicao = self.arquivo.tell()
+        self.arquivo.write(self.indice)
+        self.arquivo.seek(0)
+        self.arquivo.write(cabecalho.pack(ASSINATURA,VERSAO,self.nMundos,posicao))
+        self.arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*excecao):
+        self.feche()
+
+
+class Corpus:
+    """ Classe Corpus: lê um arquivo de corpus mapeado na memória. Os
+        mundos são acessados por índice (corpus[k] devolve uma cópia
+        das salas, que o MundoDeWumpus pode alterar à vontade) ou
+        percorridos um a um, sem carregar o arquivo inteiro.
+    """
+    def __init__(self,arquivo):
+        self.arquivo = arquivo
+        with open(arquivo,"rb") as f:
+            self.mapa = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+        assinatura,versao,self.nMundos,self.posicaoIndice = cabecalho.unpack_from(self.mapa,0)
+        if assinatura != ASSINATURA or versao != VERSAO:
+            self.mapa.close()
+            raise ValueError("%s não é um corpus de mundos de Wumpus (versão %d)" % (arquivo,VERSAO))
+
+    def __len__(self):
+        return self.nMundos
+
+    def entrada(self,k):
+        """ Devolve a entrada (posição, N, nWumpus) do índice do k-ésimo mundo.
+        """
+        if not 0 <= k < self.nMundos:
+            raise IndexError(k)
+        return entrada.unpack_from(self.mapa,self.posicaoIndice+k*entrada.size)
+
+    def N(self,k):
+        return self.entrada(k)[1]
+
+    def nWumpus(self,k):
+        return self.entrada(k)[2]
+
+    def __getitem__(self,k):
+        posicao,N = self.entrada(k)[:2]
+        return bytearray(self.mapa[posicao:posicao+N*N])
+
+    def __iter__(self):
+        for k in range(self.nMundos):
+            yield self[k]
+
+    def feche(self):
+        self.mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*excecao):
+        self.feche()
+
+
+def geraCorpus(arquivo,quantidade,N,semente=0,**parametros):
+    """ Grava no arquivo um corpus de mundos NxN sorteados por
+        gerador.geraMundo com as sementes semente, semente+1, ...
+        (os demais parâmetros são repassados a geraMundo).
+    """
+    from gerador import geraMundo
+    with EscritorCorpus(arquivo) as escritor:
+        for s in range(semente,semente+quantidade):
+            escritor.acrescente(geraMundo(N,s,**parametros),N)
+
+
+if __name__=="__main__":
+    import sys
+    if len(sys.argv) < 4:
+        print(__doc__.strip().splitlines()[-1].strip())
+        sys.exit(1)
+    geraCorpus(sys.argv[1],int(sys.argv[2]),int(sys.argv[3]),int(sys.argv[4]) if len(sys.argv) > 4 else 0)
@@ -0,0 +1,153 @@
+
+""" MEDIDAS DE DESEMPENHO DO MUNDO DE WUMPUS
+
+    Joga partidas em mundos sorteados (com sementes fixas) de vários
+    tamanhos e mede, para cada tamanho N:
+      - o tempo de montagem do MundoDeWumpus (campos, personagens etc.);
+      - quantos turnos por segundo o laço principal processa;
+      - a latência (p50 e p99) de cada fase de um turno: montaPercepcao,
+        planejar e agir da personagem e as ações ande, gireDireita,
+        gireEsquerda, atire e compartilhe (veja instrumentacao.py);
+      - o pico de memória alocada (medido com o tracemalloc, em uma
+        segunda execução, pois o tracemalloc deixa tudo mais lento).
+
+    As medidas podem ser gravadas como referência em um arquivo JSON, e as
+    execuções seguintes são comparadas com ela: qualquer piora maior do
+    que o limiar (por padrão 20%) é apontada como regressão, e o programa
+    termina com código 1.
+
+    Uso:
+        python3 desempenho.py [-n N ...] [-t TURNOS] [-s SEMENTE]
+                              [-r REFERENCIA] [--grave] [-l LIMIAR]
+"""
+
+import json
+import os
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from mundo import MundoDeWumpus
+from gerador import geraMundo
+from instrumentacao import Instrumentacao
+
+# tamanhos de mundo medidos por padrão
+TAMANHOS = (5,50,500,5000)
+# fases com menos chamadas do que isso não são comparadas (ruído demais)
+MINIMO_CHAMADAS = 20
+
+
+def jogaTurnos(N,turnos,semente,modulo=None,instrumentacao=None):
+    """ Joga partidas em mundos NxN (sorteados com as sementes semente,
+        semente+1, ...) até completar o número de turnos dado. Devolve o
+        tempo de montagem e o tempo do laço principal, em segundos, e o
+        número de turnos jogados.
+    """
+    montagem = laco = 0.0
+    jogados = 0
+    s = semente
+    with open(os.devnull,"w") as nulo, redirect_stdout(nulo):
+        while jogados < turnos:
+            mundo = geraMundo(N,s)
+            inicio = perf_counter()
+            m = MundoDeWumpus(modulo=modulo,mundo=mundo,N=N,semente=s,
+                              maxTurnos=turnos-jogados,instrumentacao=instrumentacao)
+            meio = perf_counter()
+            m.processaJogo()
+            fim = perf_counter()
+            montagem += meio-inicio
+            laco += fim-meio
+            jogados += max(1,m.turnos)
+            s += 1
+    return montagem,laco,jogados
+
+
+def meca(N,turnos=2000,semente=0,modulo=None,memoria=True):
+    """ Mede o desempenho em mundos NxN e devolve um dicionário com a
+        montagem (s), os turnos por segundo, o pico de memória (bytes,
+        ou None) e o resumo das fases (veja Instrumentacao.resumo).
+    """
+    instrumentacao = Instrumentacao()
+    montagem,laco,jogados = jogaTurnos(N,turnos,semente,modulo,instrumentacao)
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            jogaTurnos(N,turnos,semente,modulo)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return { "turnos": jogados,
+             "montagem": montagem,
+             "turnosPorSegundo": jogados/laco if laco > 0 else 0.0,
+             "picoMemoria": pico,
+             "fases": instrumentacao.resumo() }
+
+
+def compare(atual,referencia,limiar=0.2):
+    """ Compara as medidas atuais com as de referência (dicionários
+        N -> medidas, como os devolvidos por meca) e devolve a lista das
+        regressões (pioras maiores que o limiar, em fração), em texto.
+        As latências vêm de histogramas com faixas de ~19%, então um
+        limiar menor do que isso aponta qualquer mudança de faixa.
+    """
+    regressoes = []
+    for N,medidas in atual.items():
+        base = referencia.get(N)
+        if base is None:
+            continue
+        def piorou(nome,valor,valorBase,maiorEhPior=True):
+            if valor is None or not valorBase:
+                return
+            variacao = valor/valorBase-1 if maiorEhPior else 1-valor/valorBase
+            if variacao > limiar:
+                regressoes.append("N=%s: %s piorou %.0f%% (%.4g -> %.4g)" % (N,nome,100*variacao,valorBase,valor))
+        piorou("turnos/s",medidas["turnosPorSegundo"],base["turnosPorSegundo"],maiorEhPior=False)
+        piorou("montagem (s)",medidas["montagem"],base["montagem"])
+        piorou("pico de memória (bytes)",medidas["picoMemoria"],base["picoMemoria"])
+        for fase,r in medidas["fases"].items():
+            b = base["fases"].get(fase)
+            if b is not None and min(r["chamadas"],b["chamadas"]) >= MINIMO_CHAMADAS:
+                piorou(fase+" p50 (ns)",r["p50"],b["p50"])
+    return regressoes
+
+
+def imprima(N,medidas):
+    pico = medidas["picoMemoria"]
+    print("N=%d: %d turnos, montagem %.3fs, %.1f turnos/s, pico de memória %s" % (N,medidas["turnos"],
+          medidas["montagem"],medidas["turnosPorSegundo"],"-" if pico is None else "%.1f MiB" % (pico/2**20)))
+    print("    %-16s %10s %10s %10s" % ("fase","chamadas","p50(us)","p99(us)"))
+    for fase,r in sorted(medidas["fases"].items()):
+        print("    %-16s %10d %10.2f %10.2f" % (fase,r["chamadas"],r["p50"]/1000,r["p99"]/1000))
+
+
+if __name__=="__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Medidas de desempenho do Mundo de Wumpus")
+    parser.add_argument("-n","--N",type=int,nargs="+",default=list(TAMANHOS),help="tamanhos dos mundos")
+    parser.add_argument("-t","--turnos",type=int,default=2000,help="turnos jogados em cada tamanho")
+    parser.add_argument("-s","--semente",type=int,default=0,help="semente do primeiro mundo")
+    parser.add_argument("-r","--referencia",default="desempenho.json",help="arquivo JSON com as medidas de referência")
+    parser.add_argument("--grave",action="store_true",help="grava as medidas como a nova referência")
+    parser.add_argument("-l","--limiar",type=float,default=0.2,help="piora tolerada (fração) antes de apontar regressão")
+    parser.add_argument("--sem-memoria",dest="memoria",action="store_false",help="não mede o pico de memória")
+    args = parser.parse_args()
+
+    atual = {}
+    for N in args.N:
+        atual[str(N)] = meca(N,args.turnos,args.semente,memoria=args.memoria)
+        imprima(N,atual[str(N)])
+
+    if args.grave:
+        with open(args.referencia,"w") as f:
+            json.dump(atual,f,indent=1)
+        print("Referência gravada em",args.referencia)
+    elif os.path.exists(args.referencia):
+        with open(args.referencia) as f:
+            regressoes = compare(atual,json.load(f),args.limiar)
+        for regressao in regressoes:
+            print("REGRESSÃO:",regressao)
+        if regressoes:
+            sys.exit(1)
+        print("Nenhuma regressão em relação a",args.referencia)
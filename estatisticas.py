@@ -0,0 +1,149 @@
+
+""" Módulo estatisticas: resume os Resultados de muitas partidas (dezenas
+    de milhões, se preciso) em memória constante, sem guardar um registro
+    por partida.
+
+    As médias e variâncias são atualizadas a cada partida (algoritmo de
+    Welford), e os quantis vêm de histogramas com faixas logarítmicas
+    (veja instrumentacao.Histograma, aqui contando turnos, e não tempos;
+    os quantis dos turnos são, portanto, aproximados pelo topo de uma
+    faixa de ~19%). Tudo pode ser mesclado: cada
+    processo de um torneio acumula as suas partidas em um Agregador, e
+    os agregadores são somados no final, com o mesmo resultado que se
+    todas as partidas tivessem sido registradas em um só.
+"""
+
+from math import sqrt
+
+from mundo import VITORIA, desfechos
+from instrumentacao import Histograma
+
+# quantil da normal para os intervalos de confiança de 95%
+Z95 = 1.959964
+
+
+class Momentos:
+    """ Classe Momentos: número de medidas, média e soma dos quadrados
+        dos desvios (m2) de uma sequência de valores, atualizados um a um.
+    """
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+
+    def registre(self,x):
+        self.n += 1
+        delta = x-self.media
+        self.media += delta/self.n
+        self.m2 += delta*(x-self.media)
+
+    def mescle(self,outro):
+        """ Soma aos momentos os de outra sequência (fórmula de Chan et al.).
+        """
+        n = self.n+outro.n
+        if n == 0:
+            return
+        delta = outro.media-self.media
+        self.m2 += outro.m2+delta*delta*self.n*outro.n/n
+        self.media += delta*outro.n/n
+        self.n = n
+
+    def variancia(self):
+        """ Variância amostral (0 com menos de duas medidas).
+        """
+        return self.m2/(self.n-1) if self.n > 1 else 0.0
+
+    def desvio(self):
+        return sqrt(self.variancia())
+
+    def intervalo(self,z=Z95):
+        """ Intervalo de confiança (aproximação normal) para a média.
+        """
+        margem = z*sqrt(self.variancia()/self.n) if self.n else 0.0
+        return self.media-margem,self.media+margem
+
+
+def intervaloProporcao(sucessos,n,z=Z95):
+    """ Intervalo de confiança de Wilson para uma proporção (que, ao
+        contrário da aproximação normal, se comporta bem perto de 0 e 1).
+    """
+    if n == 0:
+        return 0.0,1.0
+    p = sucessos/n
+    z2 = z*z
+    centro = (p+z2/(2*n))/(1+z2/n)
+    margem = z*sqrt(p*(1-p)/n+z2/(4*n*n))/(1+z2/n)
+    return max(0.0,centro-margem),min(1.0,centro+margem)
+
+
+class Agregador:
+    """ Classe Agregador: acumula os Resultados das partidas: quantas
+        terminaram com cada desfecho, e os momentos e quantis dos turnos,
+        das flechas usadas e dos compartilhamentos, e, nas vitórias em
+        que o ótimo do mundo é conhecido, o excesso de turnos sobre ele.
+    """
+    def __init__(self):
+        self.desfechos = [0]*len(desfechos)
+        self.turnos = Momentos()
+        self.flechasUsadas = Momentos()
+        self.compartilhamentos = Momentos()
+        # quantis do número de turnos (aproximados: veja Histograma.quantil)
+        self.quantisTurnos = Histograma()
+        self.excesso = Momentos()
+
+    def registre(self,resultado):
+        """ Acrescenta o Resultado de uma partida.
+        """
+        self.desfechos[resultado.desfecho] += 1
+        self.turnos.registre(resultado.turnos)
+        self.flechasUsadas.registre(resultado.flechasUsadas)
+        self.compartilhamentos.registre(resultado.compartilhamentos)
+        self.quantisTurnos.registre(resultado.turnos)
+        if resultado.desfecho == VITORIA and resultado.otimo is not None:
+            self.excesso.registre(resultado.turnos-resultado.otimo)
+
+    def mescle(self,outro):
+        """ Soma ao agregador as partidas de outro.
+        """
+        for desfecho,contagem in enumerate(outro.desfechos):
+            self.desfechos[desfecho] += contagem
+        self.turnos.mescle(outro.turnos)
+        self.flechasUsadas.mescle(outro.flechasUsadas)
+        self.compartilhamentos.mescle(outro.compartilhamentos)
+        self.quantisTurnos.mescle(outro.quantisTurnos)
+        self.excesso.mescle(outro.excesso)
+
+    def partidas(self):
+        return self.turnos.n
+
+    def taxa(self,desfecho=VITORIA):
+        """ Fração das partidas com o desfecho dado, e o seu intervalo
+            de confiança de 95%.
+        """
+        n = self.partidas()
+        return (self.desfechos[desfecho]/n if n else 0.0),intervaloProporcao(self.desfechos[desfecho],n)
+
+    def resumo(self):
+        """ Devolve um dicionário com os números do agregador.
+        """
+        resumo = { "partidas": self.partidas() }
+        for desfecho,nome in enumerate(desfechos):
+            taxa,(inferior,superior) = self.taxa(desfecho)
+            resumo[nome] = { "partidas": self.desfechos[desfecho], "taxa": taxa, "ic95": (inferior,superior) }
+        for nome in ("turnos","flechasUsadas","compartilhamentos","excesso"):
+            momentos = getattr(self,nome)
+            resumo[nome] = { "media": momentos.media, "desvio": momentos.desvio(), "ic95": momentos.intervalo() }
+        resumo["turnos"]["p50"] = self.quantisTurnos.quantil(0.5)
+        resumo["turnos"]["p99"] = self.quantisTurnos.quantil(0.99)
+        return resumo
+
+    def __str__(self):
+        taxa,(inferior,superior) = self.taxa()
+        i,s = self.turnos.intervalo()
+        texto = ("%d partidas: vitórias %.1f%% (IC95%% %.1f%%-%.1f%%), turnos %.1f (IC95%% %.1f-%.1f, p50 ~%d, p99 ~%d),"
+                 " flechas %.2f, compartilhamentos %.2f" % (self.partidas(),100*taxa,100*inferior,100*superior,
+                 self.turnos.media,i,s,self.quantisTurnos.quantil(0.5),self.quantisTurnos.quantil(0.99),
+                 self.flechasUsadas.media,self.compartilhamentos.media))
+        if self.excesso.n:
+            texto += ", %.1f turnos acima do ótimo" % self.excesso.media
+        return texto
@@ -0,0 +1,49 @@
+
+""" GERADOR DE MUNDOS DE WUMPUS
+
+    Sorteia mundos NxN (em forma de toro) para o Mundo de Wumpus, a partir
+    de uma semente, de modo que o mesmo mundo possa ser reproduzido depois.
+    O mundo é guardado em um bytearray de N*N posições, em que a sala (i,j)
+    fica na posição i*N+j; assim mundos de 1000x1000 salas (ou maiores)
+    ocupam apenas 1 byte por sala.
+"""
+
+from random import Random
+
+from mundo import MURO,POCO,WUMPUS
+
+
+def geraMundo(N,semente=None,muros=0.1,pocos=0.1,wumpus=None,nWumpus=1,inicio=None):
+    """ Sorteia um mundo NxN e o devolve como um bytearray indexado por i*N+j.
+        Os parâmetros muros, pocos e wumpus são as densidades (frações das
+        salas do mundo) de cada tipo de sala; se a densidade de Wumpus não
+        for dada, são sorteados exatamente nWumpus Wumpus. A sala inicio
+        (por padrão o centro do tabuleiro, onde a personagemNUSP começa)
+        fica sempre livre.
+    """
+    aleatorio = Random(semente)
+    total = N*N
+    if inicio is None:
+        inicio = (N//2,N//2)
+    k0 = inicio[0]*N+inicio[1]
+    nMuros = int(round(muros*total))
+    nPocos = int(round(pocos*total))
+    if wumpus is not None:
+        nWumpus = max(1,int(round(wumpus*total)))
+    ocupadas = nMuros+nPocos+nWumpus
+    if ocupadas > total-1:
+        raise ValueError("densidades grandes demais para um mundo %dx%d" % (N,N))
+    mundo = bytearray(total) # todas as salas começam livres (LIVRE == 0)
+    # sorteia as salas ocupadas entre todas as salas, menos a sala inicial
+    sorteadas = aleatorio.sample(range(total-1),ocupadas)
+    for n,k in enumerate(sorteadas):
+        if k >= k0:
+            k += 1 # pula a sala inicial
+        if n < nMuros:
+            mundo[k] = MURO
+        elif n < nMuros+nPocos:
+            mundo[k] = POCO
+        else:
+            mundo[k] = WUMPUS
+    return mundo
+
@@ -0,0 +1,187 @@
+
+""" Módulo gravacao: grava e lê partidas do Mundo de Wumpus em um formato
+    binário compacto, para guardar milhões de partidas (para análise e
+    testes de regressão) sem os logs em texto.
+
+    Formato de um arquivo de gravação (inteiros little-endian):
+      - cabeçalho: a assinatura b"WGRV", a versão do formato (2 bytes),
+        N (4 bytes) e a semente da partida (8 bytes, -1 se não houver; só
+        são gravadas sementes inteiras de 0 a 2**63-1);
+      - as N*N salas do mundo inicial, um byte por sala (sala (i,j) no
+        byte i*N+j, como em MundoDeWumpus.mundo);
+      - um registro de tamanho fixo para cada ação processada: o turno
+        (4 bytes), o número da personagem (2 bytes), os bits da percepção
+        (1 byte), o código da ação (1 byte, com o bit INVIAVEL ligado se a
+        ação não pôde ser executada) e a posição e orientação reais da
+        personagem depois da ação (2+2 e 1+1 bytes).
+
+    Os registros estão em ordem de turno, de modo que o Leitor (que mapeia
+    o arquivo na memória com mmap) encontra o início de qualquer turno por
+    busca binária, sem ler o arquivo inteiro.
+"""
+
+import mmap
+import struct
+
+ASSINATURA = b"WGRV"
+VERSAO = 1
+cabecalho = struct.Struct("<4sHIq")
+registro = struct.Struct("<IHBBHHbb")
+
+# bits das percepções (usados também por lote.py e agentes.Plano) e de
+# outra personagem na sala
+FEDOR,BRISA,IMPACTO,URRO,ENCONTRO = 1,2,4,8,16
+# bit ligado no código da ação quando ela foi inviável
+INVIAVEL = 128
+
+# tamanho do buffer do Gravador antes de escrever no arquivo
+TAMANHO_BUFFER = 1<<16
+
+
+def bitsPercepcao(percepcao):
+    """ Converte uma percepção (lista de strings) nos bits FEDOR, BRISA,
+        IMPACTO, URRO e ENCONTRO (para qualquer outro nome de personagem).
+    """
+    bits = 0
+    for p in percepcao:
+        if p == "F":
+            bits |= FEDOR
+        elif p == "B":
+            bits |= BRISA
+        elif p == "I":
+            bits |= IMPACTO
+        elif p == "U":
+            bits |= URRO
+        else:
+            bits |= ENCONTRO
+    return bits
+
+
+def valideSemente(semente):
+    """ Verifica se a semente cabe no cabeçalho de uma gravação (None ou um
+        inteiro de 0 a 2**63-1); se não couber, levanta ValueError, já que
+        uma semente reduzida não reproduziria os sorteios da partida.
+    """
+    if semente is None:
+        return
+    if not isinstance(semente,int) or not 0 <= semente < 1<<63:
+        raise ValueError("semente %r não pode ser gravada: use None ou um inteiro de 0 a 2**63-1"
+                         % (semente,))
+
+
+class Gravador:
+    """ Classe Gravador: escreve uma partida em um arquivo, à medida que
+        ela é jogada. Os registros são acumulados em um buffer e escritos
+        em blocos. Pode ser usado em um bloco with, que fecha o arquivo.
+    """
+    def __init__(self,arquivo):
+        self.arquivo = open(arquivo,"wb")
+        self.buffer = bytearray()
+        self.nRegistros = 0
+
+    def inicie(self,N,semente,mundo):
+        """ Escreve o cabeçalho e o mundo inicial (chamado pelo MundoDeWumpus).
+        """
+        valideSemente(semente)
+        self.buffer += cabecalho.pack(ASSINATURA,VERSAO,N,-1 if semente is None else semente)
+        self.buffer += mundo
+
+    def registre(self,turno,personagem,percepcao,acao,posicao,orientacao):
+        """ Acrescenta o registro de uma ação (percepcao em bits e acao
+            como código, possivelmente com o bit INVIAVEL).
+        """
+        self.buffer += registro.pack(turno,personagem,percepcao,acao,posicao[0],posicao[1],
+                                     orientacao[0],orientacao[1])
+        self.nRegistros += 1
+        if len(self.buffer) >= TAMANHO_BUFFER:
+            self.descarregue()
+
+    def descarregue(self):
+        """ Escreve no arquivo os registros acumulados no buffer.
+        """
+        self.arquivo.write(self.buffer)
+        self.buffer.clear()
+
+    def feche(self):
+        if not self.arquivo.closed:
+            self.descarregue()
+            self.arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*excecao):
+        self.feche()
+
+
+class Leitor:
+    """ Classe Leitor: lê um arquivo de gravação mapeado na memória. Os
+        registros são tuplas (turno, personagem, percepcao, acao, i, j,
+        oi, oj), acessados por índice (leitor[r]) ou por turno.
+    """
+    def __init__(self,arquivo):
+        with open(arquivo,"rb") as f:
+            self.mapa = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+        assinatura,versao,self.N,semente = cabecalho.unpack_from(self.mapa,0)
+        if assinatura != ASSINATURA or versao != VERSAO:
+            self.mapa.close()
+            raise ValueError("%s não é uma gravação do Mundo de Wumpus (versão %d)" % (arquivo,VERSAO))
+        self.semente = None if semente < 0 else semente
+        self.inicio = cabecalho.size+self.N*self.N
+        self.nRegistros = (len(self.mapa)-self.inicio)//registro.size
+
+    def mundo(self):
+        """ Devolve o mundo inicial da partida (um bytearray de N*N salas).
+        """
+        return bytearray(self.mapa[cabecalho.size:self.inicio])
+
+    def __len__(self):
+        return self.nRegistros
+
+    def __getitem__(self,r):
+        if not 0 <= r < self.nRegistros:
+            raise IndexError(r)
+        return registro.unpack_from(self.mapa,self.inicio+r*registro.size)
+
+    def __iter__(self):
+        return registro.iter_unpack(self.mapa[self.inicio:self.inicio+self.nRegistros*registro.size])
+
+    def procure(self,turno):
+        """ Devolve o índice do primeiro registro do turno dado (ou de um
+            turno posterior), por busca binária.
+        """
+        ini,fim = 0,self.nRegistros
+        while ini < fim:
+            meio = (ini+fim)//2
+            if self[meio][0] < turno:
+                ini = meio+1
+            else:
+                fim = meio
+        return ini
+
+    def turno(self,k):
+        """ Devolve a lista dos registros do turno k.
+        """
+        registros = []
+        r = self.procure(k)
+        while r < self.nRegistros:
+            reg = self[r]
+            if reg[0] != k:
+                break
+            registros.append(reg)
+            r += 1
+        return registros
+
+    def turnos(self):
+        """ Número de turnos gravados.
+        """
+        return self[self.nRegistros-1][0]+1 if self.nRegistros else 0
+
+    def feche(self):
+        self.mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*excecao):
+        self.feche()
@@ -0,0 +1,373 @@
+
+""" HOSPEDEIRO DE PERSONAGENS DO MUNDO DE WUMPUS
+
+    Roda cada personagem em um processo trabalhador, separado do processo
+    do mundo, de modo que uma personagem lenta, com erros ou que derrube o
+    próprio processo não trave nem derrube a simulação: cada chamada tem
+    um prazo, e a personagem que o estoura (ou cujo processo morre) perde
+    a partida, que termina como TRAVADA; o trabalhador é substituído.
+
+    O mundo e o trabalhador trocam mensagens compactas por um Pipe:
+      - (INICIE, modulo, N, nFlechas): cria uma nova personagem do módulo;
+      - (PLANEJE, nFlechas, bits, nomes, salas, progresso): repassa a
+        percepção (os bits de gravacao.bitsPercepcao e os nomes das outras
+        personagens na sala), as salas (k, rótulos) do mundoCompartilhado
+        alteradas desde a mensagem anterior e, se a personagem estava
+        seguindo um plano, as suas ações executadas e percepções;
+      - (AJA, nFlechas): pede uma ação, e o trabalhador responde com o seu
+        código (o índice em mundo.acoes, ou None para uma ação
+        desconhecida, que o mundo conta como inviável), com (ações,
+        interrompa) para um agentes.Plano, ou com o texto do erro.
+    Só AJA tem resposta, de modo que cada vez da personagem custa uma ida
+    e volta pelo Pipe.
+
+    Um escalonador asyncio conduz muitas partidas ao mesmo tempo: enquanto
+    uma personagem pensa, as outras partidas seguem, e a vazão da avaliação
+    não depende da personagem mais lenta.
+
+    Uso:
+        python3 hospedeiro.py [-p PARTIDAS] [-n N] [-s SEMENTE] [-j PROCESSOS]
+                              [--prazo SEGUNDOS] [MODULO ...]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import traceback
+from contextlib import redirect_stdout
+
+import agentes
+from agentes import Plano
+from mundo import MundoDeWumpus, Resultado, acoes, TRAVADA
+from conhecimento import BaseConhecimento
+from gravacao import bitsPercepcao, FEDOR, BRISA, IMPACTO, URRO
+from catalogo import catalogoPadrao
+
+# tipos das mensagens do mundo para o trabalhador
+INICIE,PLANEJE,AJA = range(3)
+# percepções codificadas nos bits, na ordem de MundoDeWumpus.montaPercepcao
+percepcoes = ((FEDOR,"F"),(BRISA,"B"),(IMPACTO,"I"),(URRO,"U"))
+
+# prazo (s) de cada ação, e da primeira, que inclui importar o módulo
+PRAZO = 1.0
+PRAZO_INICIAL = 10.0
+
+
+class FalhaAgente(Exception):
+    """ Exceção FalhaAgente: a personagem estourou o prazo, teve um erro
+        ou o seu processo morreu.
+    """
+
+
+def atenda(conexao):
+    """ Laço do processo trabalhador: recebe as mensagens do mundo e as
+        repassa a uma personagem (um agentes.Agente) criada neste processo.
+        Um erro é guardado e devolvido na resposta ao próximo AJA.
+    """
+    agente = compartilhado = plano = None
+    erro = None
+    with open(os.devnull,"w") as nulo, redirect_stdout(nulo):
+        while True:
+            try:
+                mensagem = conexao.recv()
+            except EOFError:
+                return
+            try:
+                tipo = mensagem[0]
+                if tipo == INICIE:
+                    modulo,N,nFlechas = mensagem[1:]
+                    erro = None
+                    agente = agentes.criaAgente(catalogoPadrao().carregue(modulo))
+                    agente.nFlechas = nFlechas
+                    agente.mundoCompartilhado = compartilhado = BaseConhecimento(N)
+                    agente.inicializa(N)
+                elif erro is not None:
+                    if tipo == AJA:
+                        conexao.send(erro)
+                elif tipo == PLANEJE:
+                    agente.nFlechas,bits,nomes,salas,progresso = mensagem[1:]
+                    for k,rotulos in salas:
+                        compartilhado.defina(k//compartilhado.N,k%compartilhado.N,rotulos)
+                    if progresso is not None:
+                        plano.executadas,plano.percepcoes = progresso[0],list(progresso[1])
+                    agente.planejar([ p for bit,p in percepcoes if bits & bit ]+list(nomes))
+                else:
+                    agente.nFlechas = mensagem[1]
+                    acao,plano = agentes.interpreteResposta(agente.agir())
+                    if plano is None:
+                        conexao.send(acoes.index(acao) if acao in acoes else None)
+                    else:
+                        # "?" é uma ação desconhecida (inviável, como no mundo)
+                        conexao.send(("".join(a if a in acoes else "?" for a in plano.acoes),plano.interrompa))
+            except Exception:
+                erro = traceback.format_exc()
+                if mensagem[0] == AJA:
+                    conexao.send(erro)
+
+
+class Trabalhador:
+    """ Classe Trabalhador: um processo que hospeda personagens (uma de
+        cada vez) e a ponta do Pipe por onde o mundo fala com ele.
+    """
+    def __init__(self,contexto=multiprocessing):
+        self.conexao,outra = contexto.Pipe()
+        # marcado quando a personagem falha: o processo não é reaproveitado
+        self.falhou = False
+        self.processo = contexto.Process(target=atenda,args=(outra,),daemon=True)
+        self.processo.start()
+        outra.close()
+
+    def vivo(self):
+        return self.processo.is_alive()
+
+    def termine(self):
+        """ Mata o processo (que pode estar travado em uma personagem).
+        """
+        self.processo.kill()
+        self.processo.join()
+        self.conexao.close()
+
+
+class AgenteRemoto(agentes.Agente):
+    """ Classe AgenteRemoto: apresenta ao mundo, como um agentes.Agente,
+        uma personagem que roda em um Trabalhador. Pode ser usada direto
+        em um MundoDeWumpus (com chamadas bloqueantes, limitadas pelo
+        prazo) ou pelo Hospedeiro, que espera as respostas sem bloquear.
+    """
+    def __init__(self,trabalhador,modulo,prazo=PRAZO,prazoInicial=PRAZO_INICIAL):
+        self.trabalhador = trabalhador
+        self.modulo = modulo
+        # só os dados do catálogo: a personagem é importada no trabalhador
+        self.nome = catalogoPadrao().entrada(modulo).nome
+        self.prazo = prazo
+        self.proximoPrazo = prazoInicial
+        # salas do mundoCompartilhado alteradas desde a última percepção
+        self.alteradas = set()
+        # último plano devolvido pela personagem
+        self.plano = None
+
+    def inicializa(self,N):
+        self.mundoCompartilhado.observe(self.alteradas.add)
+        self.envie((INICIE,self.modulo,N,self.nFlechas))
+
+    def planejar(self,percepcao):
+        salas = self.mundoCompartilhado.salas
+        alteradas = tuple((k,salas[k]) for k in self.alteradas)
+        self.alteradas.clear()
+        nomes = tuple(p for p in percepcao if len(p) > 1)
+        progresso = None
+        if self.plano is not None:
+            progresso = (self.plano.executadas,tuple(self.plano.percepcoes))
+            self.plano = None
+        self.envie((PLANEJE,self.nFlechas,bitsPercepcao(percepcao),nomes,alteradas,progresso))
+
+    def agir(self):
+        self.envie((AJA,self.nFlechas))
+        if not self.trabalhador.conexao.poll(self.prazoDaVez()):
+            raise self.falha("prazo de %.3gs estourado" % self.prazo)
+        return self.resposta()
+
+    async def agirAssincrono(self):
+        """ Como agir, mas espera a resposta sem bloquear o laço asyncio.
+        """
+        self.envie((AJA,self.nFlechas))
+        conexao = self.trabalhador.conexao
+        laco = asyncio.get_running_loop()
+        pronta = laco.create_future()
+        laco.add_reader(conexao.fileno(),lambda: pronta.done() or pronta.set_result(None))
+        try:
+            await asyncio.wait_for(pronta,self.prazoDaVez())
+        except asyncio.TimeoutError:
+            raise self.falha("prazo de %.3gs estourado" % self.prazo) from None
+        finally:
+            laco.remove_reader(conexao.fileno())
+        return self.resposta()
+
+    def falha(self,motivo):
+        """ Devolve a FalhaAgente com o motivo dado, e marca o trabalhador
+            (que pode estar travado) para ser substituído.
+        """
+        self.trabalhador.falhou = True
+        return FalhaAgente("%s: %s" % (self.nome,motivo))
+
+    def prazoDaVez(self):
+        prazo,self.proximoPrazo = self.proximoPrazo,self.prazo
+        return prazo
+
+    def envie(self,mensagem):
+        try:
+            self.trabalhador.conexao.send(mensagem)
+        except OSError as erro:
+            raise self.falha("processo morreu (%s)" % erro) from None
+
+    def resposta(self):
+        try:
+            codigo = self.trabalhador.conexao.recv()
+        except (EOFError,OSError):
+            raise self.falha("processo morreu") from None
+        if isinstance(codigo,str):
+            raise self.falha("erro na personagem\n%s" % codigo)
+        if isinstance(codigo,tuple):
+            self.plano = Plano(*codigo)
+            return self.plano
+        return None if codigo is None else acoes[codigo]
+
+
+class Hospedeiro:
+    """ Classe Hospedeiro: mantém até processos trabalhadores e joga
+        partidas com as personagens neles, várias ao mesmo tempo.
+    """
+    def __init__(self,processos=None,prazo=PRAZO,prazoInicial=PRAZO_INICIAL):
+        self.processos = processos or os.cpu_count() or 1
+        self.prazo = prazo
+        self.prazoInicial = prazoInicial
+        self.livres = []
+        self.criados = 0
+        # avisa que um trabalhador foi devolvido (veja evento)
+        self.disponivel = None
+        self.laco = None
+
+    async def obtenha(self,n=1):
+        """ Devolve n Trabalhadores livres de uma vez, criando novos se
+            ainda houver vagas, ou esperando que outras partidas devolvam
+            os seus. Como uma partida só pega os trabalhadores quando há
+            todos os de que precisa, duas partidas nunca ficam esperando
+            uma pelos trabalhadores da outra.
+        """
+        while True:
+            vivos = []
+            for trabalhador in self.livres:
+                if trabalhador.vivo():
+                    vivos.append(trabalhador)
+                else:
+                    trabalhador.termine()
+                    self.criados -= 1
+            self.livres = vivos
+            if len(self.livres)+self.processos-self.criados >= n:
+                trabalhadores = [ self.livres.pop() for vez in range(min(n,len(self.livres))) ]
+                while len(trabalhadores) < n:
+                    self.criados += 1
+                    trabalhadores.append(Trabalhador())
+                return trabalhadores
+            disponivel = self.evento()
+            disponivel.clear()
+            await disponivel.wait()
+
+    def devolva(self,trabalhador,falhou=False):
+        if falhou or trabalhador.falhou:
+            trabalhador.termine()
+            self.criados -= 1
+        else:
+            self.livres.append(trabalhador)
+        self.evento().set()
+
+    def evento(self):
+        """ Devolve o Event que avisa que um trabalhador foi devolvido,
+            criando-o no laço de eventos em uso (o Hospedeiro pode jogar
+            em vários, um por asyncio.run, chamando jogue ou jogueVarias).
+        """
+        laco = asyncio.get_running_loop()
+        if self.laco is not laco:
+            self.laco = laco
+            self.disponivel = asyncio.Event()
+        return self.disponivel
+
+    async def jogue(self,modulo,**parametros):
+        """ Joga uma partida com a personagem do módulo dado (o nome do
+            módulo, ou uma lista deles, uma personagem para cada) e devolve
+            o seu Resultado. Os demais parâmetros são os do MundoDeWumpus.
+            Se uma personagem falhar, a partida termina como TRAVADA, e o
+            Resultado traz o motivo no atributo falha; os trabalhadores
+            das outras personagens voltam a ficar livres. Uma partida com
+            mais personagens do que processos não pode ser jogada
+            (ValueError).
+        """
+        modulos = modulo if isinstance(modulo,list) else [modulo]
+        if len(modulos) > self.processos:
+            raise ValueError("a partida tem %d personagens, mas só há %d processos" % (len(modulos),self.processos))
+        trabalhadores = await self.obtenha(len(modulos))
+        # outro erro que não uma FalhaAgente pode deixar uma resposta
+        # pendente em qualquer trabalhador: nesse caso, todos são substituídos
+        interrompida = True
+        try:
+            remotos = [ AgenteRemoto(t,m,self.prazo,self.prazoInicial) for t,m in zip(trabalhadores,modulos) ]
+            mundo = None
+            try:
+                mundo = MundoDeWumpus(modulo=remotos,**parametros)
+                while not mundo.terminou():
+                    turno = mundo.turno()
+                    try:
+                        personagem = next(turno)
+                        while True:
+                            personagem = turno.send(await personagem.agente.agirAssincrono())
+                    except StopIteration:
+                        pass
+                if mundo.gravador is not None:
+                    mundo.gravador.descarregue()
+                resultado = mundo.finalizaJogo()
+            except FalhaAgente as erro:
+                if mundo is None:
+                    resultado = Resultado(remotos[0].nome,TRAVADA,0,None)
+                else:
+                    resultado = Resultado(remotos[0].nome,TRAVADA,mundo.turnos,mundo.nWumpus)
+                resultado.falha = str(erro)
+            interrompida = False
+        finally:
+            for trabalhador in trabalhadores:
+                self.devolva(trabalhador,interrompida)
+        return resultado
+
+    async def jogueVarias(self,partidas,simultaneas=None):
+        """ Joga as partidas dadas (dicionários de parâmetros de jogue),
+            até simultaneas ao mesmo tempo (por padrão, uma por processo),
+            e devolve os Resultados na mesma ordem.
+        """
+        limite = asyncio.Semaphore(simultaneas or self.processos)
+        async def jogueUma(parametros):
+            async with limite:
+                return await self.jogue(**parametros)
+        return await asyncio.gather(*(jogueUma(p) for p in partidas))
+
+    def jogueTodas(self,partidas,simultaneas=None):
+        """ Versão síncrona de jogueVarias.
+        """
+        return asyncio.run(self.jogueVarias(partidas,simultaneas))
+
+    def feche(self):
+        for trabalhador in self.livres:
+            trabalhador.termine()
+        self.livres = []
+        self.criados = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*excecao):
+        self.feche()
+
+
+if __name__=="__main__":
+    import argparse
+    from gerador import geraMundo
+    from estatisticas import Agregador
+    parser = argparse.ArgumentParser(description="Partidas com as personagens em processos separados")
+    parser.add_argument("modulos",nargs="*",help="personagens (padrão: todas as do catálogo, veja catalogo.py)")
+    parser.add_argument("-p","--partidas",type=int,default=100,help="número de mundos sorteados")
+    parser.add_argument("-n","--N",type=int,default=5,help="dimensão dos mundos")
+    parser.add_argument("-s","--semente",type=int,default=0,help="semente do primeiro mundo")
+    parser.add_argument("-j","--processos",type=int,default=None,help="número de processos (padrão: um por núcleo)")
+    parser.add_argument("--prazo",type=float,default=PRAZO,help="prazo de cada ação, em segundos")
+    args = parser.parse_args()
+
+    modulos = args.modulos or catalogoPadrao().nomes()
+    partidas = [ { "modulo": m, "mundo": geraMundo(args.N,s), "N": args.N, "semente": s }
+                 for m in modulos for s in range(args.semente,args.semente+args.partidas) ]
+    with Hospedeiro(args.processos,args.prazo) as hospedeiro:
+        resultados = hospedeiro.jogueTodas(partidas)
+    agregadores = {}
+    for parametros,resultado in zip(partidas,resultados):
+        agregadores.setdefault(parametros["modulo"],Agregador()).registre(resultado)
+        if getattr(resultado,"falha",None):
+            print("falha:",resultado.falha.splitlines()[0])
+    for modulo,agregador in sorted(agregadores.items()):
+        print("%s: %s" % (modulo,agregador))
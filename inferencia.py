@@ -0,0 +1,224 @@
+
+""" Módulo inferencia: calcula a probabilidade de haver um perigo (poço ou
+    Wumpus) em cada sala, a partir das percepções da personagem.
+
+    Cada sala visitada dá uma observação: se o sinal do perigo (brisa ou
+    fedor) não foi percebido, nenhuma das salas adjacentes tem o perigo;
+    se foi, pelo menos uma delas tem. Supondo que cada sala desconhecida
+    tenha o perigo com uma probabilidade a priori, independentemente das
+    outras, a probabilidade exata de cada sala da fronteira é obtida
+    enumerando as atribuições consistentes com as observações.
+
+    As salas desconhecidas ligadas por observações formam componentes
+    independentes, enumeradas separadamente; o resultado de cada
+    componente é memorizado (pelas suas restrições), de modo que uma nova
+    percepção só refaz a conta da componente que ela toca.
+"""
+
+# componentes maiores do que isso não são enumeradas (2**n atribuições):
+# suas probabilidades são aproximadas restrição a restrição
+MAXIMO_COMPONENTE = 18
+# número de componentes memorizadas antes de esvaziar a memória
+MAXIMO_MEMORIA = 1<<14
+
+
+class Inferencia:
+    """ Classe Inferencia: restrições e probabilidades de um tipo de
+        perigo em um mundo NxN (salas indexadas por k = i*N+j).
+    """
+    def __init__(self,N,priori):
+        self.N = N
+        self.priori = priori
+        # salas sabidamente sem o perigo
+        self.seguras = set()
+        # restrições "pelo menos uma destas salas tem o perigo": número ->
+        # frozenset das salas ainda não sabidamente seguras
+        self.restricoes = {}
+        # frozenset das salas -> número da restrição (uma restrição repetida
+        # não acrescenta nada, e não é guardada de novo)
+        self.numeros = {}
+        self.proxima = 0
+        # sala -> números das restrições em que ela aparece
+        self.porSala = {}
+        # sala -> restrições (frozenset de frozensets) da sua componente
+        self.componente = {}
+        # restrições de uma componente -> probabilidades das suas salas
+        self.memoria = {}
+        # salas cujas probabilidades podem ter mudado (veja mudancas)
+        self.alteradas = set()
+
+    def observe(self,vizinhas,percebeu):
+        """ Registra a observação de uma sala visitada: vizinhas são as
+            salas adjacentes, e percebeu diz se o sinal do perigo foi
+            percebido lá.
+        """
+        if not percebeu:
+            for k in vizinhas:
+                self.segura(k)
+            return
+        salas = frozenset(k for k in vizinhas if k not in self.seguras)
+        if not salas:
+            return # observação contraditória: é ignorada
+        if salas in self.numeros:
+            return # restrição já conhecida
+        n = self.proxima
+        self.proxima += 1
+        self.restricoes[n] = salas
+        self.numeros[salas] = n
+        for k in salas:
+            self.porSala.setdefault(k,set()).add(n)
+        self.invalide(salas)
+
+    def segura(self,k):
+        """ Registra que a sala k não tem o perigo.
+        """
+        if k in self.seguras:
+            return
+        self.seguras.add(k)
+        self.alteradas.add(k)
+        numeros = self.porSala.pop(k,())
+        if not numeros:
+            return
+        afetadas = set()
+        for n in numeros:
+            del self.numeros[self.restricoes[n]]
+            salas = self.restricoes[n]-{k}
+            afetadas |= salas
+            if salas and salas not in self.numeros:
+                self.restricoes[n] = salas
+                self.numeros[salas] = n
+            else:
+                # contraditória (sem salas) ou igual a outra: é descartada
+                del self.restricoes[n]
+                for s in salas:
+                    self.porSala[s].discard(n)
+                    if not self.porSala[s]:
+                        del self.porSala[s]
+        self.invalide(afetadas|{k})
+
+    def certeza(self,k):
+        """ Registra que a sala k tem o perigo (por exemplo, porque outra
+            personagem o viu lá). Não faz nada se isso já se sabia.
+        """
+        if frozenset((k,)) in self.numeros:
+            return
+        self.seguras.discard(k)
+        self.observe((k,),True)
+
+    def reinicie(self):
+        """ Esquece as observações positivas (por exemplo, depois que o
+            Wumpus morre), mantendo as salas sabidamente seguras.
+        """
+        self.alteradas.update(self.porSala)
+        self.restricoes.clear()
+        self.numeros.clear()
+        self.porSala.clear()
+        self.componente.clear()
+
+    def mudancas(self):
+        """ Devolve (e esquece) as salas cujas probabilidades podem ter
+            mudado desde a última chamada.
+        """
+        alteradas = self.alteradas
+        self.alteradas = set()
+        return alteradas
+
+    def invalide(self,salas):
+        """ Descarta a componente das salas dadas (que será recalculada na
+            próxima consulta, ou lida da memória se não tiver mudado).
+        """
+        self.alteradas.update(salas)
+        for k in salas:
+            restricoes = self.componente.get(k)
+            if restricoes is not None:
+                for s in set().union(*restricoes):
+                    self.componente.pop(s,None)
+                    self.alteradas.add(s)
+                self.componente.pop(k,None)
+
+    def probabilidade(self,k):
+        """ Probabilidade de haver o perigo na sala k.
+        """
+        if k in self.seguras:
+            return 0.0
+        if k not in self.porSala:
+            return self.priori
+        restricoes = self.componente.get(k)
+        if restricoes is None:
+            restricoes = self.monteComponente(k)
+        probabilidades = self.memoria.get(restricoes)
+        if probabilidades is None:
+            if len(self.memoria) >= MAXIMO_MEMORIA:
+                self.memoria.clear()
+            probabilidades = self.memoria[restricoes] = self.enumere(restricoes)
+        return probabilidades[k]
+
+    def monteComponente(self,k):
+        """ Encontra as restrições ligadas (por salas em comum) à sala k,
+            e as associa a todas as salas da componente.
+        """
+        numeros = set()
+        salas = {k}
+        pilha = [k]
+        while pilha:
+            s = pilha.pop()
+            for n in self.porSala.get(s,()):
+                if n not in numeros:
+                    numeros.add(n)
+                    for t in self.restricoes[n]:
+                        if t not in salas:
+                            salas.add(t)
+                            pilha.append(t)
+        restricoes = frozenset(self.restricoes[n] for n in numeros)
+        for s in salas:
+            self.componente[s] = restricoes
+        return restricoes
+
+    def enumere(self,restricoes):
+        """ Devolve as probabilidades (sala -> probabilidade) das salas de
+            uma componente, enumerando as atribuições que satisfazem todas
+            as restrições, com o peso dado pela probabilidade a priori.
+        """
+        salas = sorted(set().union(*restricoes))
+        if len(salas) > MAXIMO_COMPONENTE:
+            return self.aproxime(restricoes,salas)
+        posicao = { s: i for i,s in enumerate(salas) }
+        # cada restrição é verificada quando a sua última sala é atribuída
+        verificar = [ [] for s in salas ]
+        for r in restricoes:
+            verificar[max(posicao[s] for s in r)].append([ posicao[s] for s in r ])
+        p = self.priori
+        atribuicao = [False]*len(salas)
+        total = [0.0]
+        comPerigo = [0.0]*len(salas)
+
+        def atribua(i,peso):
+            if i == len(salas):
+                total[0] += peso
+                for j,perigo in enumerate(atribuicao):
+                    if perigo:
+                        comPerigo[j] += peso
+                return
+            for perigo,fator in ((True,p),(False,1-p)):
+                atribuicao[i] = perigo
+                if all(any(atribuicao[j] for j in r) for r in verificar[i]):
+                    atribua(i+1,peso*fator)
+            atribuicao[i] = False
+
+        atribua(0,1.0)
+        if total[0] == 0:
+            return { s: self.priori for s in salas }
+        return { s: comPerigo[i]/total[0] for i,s in enumerate(salas) }
+
+    def aproxime(self,restricoes,salas):
+        """ Aproximação para componentes grandes demais: cada sala recebe
+            a maior das probabilidades que teria em cada restrição isolada.
+        """
+        p = self.priori
+        probabilidades = { s: p for s in salas }
+        for r in restricoes:
+            q = p/(1-(1-p)**len(r))
+            for s in r:
+                if q > probabilidades[s]:
+                    probabilidades[s] = q
+        return probabilidades
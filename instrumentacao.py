@@ -0,0 +1,108 @@
+
+""" Módulo instrumentacao: mede quanto tempo o Mundo de Wumpus gasta em
+    cada fase de um turno (montaPercepcao, planejar, agir e cada uma das
+    ações das personagens), para descobrir quais personagens e quais
+    fases estouram o orçamento de tempo por jogada.
+
+    Os tempos são guardados em histogramas de tamanho fixo (com faixas
+    que crescem geometricamente), dos quais se extraem as medianas (p50)
+    e os percentis 99 (p99) de cada fase ao final de uma partida.
+"""
+
+import cProfile
+from math import log2
+
+# número de faixas do histograma por potência de 2 (resolução de ~19%)
+FAIXAS_POR_OITAVA = 4
+
+
+class Histograma:
+    """ Classe Histograma: conta medidas não negativas em faixas
+        logarítmicas, usando memória constante. A unidade é a de quem
+        registra: a Instrumentacao registra tempos em nanossegundos, e o
+        estatisticas.Agregador, números de turnos.
+    """
+    def __init__(self):
+        self.contagens = {}
+        self.n = 0
+        self.total = 0
+        self.maximo = 0
+
+    def registre(self,medida):
+        """ Acrescenta uma medida ao histograma.
+        """
+        faixa = int(FAIXAS_POR_OITAVA*log2(medida)) if medida > 0 else 0
+        self.contagens[faixa] = self.contagens.get(faixa,0)+1
+        self.n += 1
+        self.total += medida
+        if medida > self.maximo:
+            self.maximo = medida
+
+    def mescle(self,outro):
+        """ Soma ao histograma as medidas de outro (por exemplo, de outro
+            processo); o resultado é o mesmo de registrar todas aqui.
+        """
+        for faixa,contagem in outro.contagens.items():
+            self.contagens[faixa] = self.contagens.get(faixa,0)+contagem
+        self.n += outro.n
+        self.total += outro.total
+        if outro.maximo > self.maximo:
+            self.maximo = outro.maximo
+
+    def quantil(self,q):
+        """ Devolve (aproximadamente, pelo topo da faixa) a medida abaixo
+            da qual está a fração q das medidas.
+        """
+        if self.n == 0:
+            return 0
+        alvo = q*self.n
+        acumulado = 0
+        for faixa in sorted(self.contagens):
+            acumulado += self.contagens[faixa]
+            if acumulado >= alvo:
+                return min(self.maximo,int(2**((faixa+1)/FAIXAS_POR_OITAVA)))
+        return self.maximo
+
+
+class Instrumentacao:
+    """ Classe Instrumentacao: guarda um Histograma para cada fase do
+        turno. Um objeto destes pode ser passado ao MundoDeWumpus, que
+        passa então a medir cada chamada.
+    """
+    def __init__(self):
+        self.fases = {}
+
+    def registre(self,fase,ns):
+        """ Registra que uma chamada da fase levou ns nanossegundos.
+        """
+        histograma = self.fases.get(fase)
+        if histograma is None:
+            histograma = self.fases[fase] = Histograma()
+        histograma.registre(ns)
+
+    def resumo(self):
+        """ Devolve um dicionário fase -> {chamadas, total, p50, p99, max},
+            com os tempos em nanossegundos.
+        """
+        return { fase: { "chamadas": h.n, "total": h.total, "p50": h.quantil(0.5),
+                         "p99": h.quantil(0.99), "max": h.maximo }
+                 for fase,h in self.fases.items() }
+
+    def imprima(self):
+        """ Mostra o resumo na tela, em microssegundos.
+        """
+        print("%-16s %10s %12s %10s %10s %10s" % ("fase","chamadas","total(us)","p50(us)","p99(us)","max(us)"))
+        for fase,r in sorted(self.resumo().items()):
+            print("%-16s %10d %12.1f %10.2f %10.2f %10.2f" % (fase,r["chamadas"],r["total"]/1000,
+                  r["p50"]/1000,r["p99"]/1000,r["max"]/1000))
+
+
+def perfile(funcao,arquivo):
+    """ Executa funcao() sob o cProfile, grava as estatísticas no arquivo
+        (que pode ser lido com o módulo pstats) e devolve o valor de funcao().
+    """
+    perfil = cProfile.Profile()
+    try:
+        return perfil.runcall(funcao)
+    finally:
+        perfil.dump_stats(arquivo)
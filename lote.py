@@ -0,0 +1,223 @@
+
+""" LOTES DE MUNDOS DE WUMPUS (requer NumPy)
+
+    Simula K mundos NxN ao mesmo tempo, cada um com uma única personagem
+    e sem a personagem dummy, com os mundos empilhados em um array K x N x N
+    e as posições, orientações, flechas etc. das K personagens em arrays.
+    Cada turno aplica as ações das K personagens (andar, colidir com
+    muros, morrer em poços ou para Wumpus, girar e atirar) com operações
+    vetorizadas do NumPy, o que permite obter estatísticas de políticas
+    simples (como a caminhada aleatória da dummy, ou políticas dadas por
+    uma tabela percepção -> ação) sobre milhões de partidas em segundos.
+
+    As regras são as mesmas de mundo.MundoDeWumpus; a função
+    valideContraEscalar compara as duas implementações jogada a jogada.
+    Diferenças: não há dummy (nem compartilhamento) e uma tentativa de
+    atirar sem flechas não faz nada, mas consome o turno.
+"""
+
+import numpy as np
+
+from agentes import Agente
+from mundo import LIVRE, MURO, POCO, WUMPUS, ANDAR, GIRARDIREITA, GIRARESQUERDA, ATIRAR, acoes
+from mundo import VITORIA, QUEDA, DEVORADA, TRAVADA
+from gravacao import FEDOR, BRISA, IMPACTO, URRO, bitsPercepcao
+
+
+class LoteDeMundos:
+    """ Classe LoteDeMundos: K mundos NxN simulados em paralelo. As
+        personagens começam, como no MundoDeWumpus, no centro do
+        tabuleiro e olhando para a direita.
+    """
+    def __init__(self,mundos,N):
+        """ Construtor: mundos é uma sequência de K mundos, cada um um
+            bytearray de N*N salas (como os de gerador.geraMundo), ou um
+            array K x N*N (ou K x N x N) de salas.
+        """
+        self.N = N
+        if isinstance(mundos,np.ndarray):
+            self.mundos = mundos.astype(np.int8).reshape(-1,N,N)
+        else:
+            self.mundos = np.array([ np.frombuffer(bytes(m),dtype=np.int8) for m in mundos ]).reshape(-1,N,N)
+        K = self.K = len(self.mundos)
+        self.indices = np.arange(K)
+        self.posicao = np.full((K,2),N//2,dtype=np.int64)
+        self.orientacao = np.tile(np.array([0,1],dtype=np.int64),(K,1))
+        self.nFlechas = np.ones(K,dtype=np.int64)
+        self.nWumpus = (self.mundos==WUMPUS).sum(axis=(1,2))
+        self.vivas = np.ones(K,dtype=bool)
+        self.impacto = np.zeros(K,dtype=bool)
+        self.urro = np.zeros(K,dtype=bool)
+        self.turnos = np.zeros(K,dtype=np.int64)
+        self.desfecho = np.full(K,-1,dtype=np.int8)
+        self.desfecho[self.nWumpus==0] = VITORIA
+        # campos de fedor e brisa (quantos Wumpus/poços há nas salas adjacentes)
+        self.fedor = self.vizinhanca(self.mundos==WUMPUS)
+        self.brisa = self.vizinhanca(self.mundos==POCO)
+
+    @staticmethod
+    def vizinhanca(mascara):
+        """ Conta, para cada sala de cada mundo, quantas das 4 salas
+            adjacentes (no toro) estão marcadas na máscara.
+        """
+        mascara = mascara.astype(np.int8)
+        return (np.roll(mascara,1,axis=1)+np.roll(mascara,-1,axis=1)
+                +np.roll(mascara,1,axis=2)+np.roll(mascara,-1,axis=2))
+
+    def ativos(self):
+        """ Máscara dos mundos em que a partida ainda não terminou.
+        """
+        return self.desfecho < 0
+
+    def percepcoes(self):
+        """ Devolve as percepções atuais das K personagens, como inteiros
+            com os bits FEDOR, BRISA, IMPACTO e URRO.
+        """
+        i,j = self.posicao[:,0],self.posicao[:,1]
+        return ((self.fedor[self.indices,i,j] > 0)*FEDOR + (self.brisa[self.indices,i,j] > 0)*BRISA
+                + self.impacto*IMPACTO + self.urro*URRO)
+
+    def passo(self,acao):
+        """ Aplica um turno: acao é um array de K códigos de ação (ANDAR,
+            GIRARDIREITA, GIRARESQUERDA ou ATIRAR), ignorados nos mundos
+            em que a partida já terminou.
+        """
+        N,idx = self.N,self.indices
+        pos,ori = self.posicao,self.orientacao
+        ativos = self.ativos()
+        self.impacto[:] = False
+        self.urro[:] = False
+
+        # andar: colide com muros, ou morre em poços e Wumpus
+        anda = ativos & (acao==ANDAR)
+        nova = (pos+ori)%N
+        muro = self.mundos[idx,nova[:,0],nova[:,1]] == MURO
+        self.impacto |= anda & muro
+        move = anda & ~muro
+        pos[move] = nova[move]
+        sala = self.mundos[idx,pos[:,0],pos[:,1]]
+        self.desfecho[move & (sala==POCO)] = QUEDA
+        self.desfecho[move & (sala==WUMPUS)] = DEVORADA
+        self.vivas &= ~(move & ((sala==POCO)|(sala==WUMPUS)))
+
+        # girar: direita (i,j) -> (j,-i) e esquerda (i,j) -> (-j,i)
+        direita = ativos & (acao==GIRARDIREITA)
+        esquerda = ativos & (acao==GIRARESQUERDA)
+        ori[direita] = np.stack((ori[direita,1],-ori[direita,0]),axis=1)
+        ori[esquerda] = np.stack((-ori[esquerda,1],ori[esquerda,0]),axis=1)
+
+        # atirar: mata o Wumpus da sala à frente, se houver
+        atira = ativos & (acao==ATIRAR) & (self.nFlechas > 0)
+        self.nFlechas -= atira
+        alvo = (pos+ori)%N
+        acerta = atira & (self.mundos[idx,alvo[:,0],alvo[:,1]] == WUMPUS)
+        if acerta.any():
+            k,ai,aj = idx[acerta],alvo[acerta,0],alvo[acerta,1]
+            self.mundos[k,ai,aj] = LIVRE
+            for di,dj in ((1,0),(-1,0),(0,1),(0,-1)):
+                np.subtract.at(self.fedor,(k,(ai+di)%N,(aj+dj)%N),1)
+            self.nWumpus -= acerta
+            self.urro |= acerta
+            self.desfecho[acerta & (self.nWumpus==0)] = VITORIA
+
+        self.turnos += ativos
+
+    def jogue(self,politica,maxTurnos=1000):
+        """ Joga até que todas as partidas terminem ou até maxTurnos turnos,
+            pedindo a cada turno as K ações a politica(lote, percepcoes).
+            As partidas não terminadas são marcadas como TRAVADA. Devolve
+            o array de desfechos.
+        """
+        for turno in range(maxTurnos):
+            if not self.ativos().any():
+                break
+            self.passo(politica(self,self.percepcoes()))
+        self.desfecho[self.ativos()] = TRAVADA
+        return self.desfecho
+
+    def resumo(self):
+        """ Devolve um dicionário com a contagem de cada desfecho e a
+            média de turnos das partidas.
+        """
+        return { "partidas": self.K,
+                 "vitorias": int((self.desfecho==VITORIA).sum()),
+                 "quedas": int((self.desfecho==QUEDA).sum()),
+                 "devoradas": int((self.desfecho==DEVORADA).sum()),
+                 "travadas": int((self.desfecho==TRAVADA).sum()),
+                 "turnos": float(self.turnos.mean()) if self.K else 0.0 }
+
+
+def politicaAleatoria(semente=None,acoesPossiveis=(ANDAR,GIRARDIREITA,GIRARESQUERDA)):
+    """ Devolve uma política que sorteia, para cada mundo, uma das ações
+        possíveis (por padrão andar ou girar, como uma caminhada aleatória).
+    """
+    gerador = np.random.default_rng(semente)
+    escolhas = np.array(acoesPossiveis)
+    def politica(lote,percepcoes):
+        return escolhas[gerador.integers(0,len(escolhas),lote.K)]
+    return politica
+
+
+def politicaTabela(tabela):
+    """ Devolve uma política que escolhe a ação pela tabela, indexada pelo
+        inteiro de bits da percepção (16 entradas, de 0 a 15).
+    """
+    tabela = np.asarray(tabela)
+    def politica(lote,percepcoes):
+        return tabela[percepcoes]
+    return politica
+
+
+class AgenteRoteiro(Agente):
+    """ Classe AgenteRoteiro: personagem que apenas executa uma lista de
+        ações fixa (usada para comparar o lote com o MundoDeWumpus).
+    """
+    def __init__(self,roteiro):
+        self.roteiro = list(roteiro)
+        self.proxima = 0
+
+    def inicializa(self,N):
+        pass
+
+    def planejar(self,percepcao):
+        pass
+
+    def agir(self):
+        acao = self.roteiro[self.proxima]
+        self.proxima += 1
+        return acao
+
+
+def valideContraEscalar(mundos,N,turnos=200,semente=None):
+    """ Joga os mesmos roteiros aleatórios de ações no lote e em um
+        MundoDeWumpus para cada mundo, verificando a cada turno que as
+        posições, orientações, percepções e desfechos coincidem. Levanta
+        AssertionError na primeira divergência; devolve o lote jogado.
+    """
+    from mundo import MundoDeWumpus
+    gerador = np.random.default_rng(semente)
+    # roteiros só com andar e girar, e um único tiro (o mundo escalar pede
+    # outra ação quando não há flechas, o que desalinharia os roteiros)
+    roteiros = gerador.choice([ANDAR,GIRARDIREITA,GIRARESQUERDA],size=(len(mundos),turnos))
+    roteiros[np.arange(len(mundos)),gerador.integers(0,turnos,len(mundos))] = ATIRAR
+    lote = LoteDeMundos(mundos,N)
+    escalares = [ MundoDeWumpus(modulo=AgenteRoteiro(acoes[a] for a in roteiro),mundo=bytearray(m),N=N,
+                                maxTurnos=None,maxRepeticoes=None)
+                  for m,roteiro in zip(mundos,roteiros) ]
+    for turno in range(turnos):
+        lote.passo(roteiros[:,turno])
+        percepcoes = lote.percepcoes()
+        for k,m in enumerate(escalares):
+            if m.terminou():
+                continue
+            m.passo()
+            p = m.personagemNUSP
+            assert list(lote.posicao[k]) == p.posicao, (k,turno,"posição")
+            assert list(lote.orientacao[k]) == p.orientacao, (k,turno,"orientação")
+            assert bool(lote.vivas[k]) == p.estaviva, (k,turno,"vida")
+            # o lote não tem dummies: os encontros não contam
+            bits = bitsPercepcao(m.montaPercepcao(p)) & (FEDOR|BRISA|IMPACTO|URRO)
+            assert percepcoes[k] == bits, (k,turno,"percepção")
+            if m.terminou():
+                assert lote.desfecho[k] == m.finalizaJogo().desfecho, (k,turno,"desfecho")
+    return lote
@@ -0,0 +1,338 @@
+
+""" Módulo montecarlo: planejador de Monte Carlo para a personagemNUSP.
+
+    A cada decisão, o planejador sorteia mundos compatíveis com o que a
+    personagem sabe (salas visitadas, muros e as restrições de poços e
+    Wumpus da inferência, veja inferencia.py) e simula neles, com um
+    modelo barato das regras de ande e atire, sequências de ações a
+    partir da posição atual. As ações são escolhidas em uma árvore de
+    busca (UCT) cujos nós são as sequências de ações (sem ramificar pelas
+    percepções), e a ação devolvida é a de maior valor esperado.
+
+    Cada decisão tem um orçamento de tempo. A árvore é reaproveitada de
+    um turno para o outro: depois que a personagem executa a ação, a
+    subárvore dessa ação vira a nova raiz. Opcionalmente, simulações
+    adicionais das ações da raiz rodam em um pool de processos, dentro do
+    mesmo orçamento de tempo, e são somadas às estatísticas da raiz.
+"""
+
+from math import log, sqrt
+from multiprocessing import Pool, current_process
+from random import Random
+from time import perf_counter
+
+from conhecimento import V, M
+
+# recompensas do modelo: matar o Wumpus, morrer, descobrir uma sala nova
+# e cada turno (que desencoraja girar sem sair do lugar)
+VITORIA = 1.0
+MORTE = -1.0
+EXPLORAR = 0.3
+TURNO = -0.01
+# desconto por turno
+DESCONTO = 0.97
+# constante de exploração do UCT
+EXPLORACAO = 0.7
+# tentativas de sortear uma componente da inferência antes de usar as
+# probabilidades marginais das suas salas
+TENTATIVAS = 200
+
+acoesModelo = ["A","D","E","T"]
+
+
+class Recorte:
+    """ Classe Recorte: a parte de uma Inferencia que interessa às salas
+        próximas da personagem, em uma forma compacta (que pode ser
+        enviada a outros processos) e da qual se sorteiam os perigos.
+    """
+    def __init__(self,inferencia,salas):
+        self.priori = inferencia.priori
+        componentes = {}
+        self.soltas = []
+        for k in salas:
+            if k in inferencia.seguras:
+                continue
+            if k in inferencia.porSala:
+                restricoes = inferencia.componente.get(k) or inferencia.monteComponente(k)
+                if restricoes not in componentes:
+                    cobertas = sorted(set().union(*restricoes))
+                    marginais = [ inferencia.probabilidade(s) for s in cobertas ]
+                    componentes[restricoes] = (cobertas,marginais)
+            else:
+                self.soltas.append(k)
+        self.componentes = [ (cobertas,marginais,list(restricoes))
+                             for restricoes,(cobertas,marginais) in componentes.items() ]
+        # salas mais prováveis de ter o perigo do que não ter
+        self.provaveis = { s for cobertas,marginais in componentes.values()
+                           for s,q in zip(cobertas,marginais) if q >= 0.5 }
+        if self.priori >= 0.5:
+            self.provaveis.update(self.soltas)
+
+    def amostre(self,aleatorio):
+        """ Sorteia o conjunto das salas com o perigo: cada componente é
+            sorteada pela priori até satisfazer as suas restrições (o que
+            dá exatamente a distribuição condicionada às observações).
+        """
+        p = self.priori
+        aleatorio = aleatorio.random
+        perigos = { k for k in self.soltas if aleatorio() < p }
+        for cobertas,marginais,restricoes in self.componentes:
+            for tentativa in range(TENTATIVAS):
+                sorteadas = { s for s in cobertas if aleatorio() < p }
+                if all(r & sorteadas for r in restricoes):
+                    break
+            else:
+                sorteadas = { s for s,q in zip(cobertas,marginais) if aleatorio() < q }
+            perigos |= sorteadas
+        return perigos
+
+
+class Crenca:
+    """ Classe Crenca: o que a personagem sabe sobre as salas a até raio
+        passos da sua posição (no seu próprio sistema de coordenadas).
+    """
+    def __init__(self,agente,raio):
+        N = self.N = agente.N
+        self.posicao = tuple(agente.posicao)
+        self.orientacao = tuple(agente.orientacao)
+        self.flechas = agente.nFlechas
+        pi,pj = self.posicao
+        salas = [ (pi+di)%N*N+(pj+dj)%N for di in range(-raio,raio+1)
+                  for dj in range(-(raio-abs(di)),raio-abs(di)+1) ]
+        salas = list(dict.fromkeys(salas))
+        mundo,compartilhado = agente.mundo.salas,agente.mundoCompartilhado.salas
+        self.muros = { k for k in salas if (mundo[k]|compartilhado[k]) & M }
+        self.visitadas = { k for k in salas if mundo[k] & V }
+        # salas sabidamente sem poço e sem Wumpus
+        self.seguras = self.visitadas | { k for k in salas if k in agente.pocos.seguras and k in agente.wumpus.seguras }
+        self.pocos = Recorte(agente.pocos,salas)
+        self.wumpus = Recorte(agente.wumpus,salas)
+
+
+class No:
+    """ Classe No: um nó da árvore de busca (uma sequência de ações),
+        com as visitas e a soma dos retornos de cada ação a partir dele.
+    """
+    def __init__(self):
+        self.visitas = 0
+        self.filhos = {}
+        self.n = {}
+        self.soma = {}
+
+    def escolha(self,acoes,aleatorio):
+        """ Escolhe a ação pelo critério UCB1 (as não tentadas primeiro).
+        """
+        novas = [ a for a in acoes if a not in self.n ]
+        if novas:
+            return novas[aleatorio.randrange(len(novas))]
+        logaritmo = log(self.visitas)
+        return max(acoes,key=lambda a: self.soma[a]/self.n[a]+EXPLORACAO*sqrt(logaritmo/self.n[a]))
+
+    def registre(self,acao,retorno):
+        self.visitas += 1
+        self.n[acao] = self.n.get(acao,0)+1
+        self.soma[acao] = self.soma.get(acao,0.0)+retorno
+
+    def melhor(self):
+        return max(self.n,key=lambda a: (self.soma[a]/self.n[a],self.n[a]))
+
+
+def passoModelo(crenca,estado,acao,pocos,wumpus):
+    """ Aplica uma ação ao estado (i, j, oi, oj, flechas, vivo, novas) de
+        uma simulação e devolve (novo estado, recompensa, terminou).
+    """
+    i,j,oi,oj,flechas,vivo,novas = estado
+    N = crenca.N
+    if acao == "A":
+        k = (i+oi)%N*N+(j+oj)%N
+        if k in crenca.muros:
+            return estado,TURNO,False
+        if k in pocos or (vivo and k in wumpus):
+            return estado,MORTE,True
+        recompensa = TURNO
+        if k not in crenca.visitadas and k not in novas:
+            novas = novas|{k}
+            recompensa += EXPLORAR
+        return ((i+oi)%N,(j+oj)%N,oi,oj,flechas,vivo,novas),recompensa,False
+    if acao == "D":
+        return (i,j,oj,-oi,flechas,vivo,novas),TURNO,False
+    if acao == "E":
+        return (i,j,-oj,oi,flechas,vivo,novas),TURNO,False
+    # atirar
+    if flechas == 0:
+        return estado,TURNO,False
+    if vivo and (i+oi)%N*N+(j+oj)%N in wumpus:
+        return (i,j,oi,oj,flechas-1,False,novas),VITORIA,True
+    if flechas == 1:
+        # sem flechas, o Wumpus não pode mais ser morto: é como morrer
+        return (i,j,oi,oj,0,vivo,novas),MORTE,True
+    return (i,j,oi,oj,flechas-1,vivo,novas),TURNO,False
+
+
+def atirar(crenca,estado):
+    """ Diz se atirar faz sentido no estado: só vale a pena (na árvore)
+        se é mais provável que o Wumpus esteja à frente do que não esteja,
+        pois errar a última flecha é tão ruim quanto morrer.
+    """
+    i,j,oi,oj,flechas,vivo,novas = estado
+    N = crenca.N
+    return flechas > 0 and vivo and (i+oi)%N*N+(j+oj)%N in crenca.wumpus.provaveis
+
+
+def simule(crenca,raiz,profundidade,aleatorio,expandir=True):
+    """ Faz uma simulação em um mundo sorteado: desce pela árvore (UCT)
+        e, fora dela, completa a simulação com ações ao acaso. Devolve a ação da raiz e o
+        retorno descontado, já registrados nos nós percorridos.
+    """
+    pocos = crenca.pocos.amostre(aleatorio)
+    wumpus = crenca.wumpus.amostre(aleatorio)
+    estado = crenca.posicao+crenca.orientacao+(crenca.flechas,True,frozenset())
+    caminho = []
+    recompensas = []
+    no = raiz
+    terminou = False
+    for passo in range(profundidade):
+        if no is not None:
+            acoes = acoesModelo if atirar(crenca,estado) else acoesModelo[:3]
+            acao = no.escolha(acoes,aleatorio)
+            caminho.append((no,acao))
+            proximo = no.filhos.get(acao)
+            if proximo is None and expandir:
+                proximo = no.filhos[acao] = No()
+                expandir = False
+            no = proximo
+        else:
+            acao = politicaSimulacao(crenca,estado,aleatorio)
+        estado,recompensa,terminou = passoModelo(crenca,estado,acao,pocos,wumpus)
+        recompensas.append(recompensa)
+        if terminou:
+            break
+    # retornos descontados a partir de cada nó do caminho
+    retorno = 0.0
+    retornos = []
+    for recompensa in reversed(recompensas):
+        retorno = recompensa+DESCONTO*retorno
+        retornos.append(retorno)
+    retornos.reverse()
+    for (no,acao),retorno in zip(caminho,retornos):
+        no.registre(acao,retorno)
+    return caminho[0][1],retornos[0]
+
+
+def politicaSimulacao(crenca,estado,aleatorio):
+    """ Política das simulações fora da árvore: anda ao acaso pelas salas
+        que a personagem sabe serem seguras (ou que já visitou na
+        simulação), girando diante das outras. Ela não olha os perigos do
+        mundo sorteado, que a personagem não conhece: os riscos só são
+        corridos pelas ações da árvore.
+    """
+    i,j,oi,oj,flechas,vivo,novas = estado
+    N = crenca.N
+    k = (i+oi)%N*N+(j+oj)%N
+    if (k in crenca.seguras or k in novas) and k not in crenca.muros and aleatorio.random() < 0.7:
+        return "A"
+    return "D" if aleatorio.random() < 0.5 else "E"
+
+
+def simuleRaiz(tarefa):
+    """ Simulações de um processo do pool: só estima as ações da raiz,
+        por orcamento segundos, e devolve as suas contagens e somas.
+    """
+    crenca,profundidade,orcamento,semente = tarefa
+    aleatorio = Random(semente)
+    raiz = No()
+    limite = perf_counter()+orcamento
+    while perf_counter() < limite:
+        simule(crenca,raiz,profundidade,aleatorio,expandir=False)
+    return raiz.n,raiz.soma
+
+
+class PlanejadorMonteCarlo:
+    """ Classe PlanejadorMonteCarlo: escolhe as ações da personagem por
+        busca de Monte Carlo, com orcamento segundos por decisão. Se
+        processos for dado, o planejador cria (na primeira decisão) o seu
+        próprio pool de processos, que deve ser fechado com feche(); pode
+        ser usado em um bloco with, que o fecha. Dentro de um processo
+        daemon (como os de um torneio), que não pode criar processos
+        filhos, todas as simulações são feitas no próprio processo.
+    """
+    def __init__(self,orcamento=0.01,profundidade=12,processos=None,semente=None):
+        self.orcamento = orcamento
+        self.profundidade = profundidade
+        self.aleatorio = Random(semente)
+        self.raiz = None
+        # estado da personagem esperado depois da última ação escolhida
+        self.esperado = None
+        self.pool = None
+        self.processos = processos if processos and not current_process().daemon else None
+        self.simulacoes = 0
+
+    def feche(self):
+        """ Encerra o pool de processos (se houver); o planejador continua
+            utilizável, e cria outro pool se decidir de novo.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*excecao):
+        self.feche()
+
+    def __del__(self):
+        # planejador descartado sem feche(): encerra os processos do pool
+        if self.pool is not None:
+            self.pool.terminate()
+
+    def decida(self,agente):
+        """ Devolve a melhor ação ("A", "D", "E" ou "T") para a personagem,
+            segundo as simulações feitas dentro do orçamento de tempo.
+        """
+        inicio = perf_counter()
+        limite = inicio+self.orcamento
+        crenca = Crenca(agente,self.profundidade+1)
+        chave = (crenca.posicao,crenca.orientacao,crenca.flechas)
+        if self.raiz is None or self.esperado != chave:
+            self.raiz = No()
+        pendentes = None
+        if self.processos:
+            if self.pool is None:
+                self.pool = Pool(self.processos)
+            restante = max(0.0,limite-perf_counter())
+            pendentes = self.pool.map_async(simuleRaiz,[ (crenca,self.profundidade,restante,self.aleatorio.random())
+                                                           for p in range(self.processos) ])
+        n = 0
+        while n < len(acoesModelo) or perf_counter() < limite:
+            simule(crenca,self.raiz,self.profundidade,self.aleatorio)
+            n += 1
+        if pendentes is not None:
+            for contagens,somas in pendentes.get():
+                for acao,c in contagens.items():
+                    self.raiz.n[acao] = self.raiz.n.get(acao,0)+c
+                    self.raiz.soma[acao] = self.raiz.soma.get(acao,0.0)+somas[acao]
+                    self.raiz.visitas += c
+        self.simulacoes += n
+        acao = self.raiz.melhor()
+        self.avance(acao,crenca)
+        return acao
+
+    def avance(self,acao,crenca):
+        """ Reaproveita a subárvore da ação escolhida como a nova raiz.
+        """
+        N = crenca.N
+        (i,j),(oi,oj),flechas = crenca.posicao,crenca.orientacao,crenca.flechas
+        if acao == "A":
+            k = (i+oi)%N*N+(j+oj)%N
+            if k not in crenca.muros:
+                i,j = (i+oi)%N,(j+oj)%N
+        elif acao == "D":
+            oi,oj = oj,-oi
+        elif acao == "E":
+            oi,oj = -oj,oi
+        elif flechas > 0:
+            flechas -= 1
+        self.raiz = self.raiz.filhos.get(acao)
+        self.esperado = ((i,j),(oi,oj),flechas)
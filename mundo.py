@@ -17,14 +17,18 @@
     que já exploraram.
 """
 
+import sys
+from random import Random
+from time import perf_counter_ns
+
+from agentes import Agente, AdaptadorModulo, NOVIDADE, criaAgente, interpreteResposta
+from catalogo import catalogoPadrao
+from conhecimento import BaseConhecimento, mascaras
+from renderizador import Renderizador, marcador
+from gravacao import bitsPercepcao, valideSemente, INVIAVEL
+
 # use apenas para depuração
 __DEBUG__ = False
-    
-# o mundo não deve ser importado como módulo
-if __name__!="__main__":
-    print("Por favor execute o Mundo de Wumpus com o comando\n",
-          "    python3 mundo.py")
-    exit()
 
 # associa números/nomes aos 4 tipos de salas do mundo de Wumpus
 LIVRE,MURO,POCO,WUMPUS = range(4)
@@ -34,133 +38,579 @@ salas = ["L","M","P","W"]
 ANDAR,GIRARDIREITA,GIRARESQUERDA,ATIRAR,COMPARTILHAR = range(5)
 acoes = ["A","D","E","T","C"]
 
+# associa números/nomes aos possíveis desfechos de uma partida
+VITORIA,QUEDA,DEVORADA,TRAVADA = range(4)
+desfechos = ["vitória","poço","Wumpus","travada"]
+
+
+class Resultado:
+    """ Classe Resultado: resume o desfecho de uma partida, sem imprimir
+        nada, para que o mundo possa ser usado como módulo (por exemplo
+        para avaliar uma personagem em milhares de partidas seguidas).
+    """
+    def __init__(self,nome,desfecho,turnos,nWumpus,flechasUsadas=0,compartilhamentos=0):
+        """ Construtor: guarda o nome da personagemNUSP, o desfecho
+            (VITORIA, QUEDA, DEVORADA ou TRAVADA), o número de turnos jogados,
+            o número de Wumpus que restaram vivos, o número de flechas
+            que a personagemNUSP atirou e quantos compartilhamentos fez.
+        """
+        self.nome = nome
+        self.desfecho = desfecho
+        self.turnos = turnos
+        self.nWumpus = nWumpus
+        self.flechasUsadas = flechasUsadas
+        self.compartilhamentos = compartilhamentos
+        # menor número de turnos possível no mundo (veja analisador.py), se conhecido
+        self.otimo = None
+
+    def venceu(self):
+        """ Devolve True se a personagemNUSP eliminou todos os Wumpus.
+        """
+        return self.desfecho == VITORIA
+
+    def __repr__(self):
+        return "Resultado(%s, %s, %d turnos)" % (self.nome,desfechos[self.desfecho],self.turnos)
+
+
+class Instantaneo:
+    """ Classe Instantaneo: guarda o estado de um MundoDeWumpus em um
+        dado momento (veja MundoDeWumpus.salve e MundoDeWumpus.restaure).
+        As salas não são copiadas: basta guardar a posição do diário de
+        alterações, que é desfeito até ali na restauração.
+    """
+    def __init__(self,marca,estado):
+        self.marca = marca
+        self.estado = estado
+
 
 class MundoDeWumpus:
     """ Classe principal: define um Mundo de Wumpus, cria personagens,
         faz a simulação e anuncia o final do jogo.
+        O mundo pode ser simulado turno a turno (método passo) ou até o
+        final (método jogue, que devolve um objeto Resultado). Nada é
+        impresso na tela, a não ser que o mundo seja criado com verboso=True.
     """
-    def __init__(self):
-        """ Construtor: inicializa a representação do mundo,
-            inclui as personagens NUSP e dummy e passa a simular o jogo.
+    def __init__(self,modulo=None,verboso=False,mundo=None,N=None,semente=None,
+                 maxTurnos=None,maxInvalidas=100,maxRepeticoes=64,instrumentacao=None,
+                 nPersonagens=1,nDummies=1,renderizador=None,gravador=None):
+        """ Construtor: inicializa a representação do mundo e
+            inclui as personagens NUSP e dummy. O parâmetro modulo
+            permite escolher o módulo (ou o nome do módulo) da
+            personagemNUSP, ou mesmo uma instância de agentes.Agente;
+            se omitido, usa o primeiro personagem*.py. Se modulo for
+            uma lista, é criada uma personagemNUSP para cada elemento;
+            senão, são criadas nPersonagens personagens do mesmo módulo.
+            A primeira personagemNUSP começa no centro do tabuleiro e a
+            primeira dummy no canto (0,0); as demais em salas sorteadas.
+            O mundo pode ser dado como um bytearray de N*N salas
+            (como os gerados por gerador.geraMundo) ou como uma lista
+            de listas; se omitido, usa o mundinho de teste 5x5.
+            A semente controla os sorteios da personagem dummy.
+            Para que uma partida nunca deixe de terminar, ela é dada
+            como TRAVADA se passar de maxTurnos turnos (por padrão
+            50*N*N), se uma personagem tentar mais de maxInvalidas ações
+            inviáveis, ou se um mesmo estado (posição, orientação,
+            flechas e versão do mundo) se repetir mais de maxRepeticoes
+            vezes sem que nenhuma personagem conheça uma sala nova
+            (None desliga cada um desses limites).
+            Se uma Instrumentacao (veja instrumentacao.py) for dada, o
+            tempo de cada fase de cada turno é medido e registrado nela.
+            Se um Renderizador (veja renderizador.py) for dado, o estado
+            do mundo é desenhado nele a cada turno (com __DEBUG__ ligado,
+            é usado um Renderizador na saída padrão).
+            Se um Gravador (veja gravacao.py) for dado, a partida é
+            gravada nele, ação por ação (a semente deve então ser None ou
+            um inteiro de 0 a 2**63-1, ou é levantado ValueError).
         """
+        # indica se as mensagens do jogo devem ser impressas na tela
+        self.verboso = verboso
+        # registra o tempo gasto em cada fase dos turnos (se não for None)
+        self.instrumentacao = instrumentacao
+        # desenha o mundo a cada turno (se não for None)
+        self.renderizador = renderizador
+        # grava a partida (se não for None)
+        self.gravador = gravador
+        if gravador is not None:
+            valideSemente(semente)
+        # diário de alterações (container, índice, valor antigo), usado para
+        # desfazer jogadas; só é mantido depois da primeira chamada a salve()
+        self.diario = None
+        if mundo is None:
+            # mundinho besta de teste...
+            mundo = [ [ MURO  , LIVRE , POCO  , MURO  , LIVRE  ],
+                      [ LIVRE , LIVRE , MURO  , LIVRE , LIVRE  ],
+                      [ POCO  , LIVRE , LIVRE , LIVRE , POCO   ],
+                      [ WUMPUS, LIVRE , LIVRE , LIVRE , LIVRE  ],
+                      [ LIVRE , LIVRE , POCO  , LIVRE , MURO   ] ]
+        if isinstance(mundo,list):
+            N = len(mundo)
+            mundo = bytearray(sala for linha in mundo for sala in linha)
+        elif N is None:
+            N = int(len(mundo)**0.5)
         # tamanho do mundo (que é um quadrado NxN dobrado na forma de um toro).
-        self.N = 5
-        # mundinho besta de teste...
-        self.mundo = [ [ MURO  , LIVRE , POCO  , MURO  , LIVRE  ],
-                       [ LIVRE , LIVRE , MURO  , LIVRE , LIVRE  ],
-                       [ POCO  , LIVRE , LIVRE , LIVRE , POCO   ],
-                       [ WUMPUS, LIVRE , LIVRE , LIVRE , LIVRE  ],
-                       [ LIVRE , LIVRE , POCO  , LIVRE , MURO   ] ]
-        # nesse mundo só há 1 Wumpus
-        self.nWumpus = 1
-        # cria personagemNUSP
-        self.personagemNUSP = PersonagemNUSP(self.N)
-        # cria uma segunda personagem, dummy, que apenas anda e mapeia o que vê.
-        self.dummy = Dummy(self.N, self.mundo)
+        self.N = N
+        # as salas do mundo ficam em um bytearray: a sala (i,j) é mundo[i*N+j]
+        self.mundo = mundo
+        # conta os Wumpus do mundo
+        self.nWumpus = mundo.count(WUMPUS)
+        # pré-calcula os campos de fedor e brisa de cada sala
+        self.montaCampos()
+        # gerador de números aleatórios usado pela personagem dummy
+        self.semente = semente
+        self.aleatorio = Random(semente)
+        if gravador is not None:
+            gravador.inicie(N,semente,self.mundo)
+        # índice espacial: para cada sala k ocupada, a lista das personagens
+        # (NUSP vivas e dummies) que estão nela; atualizado a cada movimento
+        self.ocupantes = {}
+        # cria as personagensNUSP
+        if not isinstance(modulo,list):
+            modulo = [modulo]*nPersonagens
+        self.personagens = []
+        for m in modulo:
+            inicio = None if not self.personagens else self.sorteiaSala(LIVRE)
+            personagem = PersonagemNUSP(self.N,m,inicio)
+            personagem.inicieMapa(self.mundo)
+            self.personagens.append(personagem)
+        self.personagemNUSP = self.personagens[0]
+        # cria as personagens dummy, que apenas andam e mapeiam o que veem.
+        self.dummies = []
+        for d in range(nDummies):
+            inicio = None if not self.dummies else self.sorteiaSala()
+            self.dummies.append(Dummy(self.N, self.mundo, self.aleatorio, inicio))
+        self.dummy = self.dummies[0] if self.dummies else None
+        for ocupante in self.personagens+self.dummies:
+            self.ocupantes.setdefault(ocupante.posicao[0]*N+ocupante.posicao[1],[]).append(ocupante)
+        # número de turnos já simulados
+        self.turnos = 0
+        # limites que encerram partidas que não terminariam sozinhas
+        self.maxTurnos = 50*N*N if maxTurnos is None else maxTurnos
+        self.maxInvalidas = maxInvalidas
+        self.maxRepeticoes = maxRepeticoes
+        self.travada = False
+        # versão do mundo (muda a cada Wumpus morto) e número de vezes que
+        # cada estado da personagemNUSP já ocorreu desde que ela conheceu a
+        # última sala nova (detecção de ciclos)
+        self.versao = 0
+        self.estados = {}
+
+    def jogue(self,perfil=None):
+        """ Simula o jogo até o final e devolve o Resultado da partida.
+            Se for dado o nome de um arquivo em perfil, a simulação é
+            feita sob o cProfile, e as estatísticas são gravadas nele.
+        """
         # faz o processamento do jogo
-        self.processaJogo()
+        if perfil is None:
+            self.processaJogo()
+        else:
+            from instrumentacao import perfile
+            perfile(self.processaJogo,perfil)
         # anuncia o final do jogo
-        self.finalizaJogo()
-    
+        return self.finalizaJogo()
+
+    def terminou(self):
+        """ Devolve True se o jogo acabou: não há mais Wumpus,
+            a personagemNUSP não está mais viva ou a partida travou.
+        """
+        return self.nWumpus==0 or self.travada or not any(p.estaviva for p in self.personagens)
+
     def processaJogo(self):
         """ Método processaJogo: controla o laço principal, processando uma
             personagem por vez, enquanto o jogo não tiver acabado.
         """
-        # inicializa flags que indicam a tentativa de andar em direção a uma
-        # parede e a morte de um Wumpus.
-        self.personagemNUSP.impacto = self.urro = False
-
         # Repete o laço principal enquanto existirem Wumpus e personagens vivos.
-        while self.nWumpus>0 and self.personagemNUSP.estaviva:
-
-            # código apenas para depuração: mostra o mundo a cada jogada
-            if __DEBUG__:
-                self.imprimeMundo()
+        while not self.terminou():
+            self.passo()
+        if self.gravador is not None:
+            self.gravador.descarregue()
+
+    def passo(self):
+        """ Simula um turno do jogo: cada personagemNUSP viva percebe,
+            planeja e age, e em seguida as personagens dummy se movem.
+        """
+        self.conduza(self.turno())
+
+    def turno(self):
+        """ Gerador que simula um turno do jogo (veja passo): produz cada
+            personagemNUSP cuja ação ele precisa, e recebe (por send) a
+            resposta do agir dela. Assim o mesmo turno pode ser conduzido
+            chamando a personagem diretamente (conduza) ou esperando a
+            resposta dela em outro processo (veja hospedeiro.py).
+        """
+        # código apenas para depuração: mostra o mundo a cada jogada
+        if __DEBUG__ or self.renderizador is not None:
+            self.imprimeMundo()
 
-            # coleta informações locais para produzir a percepção da personagemNUSP
-            self.personagemNUSP.percepcao = self.montaPercepcao(self.personagemNUSP)
+        for numero,personagem in enumerate(self.personagens):
+            if personagem.estaviva and not self.terminou():
+                yield from self.vez(personagem,numero)
+                if self.travada:
+                    return
 
-            # reinicializa flags (já foram usadas para as percepções das personagens)
-            self.personagemNUSP.impacto = self.urro = False
+        self.concluaTurno()
 
-            # chama o método de planejamento da personagemNUSP
-            self.personagemNUSP.modulo.planejar(self.personagemNUSP.percepcao)
+    def vez(self,personagem,numero=0):
+        """ Gerador que processa a vez de uma personagemNUSP (a de índice
+            numero em self.personagens): percepção, planejamento e ações
+            até obter uma ação viável. Produz a personagem a cada vez que
+            precisa de uma ação, e recebe a resposta do agir dela.
+        """
+        percepcao = self.percebe(personagem)
+
+        # segue o plano da personagemNUSP, se houver, sem chamá-la
+        if personagem.plano is not None and self.sigaPlano(personagem,numero,percepcao):
+            return
+
+        # chama o método de planejamento da personagemNUSP
+        self.meca("planejar",personagem.agente.planejar,percepcao)
+
+        # recebe ações da personagem até obter uma ação viável
+        viavel = False
+        while not viavel and not self.travada:
+            # pede a ação da personagemNUSP a quem conduz o turno
+            inicio = perf_counter_ns()
+            resposta = yield personagem
+            if self.instrumentacao is not None:
+                self.instrumentacao.registre("agir",perf_counter_ns()-inicio)
+            viavel = self.execute(personagem,numero,resposta)
+
+    def conduza(self,gerador):
+        """ Conduz um turno (ou uma vez) dado por turno (ou vez),
+            chamando o método de ação de cada personagemNUSP produzida.
+        """
+        try:
+            personagem = next(gerador)
+            while True:
+                personagem = gerador.send(personagem.agente.agir())
+        except StopIteration:
+            pass
+
+    def processaPersonagem(self,personagem,numero=0):
+        """ Processa a vez de uma personagemNUSP (veja vez), chamando-a
+            diretamente.
+        """
+        self.conduza(self.vez(personagem,numero))
+
+    def execute(self,personagem,numero,resposta):
+        """ Processa a resposta de agir: uma ação, ou um Plano (ou uma
+            string com várias ações), cuja primeira ação é executada já, e
+            as demais nos próximos turnos (veja sigaPlano). Devolve True
+            se a ação foi viável; um plano vazio (ou uma resposta que não
+            é ação nem plano) conta como uma ação inviável.
+        """
+        acao,plano = interpreteResposta(resposta)
+        if plano is None:
+            return self.aplique(personagem,numero,acao)
+        if not plano.acoes:
+            return self.aplique(personagem,numero,None)
+        plano.executadas = 0
+        plano.percepcoes = []
+        plano.ultima = bitsPercepcao(personagem.percepcao)
+        viavel = self.aplique(personagem,numero,plano.acoes[0])
+        if viavel:
+            plano.executadas = 1
+            personagem.plano = plano
+        return viavel
+
+    def sigaPlano(self,personagem,numero,percepcao):
+        """ Executa a próxima ação do plano da personagem, se ele não
+            tiver acabado nem for interrompido pela percepção. Devolve
+            False (e descarta o plano) quando a personagem deve ser
+            chamada de novo.
+        """
+        plano = personagem.plano
+        bits = bitsPercepcao(percepcao)
+        interrompa = plano.interrompa
+        if plano.executadas < len(plano.acoes) and not bits & interrompa \
+        and not (interrompa & NOVIDADE and bits != plano.ultima):
+            if self.aplique(personagem,numero,plano.acoes[plano.executadas]):
+                plano.executadas += 1
+                plano.percepcoes.append(bits)
+                plano.ultima = bits
+                return True
+        personagem.plano = None
+        return False
+
+    def percebe(self,personagem):
+        """ Primeira metade da vez de uma personagemNUSP: monta e devolve
+            a sua percepção (também guardada em personagem.percepcao).
+            Com aplique, permite que as chamadas à personagem sejam feitas
+            fora do mundo (por exemplo, em outro processo; veja
+            hospedeiro.py).
+        """
+        # coleta informações locais para produzir a percepção da personagemNUSP
+        personagem.percepcao = self.meca("montaPercepcao",self.montaPercepcao,personagem)
+
+        # reinicializa flags (já foram usadas para as percepções das personagens)
+        personagem.impacto = personagem.urro = False
+        return personagem.percepcao
+
+    def aplique(self,personagem,numero,acao):
+        """ Segunda metade da vez de uma personagemNUSP: processa a ação
+            ("A", "D", "E", "T" ou "C") que ela escolheu e devolve True se
+            a ação foi viável (uma ação desconhecida nunca é). Ações
+            inviáveis demais (de uma mesma personagem) travam a partida.
+        """
+        viavel = False
+        if acao in acoes:
+            # processa a ação (passando o próprio objeto MundoDeWumpus como argumento)
+            processe = personagem.processe[acoes.index(acao)]
+            viavel = self.meca(processe.__name__,processe,self)
+            if self.gravador is not None:
+                self.gravador.registre(self.turnos,numero,bitsPercepcao(personagem.percepcao),
+                                       acoes.index(acao) if viavel else acoes.index(acao)|INVIAVEL,
+                                       personagem.posicao,personagem.orientacao)
+        if not viavel:
+            personagem.invalidas += 1
+            if self.maxInvalidas is not None and personagem.invalidas > self.maxInvalidas:
+                self.travada = True
+        return viavel
+
+    def concluaTurno(self):
+        """ Encerra o turno, depois da vez das personagensNUSP: as
+            personagens dummy se movem e o travamento é verificado.
+        """
+        # processa as personagens dummy
+        for dummy in self.dummies:
+            dummy.percepcao = []
+            dummy.planejar(dummy.percepcao)
+            dummy.agir(self)
+
+        self.turnos += 1
+        self.verificaTravamento()
+
+    def sorteiaSala(self,sala=None):
+        """ Sorteia uma sala [i,j] desocupada (e do tipo sala, se dado)
+            para a posição inicial de uma personagem.
+        """
+        N = self.N
+        while True:
+            k = self.aleatorio.randrange(N*N)
+            if (sala is None or self.mundo[k] == sala) and k not in self.ocupantes:
+                return [k//N,k%N]
+
+    def mova(self,ocupante,i,j):
+        """ Move a personagem (NUSP ou dummy) para a sala (i,j), mantendo
+            o índice de ocupantes das salas atualizado.
+        """
+        N = self.N
+        self.retire(ocupante)
+        ocupante.posicao[0],ocupante.posicao[1] = i,j
+        self.ocupantes.setdefault(i*N+j,[]).append(ocupante)
+
+    def retire(self,ocupante):
+        """ Retira a personagem do índice de ocupantes (quando ela se move
+            ou morre).
+        """
+        k = ocupante.posicao[0]*self.N+ocupante.posicao[1]
+        lista = self.ocupantes[k]
+        lista.remove(ocupante)
+        if not lista:
+            del self.ocupantes[k]
+
+    def adjacentes(self,i,j):
+        """ Devolve as personagens que estão nas 4 salas adjacentes a (i,j).
+        """
+        N = self.N
+        vizinhos = []
+        for k in ((i+1)%N*N+j, (i-1)%N*N+j, i*N+(j+1)%N, i*N+(j-1)%N):
+            vizinhos.extend(self.ocupantes.get(k,()))
+        return vizinhos
+
+    def salve(self):
+        """ Devolve um Instantaneo com o estado atual do mundo e das
+            personagens NUSP e dummy (mas não o conhecimento guardado
+            pelo módulo da personagemNUSP), que pode ser restaurado
+            depois com restaure(). A partir da primeira chamada, cada
+            alteração do mundo passa a ser anotada em um diário, de modo
+            que salvar e restaurar custam apenas o tamanho das alterações.
+        """
+        if self.diario is None:
+            self.diario = []
+            for ocupante in self.personagens+self.dummies:
+                ocupante.diario = self.diario
+        return Instantaneo(len(self.diario),
+                           (self.nWumpus,self.versao,self.turnos,self.travada,
+                            tuple((tuple(p.posicao),tuple(p.orientacao),p.nFlechas,p.estaviva,p.impacto,p.urro,p.causa,
+                                   p.compartilhamentos,p.invalidas,
+                                   p.plano,p.plano and (p.plano.executadas,len(p.plano.percepcoes),p.plano.ultima))
+                                  for p in self.personagens),
+                            tuple(tuple(d.posicao) for d in self.dummies),self.aleatorio.getstate(),
+                            tuple((k,tuple(lista)) for k,lista in self.ocupantes.items())))
+
+    def restaure(self,instantaneo):
+        """ Volta o mundo ao estado guardado no instantaneo, desfazendo
+            as alterações anotadas no diário depois dele. Um mesmo
+            instantâneo pode ser restaurado várias vezes, mas instantâneos
+            posteriores a ele deixam de valer.
+        """
+        diario = self.diario
+        while len(diario) > instantaneo.marca:
+            container,k,valor = diario.pop()
+            if valor is None:
+                del container[k]
+            else:
+                container[k] = valor
+        (self.nWumpus,self.versao,self.turnos,self.travada,
+         personagens,dummies,estado,ocupantes) = instantaneo.estado
+        for p,(posicao,orientacao,p.nFlechas,p.estaviva,p.impacto,p.urro,p.causa,p.compartilhamentos,p.invalidas,
+               p.plano,progresso) in zip(self.personagens,personagens):
+            p.posicao[:],p.orientacao[:] = posicao,orientacao
+            p.agente.nFlechas = p.nFlechas
+            if p.plano is not None:
+                p.plano.executadas,n,p.plano.ultima = progresso
+                del p.plano.percepcoes[n:]
+        for d,posicao in zip(self.dummies,dummies):
+            d.posicao[:] = posicao
+        self.aleatorio.setstate(estado)
+        # o índice de ocupantes volta com a ordem guardada (que é a ordem
+        # dos nomes nas percepções de encontro)
+        self.ocupantes = { k: list(lista) for k,lista in ocupantes }
+
+    def descarte(self):
+        """ Para de anotar o diário de alterações (e invalida todos os
+            instantâneos já salvos).
+        """
+        self.diario = None
+        for ocupante in self.personagens+self.dummies:
+            ocupante.diario = None
 
-            # recebe ações da personagem até obter uma ação viável
-            viavel = False
-            while not viavel:
-                # chama o método de ação da personagemNUSP
-                acao = self.personagemNUSP.modulo.agir()
-                # processa a ação (passando o próprio objeto MundoDeWumpus como argumento)
-                viavel = self.personagemNUSP.processe[acoes.index(acao)](self)
+    def anote(self,container,k):
+        """ Anota no diário o valor atual de container[k], que está para
+            ser alterado (ou None, se k ainda não estiver no container).
+        """
+        if self.diario is not None:
+            self.diario.append((container,k,container.get(k) if isinstance(container,dict) else container[k]))
 
-            # processa personagem dummy
-            self.dummy.percepcao = []
-            self.dummy.planejar(self.dummy.percepcao)
-            self.dummy.agir(self.personagemNUSP.posicao,self.mundo)
+    def meca(self,fase,funcao,*args):
+        """ Chama funcao(*args) e, se o mundo estiver instrumentado,
+            registra o tempo gasto na chamada como sendo da fase dada.
+        """
+        if self.instrumentacao is None:
+            return funcao(*args)
+        inicio = perf_counter_ns()
+        valor = funcao(*args)
+        self.instrumentacao.registre(fase,perf_counter_ns()-inicio)
+        return valor
+
+    def verificaTravamento(self):
+        """ Marca a partida como travada se o limite de turnos foi
+            atingido ou se o estado atual das personagensNUSP já se
+            repetiu vezes demais. O estado inclui quantas salas cada
+            personagem já conheceu, de modo que só contam as repetições
+            desde a última sala nova: uma personagem que ainda progride
+            pode cruzar o mesmo corredor quantas vezes precisar.
+        """
+        if self.maxTurnos is not None and self.turnos >= self.maxTurnos:
+            self.travada = True
+        if self.maxRepeticoes is not None:
+            if len(self.personagens) == 1:
+                p = self.personagemNUSP
+                estado = (p.posicao[0],p.posicao[1],p.orientacao[0],p.orientacao[1],p.nFlechas,
+                          self.versao,p.conhecidas())
+            else:
+                estado = (self.versao,)+tuple((p.posicao[0],p.posicao[1],p.orientacao[0],p.orientacao[1],p.nFlechas,
+                                               p.conhecidas())
+                                              for p in self.personagens if p.estaviva)
+            repeticoes = self.estados.get(estado,0)+1
+            self.anote(self.estados,estado)
+            self.estados[estado] = repeticoes
+            if repeticoes > self.maxRepeticoes:
+                self.travada = True
 
     def finalizaJogo(self):
         """ O jogo termina quando não há mais personagens vivas,
-            ou quando todos os Wumpus foram mortos.
+            ou quando todos os Wumpus foram mortos. Devolve o
+            Resultado da partida (e o anuncia, se o mundo for verboso).
         """
-        if __DEBUG__:
+        if __DEBUG__ or self.renderizador is not None:
             self.imprimeMundo()
         nome = self.personagemNUSP.nome
         if self.nWumpus==0:
-            print("Parabéns, "+nome+", você sobreviveu ao mundo de Wumpus!",sep="")
-        x,y = self.personagemNUSP.posicao
-        if self.mundo[x][y] == WUMPUS:
-            print("Meus pêsames, "+nome+", você virou comida de Wumpus...",sep="")
-        if self.mundo[x][y] == POCO:
-            print("Meus pêsames, "+nome+", você caiu em um poço...",sep="")
+            desfecho = VITORIA
+        elif self.travada:
+            desfecho = TRAVADA
+        else:
+            # todas morreram: vale a causa da morte da (primeira) personagemNUSP
+            desfecho = self.personagemNUSP.causa
+        if self.verboso:
+            if desfecho == VITORIA:
+                print("Parabéns, "+nome+", você sobreviveu ao mundo de Wumpus!",sep="")
+            if desfecho == DEVORADA:
+                print("Meus pêsames, "+nome+", você virou comida de Wumpus...",sep="")
+            if desfecho == QUEDA:
+                print("Meus pêsames, "+nome+", você caiu em um poço...",sep="")
+            if desfecho == TRAVADA:
+                print("Que pena, "+nome+", você se perdeu no mundo de Wumpus...",sep="")
+        p = self.personagemNUSP
+        resultado = Resultado(nome,desfecho,self.turnos,self.nWumpus,
+                              p.flechasIniciais-p.nFlechas,p.compartilhamentos)
+        if self.instrumentacao is not None:
+            # tempos (em ns) de cada fase, com p50/p99, para esta partida
+            resultado.latencias = self.instrumentacao.resumo()
+        return resultado
 
     # outras funções auxiliares do processamento do mundo
     def imprimeMundo(self):
-        pos = self.personagemNUSP.posicao
-        dpos = self.dummy.posicao
-        ori = self.personagemNUSP.orientacao
-        print("Estado atual do mundo (nenhuma personagem enxerga isso!):")
-        for i in range(self.N):
-            for j in range(self.N):
-                if pos==[i,j]:
-                    if ori==[0,-1]:
-                        print("<",end="")
-                    print("X",end="")
-                    if ori==[0,1]:
-                        print(">",end="")
-                    if ori==[1,0]:
-                        print("v",end="")
-                    if ori==[-1,0]:
-                        print("^",end="")
-                if dpos==[i,j]:
-                    print("D",end="")
-                print(salas[self.mundo[i][j]],end="\t| ")
-            print("\n"+"-"*(8*self.N+1))
+        """ Desenha o estado real do mundo no renderizador (que só
+            redesenha as salas alteradas desde o último quadro).
+        """
+        if self.renderizador is None:
+            self.renderizador = Renderizador(self.N,"Estado atual do mundo (nenhuma personagem enxerga isso!):")
+        quadro = [ salas[sala] for sala in self.mundo ]
+        for k,ocupantes in self.ocupantes.items():
+            quadro[k] = "".join("D" if isinstance(ocupante,Dummy) else marcador(ocupante.orientacao)
+                                for ocupante in ocupantes)+quadro[k]
+        self.renderizador.desenhe(quadro,"turno %d" % self.turnos)
+
+    def montaCampos(self):
+        """ Calcula, uma única vez, os campos de fedor e de brisa: para
+            cada sala k, fedor[k] e brisa[k] contam quantos Wumpus e
+            quantos poços existem nas salas adjacentes. Só as salas com
+            Wumpus ou poços são visitadas, e não o mundo inteiro.
+        """
+        self.fedor = bytearray(self.N*self.N)
+        self.brisa = bytearray(self.N*self.N)
+        for sala,campo in ((WUMPUS,self.fedor),(POCO,self.brisa)):
+            k = self.mundo.find(sala)
+            while k >= 0:
+                self.alteraCampo(campo,k,1)
+                k = self.mundo.find(sala,k+1)
+
+    def alteraCampo(self,campo,k,delta):
+        """ Soma delta ao campo (fedor ou brisa) das 4 salas adjacentes
+            à sala k; usado na montagem dos campos e, com delta=-1,
+            quando um Wumpus morre.
+        """
+        N = self.N
+        i,j = divmod(k,N)
+        for viz in ((i+1)%N*N+j, (i-1)%N*N+j, i*N+(j+1)%N, i*N+(j-1)%N):
+            self.anote(campo,viz)
+            campo[viz] += delta
 
     def montaPercepcao(self,personagem):
-        """ Vasculha as salas adjacentes à sala ocupada pela personagem,
-            coletando as informações perceptíveis (fedor, brisa), além de
+        """ Consulta os campos de fedor e brisa da sala ocupada pela
+            personagem, coletando as informações perceptíveis, além de
             agregar percepções decorrentes da última ação (impacto/urro),
-            e de outras personagens presentes na posicao.
+            e de outras personagens presentes na posicao (consultando
+            o índice de ocupantes da sala).
         """
         pos = personagem.posicao
-        dpos = self.dummy.posicao
+        k = pos[0]*self.N+pos[1]
         percepcao = []
-        vizinhos = [ [(pos[0]+1)%self.N,pos[1]],
-                     [(pos[0]-1)%self.N,pos[1]],
-                     [pos[0],(pos[1]+1)%self.N],
-                     [pos[0],(pos[1]-1)%self.N] ]
-        for viz in vizinhos:
-            if self.mundo[viz[0]][viz[1]] == WUMPUS and "F" not in percepcao:
-                percepcao.append("F") # fedor
-            if self.mundo[viz[0]][viz[1]] == POCO and "B" not in percepcao:
-                percepcao.append("B") # brisa
+        if self.fedor[k]:
+            percepcao.append("F") # fedor
+        if self.brisa[k]:
+            percepcao.append("B") # brisa
         if personagem.impacto:
             percepcao.append("I")
-        if self.urro:
+        if personagem.urro:
             percepcao.append("U")
-        if pos == dpos:
-            percepcao.append("Dummy")
+        for outra in self.ocupantes.get(k,()):
+            if outra is not personagem:
+                nome = "Dummy" if isinstance(outra,Dummy) else outra.nome
+                if nome not in percepcao:
+                    percepcao.append(nome)
         return percepcao
 
 
@@ -176,7 +626,36 @@ class Personagem:
             def __init__(self,N):
             def planejar(self,percepcao):
             def agir(self):
+        As personagens também guardam o mapa das salas reais que conhecem
+        (veja inicieMapa), que é o que elas podem compartilhar.
     """
+    def inicieMapa(self,mundo):
+        """ Cria o mapa das salas reais que a personagem conhece, a
+            começar pela sala inicial. Só as salas já vistas ocupam
+            memória, de modo que muitas personagens podem andar por
+            mundos grandes.
+        """
+        # sala k -> (tipo da sala, carimbo da versão do mapa em que ela
+        # mudou pela última vez), e as alterações do mapa, em ordem (a
+        # versão do mapa é o número de alterações)
+        self.mapa = {}
+        self.alteracoes = []
+        # diário de alterações do mundo (veja MundoDeWumpus.salve)
+        self.diario = None
+        k = self.posicao[0]*self.N+self.posicao[1]
+        self.descubra(k,mundo[k])
+
+    def descubra(self,k,sala):
+        """ Anota no mapa da personagem que a sala real k é do tipo sala.
+        """
+        anterior = self.mapa.get(k)
+        if anterior is None or anterior[0] != sala:
+            if self.diario is not None:
+                self.diario.append((self.mapa,k,anterior))
+                self.diario.append((self.alteracoes,len(self.alteracoes),None))
+            self.alteracoes.append(k)
+            self.mapa[k] = (sala,len(self.alteracoes))
+
     def ande(self,MundoW):
         """ Função ande: verifica se é possível mover a personagem
             na direção indicada por sua orientação, e as consequências
@@ -190,13 +669,20 @@ class Personagem:
                    (pos[1]+ori[1])%self.N]
         # se houver um muro, não dá para andar
         mundo = MundoW.mundo
-        if mundo[posnova[0]][posnova[1]] == MURO:
+        k = posnova[0]*self.N+posnova[1]
+        if mundo[k] == MURO:
             self.impacto = True
+            self.descubra(k,MURO)
         else:
-            pos[0],pos[1] = posnova[0],posnova[1]
+            MundoW.mova(self,posnova[0],posnova[1])
             # se houver wumpus ou poço, é game over para a personagemNUSP
-            if mundo[pos[0]][pos[1]] in [ WUMPUS, POCO ]:
+            sala = mundo[k]
+            if sala in [ WUMPUS, POCO ]:
                 self.estaviva = False # NÃÃÃÃÃÃÃOOOOOOOOO!!!!!!!!!!!!
+                self.causa = DEVORADA if sala == WUMPUS else QUEDA
+                MundoW.retire(self)
+            else:
+                self.descubra(k,sala)
         # tentar andar é sempre realizável
         return True
 
@@ -226,11 +712,12 @@ class Personagem:
         """
         # personagem só pode atirar se tiver flechas...
         if self.nFlechas==0:
-            print("Lamento, "+self.nome+", você não tem mais flechas...", sep="")
+            if MundoW.verboso:
+                print("Lamento, "+self.nome+", você não tem mais flechas...", sep="")
             return False
         # processa o tiro
         self.nFlechas -= 1
-        self.modulo.nFlechas = self.nFlechas
+        self.agente.nFlechas = self.nFlechas
         # calcula destino do tiro
         pos = self.posicao
         ori = self.orientacao
@@ -238,30 +725,50 @@ class Personagem:
                    (pos[1]+ori[1])%self.N]
         # verifica se acertou um Wumpus e atualiza o mundo
         mundo = MundoW.mundo
-        if mundo[posnova[0]][posnova[1]] == WUMPUS:
-            mundo[posnova[0]][posnova[1]] = LIVRE # atualiza a sala com Wumpus
+        k = posnova[0]*self.N+posnova[1]
+        if mundo[k] == WUMPUS:
+            MundoW.anote(mundo,k)
+            mundo[k] = LIVRE # atualiza a sala com Wumpus
+            MundoW.alteraCampo(MundoW.fedor,k,-1) # o fedor se dissipa
             MundoW.nWumpus -= 1 # contabiliza a morte
-            MundoW.urro = True # propaga o som da morte do Wumpus
+            for p in MundoW.personagens:
+                p.urro = True # propaga o som da morte do Wumpus
+            MundoW.versao += 1 # o mundo mudou
         # informa que o tiro foi realizado
         return True
 
     def compartilhe(self,MundoW):
-        """ Nesta 1a versão do jogo, o compartilhamento permite à personagemNUSP
-            apenas enxergar o que a personagem dummy conhece do mundo, caso as
-            duas estejam na mesma sala.
+        """ O compartilhamento permite à personagemNUSP enxergar o mapa das
+            outras personagens que estejam na mesma sala: o que as dummies
+            viram do mundo, e as salas livres e os muros que as outras
+            personagensNUSP encontraram. Só são transferidas as salas que a
+            outra personagem descobriu (ou viu mudar) desde o último
+            compartilhamento entre as duas, pelos carimbos de versão de cada
+            sala do seu mapa.
         """
-        # testa se a personagemNUSP e dummy estão na mesma sala
-        if self.posicao != MundoW.dummy.posicao:
-            print("Não há outras personagens nessa sala para compartilharem informações...")
+        # procura outras personagens (dummy ou NUSP) na mesma sala que a personagemNUSP
+        N = self.N
+        outras = [ o for o in MundoW.ocupantes.get(self.posicao[0]*N+self.posicao[1],()) if o is not self ]
+        if not outras:
+            if MundoW.verboso:
+                print("Não há outras personagens nessa sala para compartilharem informações...")
             return False
-        # transfere o conhecimento acumulado pela personagem dummy,
+        # transfere o conhecimento novo das outras personagens,
         # fazendo a conversão entre os sistemas de coordenadas 
-        for i in range(self.N):
-            for j in range(self.N):
-                # lembrando que a personagemNUSP começou na posição (2,2)
-                # e olhando para a direita, mas pensava que estava na
-                # posição (0,0) olhando para baixo...
-                self.modulo.mundoCompartilhado[j-2][2-i] = MundoW.dummy.mundo[i][j].copy()
+        compartilhado = self.agente.mundoCompartilhado
+        for outra in outras:
+            ultima = self.sincronizado.get(outra,0)
+            alteracoes = outra.alteracoes
+            for versao in range(ultima,len(alteracoes)):
+                k = alteracoes[versao]
+                sala,carimbo = outra.mapa[k]
+                # a sala pode ter mudado de novo depois: vale só a última versão
+                if carimbo == versao+1:
+                    i,j = self.referencial(k//N,k%N)
+                    compartilhado.defina(i,j,mascaras[salas[sala]])
+            MundoW.anote(self.sincronizado,outra)
+            self.sincronizado[outra] = len(alteracoes)
+        self.compartilhamentos += 1
         # compartilhamento bem-sucedido!
         return True
 
@@ -269,47 +776,88 @@ class Personagem:
 class PersonagemNUSP(Personagem):
     """ Classe PersonagemNUSP: implementa um personagem definido através de um modulo.
         Essa classe tem um método construtor (__init__) que traz as definições do módulo,
-        e implementa os métodos planejar e agir a partir das funções homônimas do módulo.
+        e implementa os métodos planejar e agir a partir dos métodos homônimos de uma
+        instância de agentes.Agente criada pelo módulo (veja agentes.criaAgente).
     """
-    def __init__(self,N):
-        """ Construtor da classe PersonagemNUSP
+    def __init__(self,N,modulo=None,inicio=None):
+        """ Construtor da classe PersonagemNUSP. O módulo da personagem
+            pode ser dado diretamente (objeto, classe Agente ou nome da
+            personagem no catálogo, veja catalogo.py), assim como um
+            Agente já criado; do contrário, usa a primeira personagem do
+            catálogo. A personagem começa na sala inicio (por padrão, o
+            centro do tabuleiro).
         """
-        # localiza o código da personagem
-        from glob import glob
-        lista = glob("personagem*.py")
-        self.modulo = __import__(lista[0][:-3]) # importa tirando o .py do nome
-        self.nome = lista[0][10:-3]
+        # localiza o código da personagem (importado só uma vez por processo)
+        nome = None
+        if modulo is None or isinstance(modulo,str):
+            catalogo = catalogoPadrao()
+            entrada = catalogo.primeira() if modulo is None else catalogo.entrada(modulo)
+            nome = entrada.nome
+            modulo = catalogo.carregue(entrada)
+        if isinstance(modulo,AdaptadorModulo):
+            self.agente = modulo
+            modulo = modulo.modulo
+        elif isinstance(modulo,Agente):
+            self.agente = modulo
+            modulo = sys.modules[type(modulo).__module__]
+        else:
+            self.agente = criaAgente(modulo)
+            if isinstance(modulo,type):
+                modulo = sys.modules[modulo.__module__]
+        self.modulo = modulo
+        # o Agente pode dizer o seu nome (por exemplo, se roda em outro processo)
+        self.nome = getattr(self.agente,"nome",None) or nome or modulo.__name__[10:] # tira o "personagem" do nome
 
         # inicializa a personagemNUSP
         self.estaviva = True # bem-vinda ao Mundo de Wumpus, personagemNUSP!
         self.N = N # copia a dimensão do mundo, pra facilitar
-        self.posicao = [2,2] # coloca a personagemNUSP no centro do tabuleiro real...
+        self.posicao = [N//2,N//2] if inicio is None else list(inicio) # coloca a personagemNUSP no centro do tabuleiro real...
         self.orientacao = [0,1] # ... e olhando para a direita
-        self.nFlechas = 1 # primeiro chá de bebê da personagemNUSP
-        self.modulo.inicializa(N) # chama a inicialização do módulo
-        # define os valores que a personagemNUSP conhece
-        self.modulo.nFlechas = self.nFlechas # copia nFlechas para o módulo
-        self.modulo.mundoCompartilhado = [] # cria matriz NxN de listas vazias
-        for i in range(N) :
-            linha = []
-            for j in range(N) :
-                linha.append([]) # começa com listas vazias
-            self.modulo.mundoCompartilhado.append(linha)
+        self.inicio = tuple(self.posicao) # guarda a posição inicial real
+        self.impacto = self.urro = False # flags de impacto com parede e de urro de Wumpus
+        self.causa = None # causa da morte (QUEDA ou DEVORADA), se a personagem morrer
+        self.orientacaoInicial = tuple(self.orientacao) # e a orientação inicial real
+        self.sincronizado = {} # outra personagem -> versão do mapa dela já recebida
+        self.nFlechas = self.flechasIniciais = 1 # primeiro chá de bebê da personagemNUSP
+        self.compartilhamentos = 0 # compartilhamentos bem-sucedidos
+        self.invalidas = 0 # ações inviáveis tentadas
+        self.plano = None # plano (agentes.Plano) em execução, se houver
+        # define os valores que a personagemNUSP conhece (antes da
+        # inicialização, para que o módulo já possa usá-los)
+        self.agente.nFlechas = self.nFlechas # copia nFlechas para a personagem
+        self.agente.mundoCompartilhado = BaseConhecimento(N) # começa sem nenhum rótulo
+        self.agente.inicializa(N) # chama a inicialização da personagem
 
         # Usa um vetor com as funções acima para facilitar o processamento das ações.
         # Os índices correspondem aos valores atribuídos aos símbolos respectivos
         # ("A"<->0, "D"<->1, etc.)
         self.processe = [ self.ande, self.gireDireita, self.gireEsquerda, self.atire, self.compartilhe ]
 
+    def referencial(self,i,j):
+        """ Converte a sala real (i,j) para o sistema de coordenadas da
+            personagem, que pensa ter começado em (0,0) olhando para baixo
+            ([1,0]): translada pela posição inicial real e gira de modo
+            que a orientação inicial real vire [1,0].
+        """
+        di,dj = i-self.inicio[0],j-self.inicio[1]
+        a,b = self.orientacaoInicial
+        return a*di+b*dj,a*dj-b*di
+
+    def conhecidas(self):
+        """ Devolve o número de salas que a personagem já conheceu: as
+            alterações do seu mapa e as recebidas em compartilhamentos.
+        """
+        return len(self.alteracoes)+sum(self.sincronizado.values())
+
     def planejar(self,percepcao):
         """ Método planejar (implementado pelo módulo)
         """
-        self.modulo.planejar(percepcao)
+        self.agente.planejar(percepcao)
 
     def agir(self):
         """ Método agir (implementado pelo módulo)
         """
-        self.modulo.agir()
+        return self.agente.agir()
 
 
 class Dummy(Personagem):
@@ -317,22 +865,18 @@ class Dummy(Personagem):
         coletando informações, a fim de compartilhá-las com a personagemNUSP. Essa
         personagem só faz parte da parte A do EP3 (não existirá na parte B).    
     """
-    from random import randint
-
     # direções de movimento para a personagem dummy:
     direcoes = [ [1,0], [0,1], [-1,0], [0,-1] ]
 
-    def __init__(self,N,mundo):
-        """ Construtor da classe Dummy.
+    def __init__(self,N,mundo,aleatorio,inicio=None):
+        """ Construtor da classe Dummy. O mundo conhecido pela dummy é o
+            seu mapa (veja Personagem.inicieMapa). A dummy começa na sala
+            inicio (por padrão, (0,0)).
         """
         self.N = N
-        self.posicao = [0, 0]
-        self.mundo = [ [ [], [], [], [], [] ],
-                       [ [], [], [], [], [] ],
-                       [ [], [], [], [], [] ],
-                       [ [], [], [], [], [] ],
-                       [ [], [], [], [], [] ] ]
-        self.mundo[0][0] = [salas[mundo[0][0]]]
+        self.aleatorio = aleatorio
+        self.posicao = [0, 0] if inicio is None else list(inicio)
+        self.inicieMapa(mundo)
 
 
     def planejar(self,percepcao):
@@ -340,23 +884,42 @@ class Dummy(Personagem):
         """
         return
 
-    def agir(self,pos,mundo):
+    def agir(self,MundoW):
         """ Move a personagem Dummy, sorteando uma das 4 direções;
             Essa personagem não tem raciocínio, e pode passar ilesa
             por muros, poços, Wumpus e etc. Mas ela gosta de se
-            encontrar com a personagemNUSP que está na posicao pos.
+            encontrar com as personagensNUSP, que procura nas salas
+            adjacentes pelo índice de ocupantes do mundo.
         """
-        # verifica se a personagemNUSP está na adjacência, e se move para lá
-        if abs(pos[0]-self.posicao[0])+abs(pos[1]-self.posicao[1])==1:
-            self.posicao[0], self.posicao[1] = pos[0], pos[1]
-        else:
-            # do contrário, sorteia uma direção qualquer para andar
-            d = self.direcoes[self.randint(0,3)]
-            self.posicao[0],self.posicao[1] = (self.posicao[0]+d[0])%self.N,(self.posicao[1]+d[1])%self.N
-            self.mundo[self.posicao[0]][self.posicao[1]] = [salas[mundo[self.posicao[0]][self.posicao[1]]]]
+        # verifica se alguma personagemNUSP está na adjacência, e se move para lá
+        # (como na versão original, sem contar as adjacências pela borda do toro)
+        pos = self.posicao
+        for vizinha in MundoW.adjacentes(pos[0],pos[1]):
+            if isinstance(vizinha,PersonagemNUSP) and abs(vizinha.posicao[0]-pos[0])+abs(vizinha.posicao[1]-pos[1])==1:
+                MundoW.mova(self,vizinha.posicao[0],vizinha.posicao[1])
+                return
+        # do contrário, sorteia uma direção qualquer para andar
+        d = self.direcoes[self.aleatorio.randint(0,3)]
+        MundoW.mova(self,(self.posicao[0]+d[0])%self.N,(self.posicao[1]+d[1])%self.N)
+        k = self.posicao[0]*self.N+self.posicao[1]
+        self.descubra(k,MundoW.mundo[k])
 
 
 # Chamada principal... é aqui que toda a mágica acontece!
-
-m = MundoDeWumpus()
+# (opcionalmente: python3 mundo.py N semente, para jogar em um mundo sorteado)
+if __name__=="__main__":
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        # python3 mundo.py CORPUS [K]: joga o k-ésimo mundo de um corpus
+        from corpus import Corpus
+        k = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+        with Corpus(sys.argv[1]) as c:
+            m = MundoDeWumpus(verboso=True,mundo=c[k],N=c.N(k),semente=k)
+    elif len(sys.argv) > 1:
+        from gerador import geraMundo
+        N = int(sys.argv[1])
+        semente = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        m = MundoDeWumpus(verboso=True,mundo=geraMundo(N,semente),N=N,semente=semente)
+    else:
+        m = MundoDeWumpus(verboso=True)
+    m.jogue()
 
@@ -19,265 +19,483 @@ AO PREENCHER ESSE CABEÇALHO COM O MEU NOME E O MEU NÚMERO USP,
 """
 
 
-""" Módulo personagemNUSP: define as funções básicas de gerenciamento
-    da personagemNUSP no Mundo de Wumpus.
+""" Módulo personagemNUSP: define a personagemNUSP no Mundo de Wumpus,
+    como uma classe Agente (veja agentes.py): cada partida usa a sua
+    própria instância, de modo que várias personagens podem jogar ao
+    mesmo tempo. As funções inicializa, planejar e agir do protocolo
+    original (com variáveis globais) continuam disponíveis no final.
 """
 
 
-# flag para depuração
-__DEBUG__ = True
+import agentes
+from agentes import Plano
+from gravacao import IMPACTO, URRO, ENCONTRO
+from conhecimento import BaseConhecimento, V, L, M, P, W, PS, WS, B, F, D
+from planejador import Planejador, Fronteira
+from inferencia import Inferencia
+from montecarlo import PlanejadorMonteCarlo
+from renderizador import Renderizador, marcador
 
+# flag para depuração: desenha o mundo conhecido pela personagem a cada turno
+__DEBUG__ = False
 
-# Variaveis globais (do módulo) que o mundo acessa para passar informações para a personagem.
+# probabilidade a priori de poço em cada sala (a densidade padrão do gerador)
+PRIORI_POCO = 0.1
+# maior risco (probabilidade de poço ou Wumpus) que a personagem aceita
+# correr quando não há mais salas seguras a explorar
+RISCO_MAXIMO = 0.2
+# se a personagem passar PACIENCIA_MONTECARLO turnos sem salas seguras a
+# explorar nem riscos aceitáveis, decide por busca de Monte Carlo (veja
+# montecarlo.py), com este orçamento de tempo (s) por decisão e, se
+# PROCESSOS_MONTECARLO não for None, com simulações em outros processos
+MONTECARLO = False
+# devolve as rotas seguras inteiras como um Plano (veja agentes.Plano), de
+# até MAXIMO_PLANO ações, em vez de uma ação por turno
+PLANOS = True
+MAXIMO_PLANO = 64
+PACIENCIA_MONTECARLO = 40
+ORCAMENTO_MONTECARLO = 0.01
+PROCESSOS_MONTECARLO = None
 
-global nFlechas
-"""
-Número de flechas que a personagem possui. Serve apenas para
-consulta da personagem, pois o mundo mantém uma cópia "segura" dessa
-informação (não tente inventar flechas...).
-"""
-
-global mundoCompartilhado
-"""
-Esse é um espaço onde a personagem tem acesso à representação do
-mundo de uma outra personagem.  Essa informação pode ser usada como a
-personagem quiser (por exemplo, transferindo o conteúdo para o seu
-próprio "mundo", ou mantendo uma lista dos vários mundos
-compartilhados com outras personagens).
-"""
 
+class Agente(agentes.Agente):
+    """ Classe Agente: a personagemNUSP. Seu estado fica nos atributos
+        abaixo (que no protocolo original eram variáveis globais).
+    """
 
-# Outras variáveis globais do módulo personagemNUSP
+    # Atributos que o mundo define para passar informações para a personagem.
 
-global N
-""" Dimensão do mundo.
-"""
+    nFlechas = 0
+    """
+    Número de flechas que a personagem possui. Serve apenas para
+    consulta da personagem, pois o mundo mantém uma cópia "segura" dessa
+    informação (não tente inventar flechas...).
+    """
 
-global mundo
-"""
-Representa o conhecimento da personagem em relação ao Mundo de
-Wumpus. Essa é uma matriz de NxN onde a personagem toma notas de suas
-percepções ao longo do caminho que percorre, indicando os muros, as
-salas livres e as salas percorridas, bem como a proximidade de perigos
-(poços e Wumpus). A geometria do mundo é a de um toro (aquela figura
-que parece um donut!) onde existem sempre 4 salas vizinhas à posição
-[i][j]: em sentido horário e a partir da (nossa) direita essas seriam:
-[i][(j+1)%N], [(i+1)%N][j], [i][(j-1)%N] e [(i-1)%N][j]. Cada entrada
-mundo[i][j] é uma lista de anotações/rótulos correspondentes às
-informações encontradas ou deduzidas pela personagem sobre o conteúdo
-da sala (i,j).
-"""
+    mundoCompartilhado = None
+    """
+    Esse é um espaço (uma BaseConhecimento, veja conhecimento.py) onde a
+    personagem tem acesso à representação do mundo de uma outra personagem.  Essa informação pode ser usada como a
+    personagem quiser (por exemplo, transferindo o conteúdo para o seu
+    próprio "mundo", ou mantendo uma lista dos vários mundos
+    compartilhados com outras personagens).
+    """
 
-global posicao
-"""
-Representa a posição relativa da personagem no mundo. Cada
-personagem começa em uma posição aleatória (e desconhecida por ela,
-pois não possui GPS ou equivalente) do Mundo "real" de Wumpus, e por
-isso precisa usar um sistema de coordenadas pessoal para se orientar.
-Por convenção, sua posição inicial é representada como [0,0] (canto
-superior esquerdo) nesse sistema. Como o mundo não tem bordas, podemos
-usar sempre os i=0,...,N-1 e j=0,...,N-1, que percorrem todas as salas
-possíveis do Mundo de Wumpus, usando o operador módulo (%) para
-corrigir a posição quando um passo nos levar a uma sala de índice <0
-ou >=N.
-"""
+    # Outros atributos da personagemNUSP
 
-global orientacao
-"""
-Juntamente com a posição relativa, permite à personagem manter o
-histórico das salas visitadas. Essa orientação é independente da
-orientação "real" que o mundo usa para coordenar a ação de todas as
-personagens. Por convenção, todas as personagens indicam sua orientação
-inicial como "para baixo" ou "sul", correspondente à direção [1,0]
-(direção do eixo vertical).
-"""
+    N = 0
+    """ Dimensão do mundo.
+    """
 
+    mundo = None
+    """
+    Representa o conhecimento da personagem em relação ao Mundo de
+    Wumpus. Essa é uma matriz de NxN onde a personagem toma notas de suas
+    percepções ao longo do caminho que percorre, indicando os muros, as
+    salas livres e as salas percorridas, bem como a proximidade de perigos
+    (poços e Wumpus). A geometria do mundo é a de um toro (aquela figura
+    que parece um donut!) onde existem sempre 4 salas vizinhas à posição
+    [i][j]: em sentido horário e a partir da (nossa) direita essas seriam:
+    [i][(j+1)%N], [(i+1)%N][j], [i][(j-1)%N] e [(i-1)%N][j]. Cada sala
+    (i,j) guarda um conjunto de anotações/rótulos correspondentes às
+    informações encontradas ou deduzidas pela personagem sobre o seu
+    conteúdo, representado como uma máscara de bits em uma
+    BaseConhecimento (veja conhecimento.py).
+    """
 
-def inicializa(tamanho):
-    """ Função de inicialização da personagem (recebe o tamanho do mundo).
-        Usa as variáveis globais (do módulo) para representar seu
-        conhecimento do mundo, sua posição e sua orientação relativas
-        ao início da simulação. Você pode criar e inicializar outras
-        variáveis aqui (por exemplo, a lista de salas livres e não
-        visitadas).
+    posicao = None
+    """
+    Representa a posição relativa da personagem no mundo. Cada
+    personagem começa em uma posição aleatória (e desconhecida por ela,
+    pois não possui GPS ou equivalente) do Mundo "real" de Wumpus, e por
+    isso precisa usar um sistema de coordenadas pessoal para se orientar.
+    Por convenção, sua posição inicial é representada como [0,0] (canto
+    superior esquerdo) nesse sistema. Como o mundo não tem bordas, podemos
+    usar sempre os i=0,...,N-1 e j=0,...,N-1, que percorrem todas as salas
+    possíveis do Mundo de Wumpus, usando o operador módulo (%) para
+    corrigir a posição quando um passo nos levar a uma sala de índice <0
+    ou >=N.
+    """
 
+    orientacao = None
+    """
+    Juntamente com a posição relativa, permite à personagem manter o
+    histórico das salas visitadas. Essa orientação é independente da
+    orientação "real" que o mundo usa para coordenar a ação de todas as
+    personagens. Por convenção, todas as personagens indicam sua orientação
+    inicial como "para baixo" ou "sul", correspondente à direção [1,0]
+    (direção do eixo vertical).
     """
-    # declara as variáveis globais que serão acessadas
-    global N, mundo, posicao, orientacao
-    # guarda o tamanho do mundo
-    global tentativas
-    tentativas = 0
-    global encontros
-    encontros = 0
-    global salasL
-    salasL = []
-    N = tamanho
-    # cria a matriz NxN com a representação do mundo conhecido
-    mundo = []
-    for i in range(N) : 
-        linha = []
-        for j in range(N) : 
-            linha.append([]) # começa com listas vazias
-        mundo.append(linha)
-    # posição e orientação iniciais da personagem (sempre serão [0,0] e [1,0]).
-    posicao = [0,0]
-    orientacao = [1,0]
 
+    def inicializa(self,tamanho):
+        """ Função de inicialização da personagem (recebe o tamanho do mundo).
+            Usa os atributos da instância para representar seu
+            conhecimento do mundo, sua posição e sua orientação relativas
+            ao início da simulação. Também cria o planejador de rotas e a
+            fronteira (as salas livres e não visitadas).
+
+        """
+        # guarda o tamanho do mundo
+        self.tentativas = 0
+        self.encontros = 0
+        self.N = N = tamanho
+        # planejador de rotas até as salas livres ainda não visitadas
+        self.planejador = Planejador(N)
+        # cria a matriz NxN com a representação do mundo conhecido
+        self.mundo = BaseConhecimento(N) # começa sem nenhum rótulo
+        # salas livres e não visitadas, atualizadas a cada alteração do
+        # conhecimento da personagem (ou do conhecimento compartilhado)
+        self.fronteira = Fronteira(N,self.salaAlvo)
+        self.mundo.observe(self.fronteira.atualize)
+        self.mundoCompartilhado.observe(self.fronteira.atualize)
+        # salas alteradas (em qualquer das duas bases) desde a última
+        # conciliação entre o conhecimento próprio e o compartilhado
+        self.pendentes = set()
+        self.mundo.observe(self.pendentes.add)
+        self.mundoCompartilhado.observe(self.pendentes.add)
+        # probabilidades de poço e de Wumpus em cada sala, a partir das brisas
+        # e fedores percebidos (ou não) nas salas visitadas
+        self.pocos = Inferencia(N,PRIORI_POCO)
+        self.wumpus = Inferencia(N,1/(N*N))
+        self.observadas = set()
+        # plano devolvido por agir, cujas ações ainda não foram contadas
+        self.plano = None
+        # o planejador de Monte Carlo da partida anterior (se houver) é
+        # substituído: seu pool de processos é fechado
+        if getattr(self,"montecarlo",None) is not None:
+            self.montecarlo.feche()
+        self.montecarlo = None
+        if MONTECARLO:
+            self.montecarlo = PlanejadorMonteCarlo(ORCAMENTO_MONTECARLO,processos=PROCESSOS_MONTECARLO)
+        # desenha o mundo conhecido (abaixo do quadro do mundo real)
+        self.renderizador = None
+        if __DEBUG__:
+            self.renderizador = Renderizador(N,"Mundo conhecido pela personagem:",
+                                             linha=Renderizador.altura(N)+2,largura=12)
+        # posição e orientação iniciais da personagem (sempre serão [0,0] e [1,0]).
+        self.posicao = [0,0]
+        self.orientacao = [1,0]
+
+    def planejar(self,percepcao):
+        """ Nessa função a personagem deve atualizar seu conhecimento
+            do mundo usando sua percepção da sala atual. Através desse
+            parâmetro a personagem recebe (do mundo) todas as informaçõesB
+            sensoriais associadas à sala atual, bem como o feedback de
+            sua última ação.
+            Essa percepção é uma lista de strings que podem valer:
+                "F" = fedor do Wumpus em alguma sala adjacente,
+                "B" = brisa de um poço em sala adjacente, 
+                "I" para impacto com uma parede,
+                "U" para o urro do Wumpus agonizante e
+                "Nome" quando uma outra personagem é encontrada.
+        """
+        N = self.N
+        mundo = self.mundo
+        mundoCompartilhado = self.mundoCompartilhado
+        # Atualiza representação local do mundo (na visão da personagem).
+        # Devem ser usados os símbolos "W"/"W?" para Wumpus ou possível
+        # Wumpus e "P"/"P?" para poço ou possível poço, além dos indicadores
+        # "B" para brisa, "F" para fedor, "L" para salas livres,
+        # "M" para muros e "V" para salas visitadas.
+
+        # Essa função ainda precisa ser implementada! São requisitos dessa
+        # implementação a incorporação dos dados perceptuais à representação
+        # do mundo, bem como a propagação do conhecimento adquirido para as
+        # adjacências da sala atual (requisitos completos no enunciado).
+
+        if self.plano is not None:
+            self.sigaPlano()
+        pos = self.posicao
+        ori = self.orientacao
 
-def planejar(percepcao):
-    """ Nessa função a personagem deve atualizar seu conhecimento
-        do mundo usando sua percepção da sala atual. Através desse
-        parâmetro a personagem recebe (do mundo) todas as informaçõesB
-        sensoriais associadas à sala atual, bem como o feedback de
-        sua última ação.
-        Essa percepção é uma lista de strings que podem valer:
-            "F" = fedor do Wumpus em alguma sala adjacente,
-            "B" = brisa de um poço em sala adjacente, 
-            "I" para impacto com uma parede,
-            "U" para o urro do Wumpus agonizante e
-            "Nome" quando uma outra personagem é encontrada.
-    """
-    # declara as variáveis globais que serão acessadas
-    global mundo, posicao, orientacao, nFlechas, mundoCompartilhado
-    # Atualiza representação local do mundo (na visão da personagem).
-    # Devem ser usados os símbolos "W"/"W?" para Wumpus ou possível
-    # Wumpus e "P"/"P?" para poço ou possível poço, além dos indicadores
-    # "B" para brisa, "F" para fedor, "L" para salas livres,
-    # "M" para muros e "V" para salas visitadas.
-
-    # Essa função ainda precisa ser implementada! São requisitos dessa
-    # implementação a incorporação dos dados perceptuais à representação
-    # do mundo, bem como a propagação do conhecimento adquirido para as
-    # adjacências da sala atual (requisitos completos no enunciado).
-
-    # ############ T R E C H O   D E   I L U S T R A Ç Ã O ##############
-    # O trecho abaixo serve apenas para lhe ajudar a depurar o seu código
-    # 
-    if __DEBUG__:
-        print("Percepção recebida pela personagem:")
-        print(percepcao)
-        pos = posicao
-        ori = orientacao
-        
         def mapeia(X):
             """ Mapeia os quadros adjacentes segundo a percepção do player
             """
-            if 'M' not in mundo[pos[0]-1][pos[1]] and  'V' not in mundo[pos[0]-1][pos[1]] \
-            and 'L' not in mundo[pos[0]-1][pos[1]] and X not in mundo[pos[0]-1][pos[1]]:
-                mundo[pos[0]-1][pos[1]] += [X]  
-            if 'M' not in mundo[(pos[0]+1)%len(mundo)][pos[1]] and  'V'not in mundo[(pos[0]+1)%len(mundo)][pos[1]]\
-            and 'L'not in mundo[(pos[0]+1)%len(mundo)][pos[1]] and X not in mundo[(pos[0]+1)%len(mundo)][pos[1]]:
-                 mundo[(pos[0]+1)%len(mundo)][pos[1]]  += [X]
-            if 'M' not in mundo[pos[0]][(pos[1]+1)%len(mundo)] and  'V' not in mundo[pos[0]][(pos[1]+1)%len(mundo)] \
-            and 'L'not in mundo[pos[0]][(pos[1]+1)%len(mundo)] and X not in mundo[pos[0]][(pos[1]+1)%len(mundo)]:
-                mundo[pos[0]][(pos[1]+1)%len(mundo)] += [X] 
-            if 'M' not in mundo[pos[0]][pos[1]-1] and 'V' not in mundo[pos[0]][pos[1]-1]\
-            and 'L' not in mundo[pos[0]][pos[1]-1] and X not in mundo[pos[0]][pos[1]-1]:
-                mundo[pos[0]][pos[1]-1] += [X]                 
+            for i,j in ((pos[0]-1,pos[1]), (pos[0]+1,pos[1]), (pos[0],pos[1]+1), (pos[0],pos[1]-1)):
+                if not mundo.tem(i,j,M|V|L|X):
+                    mundo.marque(i,j,X)
         if "I" in percepcao:
-            print("Você bateu num muro")
-            if 'M' not in mundoCompartilhado[pos[0]][pos[1]]:
-                mundo[pos[0]][pos[1]] = ['M']
-            pos[0] = (pos[0]-ori[0])%len(mundo)
-            pos[1] = (pos[1]-ori[1])%len(mundo)
-        mundo[pos[0]][pos[1]] = ["V"]
-        mundoCompartilhado[pos[0]][pos[1]] = [""]
+            if not mundoCompartilhado.tem(pos[0],pos[1],M):
+                mundo.defina(pos[0],pos[1],M)
+            pos[0] = (pos[0]-ori[0])%N
+            pos[1] = (pos[1]-ori[1])%N
+        mundo.defina(pos[0],pos[1],V)
+        mundoCompartilhado.defina(pos[0],pos[1],0)
         if percepcao == []:
-            mapeia('L')
+            mapeia(L)
         if "B" in percepcao:
-            mapeia('P?')
-            mundo[pos[0]][pos[1]] += ["B"]        
+            mapeia(PS)
+            mundo.marque(pos[0],pos[1],B)
         if 'F' in percepcao:
-            mapeia('W?')
-            mundo[pos[0]][pos[1]] += ["F"]
+            mapeia(WS)
+            mundo.marque(pos[0],pos[1],F)
         if percepcao != [] and 'B' not in percepcao[-1] and 'F' not in percepcao[-1] and 'I' not in percepcao[-1] and 'U' not in percepcao[-1]:
-            mundo[pos[0]][pos[1]] += ["D"]   
-            
+            mundo.marque(pos[0],pos[1],D)
+        k = pos[0]*N+pos[1]
+        if "U" in percepcao:
+            # o Wumpus morreu: os fedores percebidos até aqui não valem mais
+            self.wumpus.reinicie()
+            self.observadas.clear()
+        if k not in self.observadas:
+            self.observadas.add(k)
+            vizinhas = [ (pos[0]+di)%N*N+(pos[1]+dj)%N for di,dj in ((1,0),(-1,0),(0,1),(0,-1)) ]
+            self.pocos.observe(vizinhas,"B" in percepcao)
+            self.wumpus.observe(vizinhas,"F" in percepcao)
+        self.concilia()
+        self.resolvaSuspeitas()
 
+        # ############ T R E C H O   D E   I L U S T R A Ç Ã O ##############
+        # O trecho abaixo serve apenas para lhe ajudar a depurar o seu código:
         # mostra na tela (para o usuário) o mundo conhecido pela personagem
         # e o mundo compartilhado (quando disponível)
-        print("Mundo conhecido pela personagem:")
-        for i in range(len(mundo)):
-            for j in range(len(mundo[0])):
-                if pos==[i,j]:
-                    if ori==[0,-1]:
-                        print("<",end="")
-                    print("X",end="")
-                    if ori==[0,1]:
-                        print(">",end="")
-                    if ori==[1,0]:
-                        print("v",end="")
-                    if ori==[-1,0]:
-                        print("^",end="")
-                if 'V' in mundo[i][j] and 'L' in mundoCompartilhado[i][j]:
-                    mundoCompartilhado[i][j] = ['']
-                
-                if 'L' in mundoCompartilhado[i][j] or 'M' in mundoCompartilhado\
-                or 'P' in mundoCompartilhado[i][j] or 'W' in mundoCompartilhado[i][j]:
-                    mundo[i][j] = ['']
-                print("".join(mundo[i][j]),end="")
-                print("".join(mundoCompartilhado[i][j]),end="\t| ")
-            print("\n"+"-"*(8*len(mundo)+1))
+        if self.renderizador is not None:
+            quadro = [ "".join(mundo.rotulos(i,j))+"".join(mundoCompartilhado.rotulos(i,j))
+                       for i in range(N) for j in range(N) ]
+            quadro[pos[0]*N+pos[1]] = marcador(ori)+quadro[pos[0]*N+pos[1]]
+            self.renderizador.desenhe(quadro,"percepção: "+" ".join(percepcao))
+
+    def concilia(self):
+        """ Concilia o conhecimento próprio com o compartilhado, nas salas
+            alteradas desde a última conciliação: uma sala livre já visitada
+            sai do mundo compartilhado, e uma sala que o mundo compartilhado
+            diz ser livre, poço ou Wumpus passa a valer só por ele.
+        """
+        mundo = self.mundo
+        mundoCompartilhado = self.mundoCompartilhado
+        pendentes = list(self.pendentes)
+        for k in pendentes:
+            i,j = divmod(k,self.N)
+            # o que as duas bases sabem com certeza vale para a inferência
+            if mundo.tem(i,j,V|L|M) or mundoCompartilhado.tem(i,j,L|M):
+                self.pocos.segura(k)
+                self.wumpus.segura(k)
+            elif mundoCompartilhado.tem(i,j,P):
+                self.pocos.certeza(k)
+            elif mundoCompartilhado.tem(i,j,W):
+                self.wumpus.certeza(k)
+            if mundo.tem(i,j,V) and mundoCompartilhado.tem(i,j,L):
+                mundoCompartilhado.defina(i,j,0)
+            if mundoCompartilhado.tem(i,j,L|P|W):
+                mundo.defina(i,j,0)
+        # as alterações da própria conciliação não precisam ser revistas
+        self.pendentes.clear()
+
+    def resolvaSuspeitas(self):
+        """ Atualiza os rótulos das salas cujas probabilidades mudaram:
+            uma sala que certamente não tem poço (ou Wumpus) perde o "P?"
+            (ou "W?"), e uma que certamente tem passa a ser "P" (ou "W").
+            As salas que o mundo compartilhado já diz o que são ficam sem
+            rótulos próprios (veja concilia).
+        """
+        mundo = self.mundo
+        mundoCompartilhado = self.mundoCompartilhado
+        for inferencia,suspeita,certeza in ((self.pocos,PS,P),(self.wumpus,WS,W)):
+            for k in inferencia.mudancas():
+                i,j = divmod(k,self.N)
+                if mundoCompartilhado.tem(i,j,L|P|W):
+                    continue
+                probabilidade = inferencia.probabilidade(k)
+                if probabilidade >= 1.0-1e-9:
+                    if not mundo.tem(i,j,certeza):
+                        mundo.desmarque(i,j,suspeita)
+                        mundo.marque(i,j,certeza)
+                else:
+                    if mundo.tem(i,j,certeza):
+                        mundo.desmarque(i,j,certeza)
+                    if probabilidade == 0.0 and mundo.tem(i,j,suspeita):
+                        mundo.desmarque(i,j,suspeita)
+
+    def risco(self,i,j):
+        """ Probabilidade de haver um poço ou um Wumpus na sala (i,j).
+        """
+        k = i%self.N*self.N+j%self.N
+        return 1-(1-self.pocos.probabilidade(k))*(1-self.wumpus.probabilidade(k))
+
+    def salaSegura(self,k):
+        """ Diz se a sala k (índice i*N+j) é segura para a personagem, segundo
+            o seu próprio conhecimento ou o conhecimento compartilhado.
+        """
+        m = self.mundo.salas[k]
+        c = self.mundoCompartilhado.salas[k]
+        return bool((m & (V|L) or c & L) and not (m|c) & M)
+
+    def salaAlvo(self,k):
+        """ Diz se a sala k é segura e ainda não foi visitada.
+        """
+        return self.salaSegura(k) and not self.mundo.salas[k] & V
+
+    def rota(self):
+        """ Devolve a próxima ação da rota mais curta (contando os giros) até
+            a sala segura não visitada mais próxima, ou None se não houver.
+            O mapa de distâncias só é recalculado quando o conhecimento muda.
+        """
+        if not self.fronteira.salas:
+            return None
+        versao = (self.mundo.versao,self.mundoCompartilhado.versao)
+        if versao != self.planejador.versao:
+            self.planejador.atualize(versao,self.fronteira.salas,self.salaSegura)
+        return self.planejador.proximaAcao(self.posicao,self.orientacao)
+
+    def aproxima(self,i,j,alvo):
+        """ Diz se a sala (i,j) está mais perto da sala alvo do que a
+            posição atual da personagem.
+        """
+        N = self.N
+        ai,aj = divmod(alvo,N)
+        def distancia(i,j):
+            di,dj = abs(i%N-ai),abs(j%N-aj)
+            return min(di,N-di)+min(dj,N-dj)
+        return distancia(i,j) < distancia(self.posicao[0],self.posicao[1])
+
+    def movimente(self,acao,pos,ori):
+        """ Atualiza a posição e a orientação dadas (listas) pela ação.
+        """
+        if acao=="A":
+            pos[0] = (pos[0]+ori[0])%self.N
+            pos[1] = (pos[1]+ori[1])%self.N
+            if pos is self.posicao:
+                self.tentativas = 0
+                self.encontros = 0
+        if acao=="E":
+            if ori[0]==0:
+                ori[1] = -ori[1]
+            ori[0],ori[1] = ori[1],ori[0]
+        if acao=="D":
+            if ori[1]==0:
+                ori[0] = -ori[0]
+            ori[0],ori[1] = ori[1],ori[0]
+
+    def planoDaRota(self,acao):
+        """ Devolve um Plano com a rota planejada a partir da ação dada,
+            até a personagem entrar em uma sala não visitada (cuja
+            percepção ela precisa ver) ou chegar a um estado em que agir
+            faria outra coisa (atirar ou compartilhar), ou None se a rota
+            tiver uma ação só. Como o resto do caminho é por salas já
+            visitadas, o plano só é interrompido por impacto, urro ou
+            encontro.
+        """
+        mundo = self.mundo
+        pos = list(self.posicao)
+        ori = list(self.orientacao)
+        acoes = []
+        while acao is not None and len(acoes) < MAXIMO_PLANO:
+            acoes.append(acao)
+            self.movimente(acao,pos,ori)
+            fi,fj = pos[0]+ori[0],pos[1]+ori[1]
+            if not mundo.tem(pos[0],pos[1],V) or mundo.tem(pos[0],pos[1],D) \
+            or ((self.mundoCompartilhado.tem(fi,fj,W) or mundo.tem(fi,fj,W)) and self.nFlechas > 0):
+                break
+            acao = self.planejador.proximaAcao(pos,ori)
+        if len(acoes) < 2:
+            return None
+        return Plano("".join(acoes),IMPACTO|URRO|ENCONTRO)
+
+    def sigaPlano(self):
+        """ Conta as ações executadas do último plano.
+        """
+        for acao in self.plano.acoes[:self.plano.executadas]:
+            self.movimente(acao,self.posicao,self.orientacao)
+        self.plano = None
+
+    def agir(self):
+        """ Nessa função a personagem deve usar seu conhecimento
+            do mundo para decidir e tentar executar (devolver) uma ação.
+            Possíveis ações (valores de retorno da função) são
+            "A"=Andar, "D"=girarDireita, "E"=girarEsquerda,
+            "T"=aTirar e "C"=Compartilhar.
+        """
+        N = self.N
+        mundo = self.mundo
+        mundoCompartilhado = self.mundoCompartilhado
+        # Aplica uma certa estratégia para decidir a ação a ser
+        # executada com base na representação local do mundo.
+        # Devolve (para o mundo) o nome da ação pretendida.
+        # Duas ações só são possíveis em condições específicas,
+        # que devem ser testadas de antemão (sob risco da personagem
+        # entrar em loop): atirar só é possível quando a personagem
+        # dispõe de flechas, e compartilhar só é possível quando
+        # existem outras personagens na mesma sala (percebidas
+        # pela função planejar através de percepções diferentes de
+        # "F", "B", "I" ou "U").
+
+        # ############ T R E C H O   D E   I L U S T R A Ç Ã O ##############
+        # O trecho abaixo é uma pseudo-implementação, pois recebe
+        # a ação através de uma pergunta dirigida ao usuário.
+        # No código a ser entregue, você deve programar algum tipo
+        # de estratégia para    
+        pos = self.posicao
+        ori = self.orientacao
+        # sala à frente da personagem
+        fi,fj = pos[0]+ori[0],pos[1]+ori[1]
+        if mundo.tem(pos[0],pos[1],D) and self.encontros <= 5:
+            acao = 'C'
+            self.encontros += 1
+            self.tentativas -= 1
+        elif (mundoCompartilhado.tem(fi,fj,W) or mundo.tem(fi,fj,W)) and self.nFlechas > 0:
+            acao = 'T'
+        else:
+            # segue a rota planejada até a próxima sala a explorar
+            acao = self.rota()
+            if acao is not None and PLANOS:
+                plano = self.planoDaRota(acao)
+                if plano is not None:
+                    self.plano = plano
+                    return plano
+            if acao is None and self.salaSegura(fi%N*N+fj%N) and self.fronteira.salas \
+            and self.aproxima(fi,fj,self.fronteira.maisProxima(pos)):
+                # sem rota segura: ao menos se aproxima da sala a explorar
+                acao = 'A'
+            elif acao is None and self.tentativas >= 5 and mundo.tem(fi,fj,V):
+                acao = 'A'
+            elif acao is None and self.tentativas >= 5 and self.risco(fi,fj) <= RISCO_MAXIMO:
+                # sem salas seguras a explorar: arrisca a sala à frente, se
+                # for pouco provável que ela tenha um poço ou um Wumpus
+                acao = 'A'
+            elif acao is None and self.tentativas >= PACIENCIA_MONTECARLO and self.montecarlo is not None:
+                # nem isso, por muito tempo: simula mundos compatíveis com o
+                # conhecimento e escolhe a ação de maior valor esperado
+                acao = self.montecarlo.decida(self)
+            elif acao is None:
+                acao ='D'
+                self.tentativas +=1
+        if mundoCompartilhado.tem(fi,fj,M) or mundo.tem(fi,fj,M):
+            acao = 'D'
+        self.movimente(acao,pos,ori)
+
+        # ##### F I M   D O   T R E C H O   D E   I L U S T R A Ç Ã O #####
+        assert acao in ["A","D","E","T","C"]
+        return acao
+
+
+# Protocolo original: funções do módulo, com o estado em variáveis globais.
+# O mundo escreve nFlechas e mundoCompartilhado no módulo, e as funções
+# abaixo repassam tudo para uma única instância de Agente.
+
+global nFlechas, mundoCompartilhado
+agente = None
+
+
+def inicializa(tamanho):
+    """ Função de inicialização da personagem (recebe o tamanho do mundo).
+    """
+    global agente
+    if agente is not None and agente.montecarlo is not None:
+        agente.montecarlo.feche()
+    agente = Agente()
+    agente.nFlechas = nFlechas
+    agente.mundoCompartilhado = mundoCompartilhado
+    agente.inicializa(tamanho)
+
+
+def planejar(percepcao):
+    """ Repassa a percepção para a instância da personagem.
+    """
+    agente.nFlechas = nFlechas
+    agente.planejar(percepcao)
+
 
 def agir():
-    """ Nessa função a personagem deve usar seu conhecimento
-        do mundo para decidir e tentar executar (devolver) uma ação.
-        Possíveis ações (valores de retorno da função) são
-        "A"=Andar, "D"=girarDireita, "E"=girarEsquerda,
-        "T"=aTirar e "C"=Compartilhar.
+    """ Devolve a ação escolhida pela instância da personagem.
     """
-    # declara as variáveis globais que serão acessadas
-    global mundo, posicao, orientacao, nFlechas, mundoCompartilhado, tentativas, encontros
-    # Aplica uma certa estratégia para decidir a ação a ser
-    # executada com base na representação local do mundo.
-    # Devolve (para o mundo) o nome da ação pretendida.
-    # Duas ações só são possíveis em condições específicas,
-    # que devem ser testadas de antemão (sob risco da personagem
-    # entrar em loop): atirar só é possível quando a personagem
-    # dispõe de flechas, e compartilhar só é possível quando
-    # existem outras personagens na mesma sala (percebidas
-    # pela função planejar através de percepções diferentes de
-    # "F", "B", "I" ou "U").
-
-    # ############ T R E C H O   D E   I L U S T R A Ç Ã O ##############
-    # O trecho abaixo é uma pseudo-implementação, pois recebe
-    # a ação através de uma pergunta dirigida ao usuário.
-    # No código a ser entregue, você deve programar algum tipo
-    # de estratégia para    
-    pos = posicao
-    ori = orientacao
-    if 'D' in mundo[pos[0]][pos[1]]and encontros <= 5:
-        acao = 'C'
-        encontros += 1
-        tentativas -= 1
-    elif 'L' in mundo[(pos[0]+ori[0])%len(mundo)][(pos[1]+ori[1])%len(mundo)] \
-    or 'L' in mundoCompartilhado[(pos[0]+ori[0])%len(mundoCompartilhado)][(pos[1]+ori[1])%len(mundoCompartilhado)]:
-        acao = 'A'
-    elif tentativas >= 5 and 'V' in mundo[(pos[0]+ori[0])%len(mundo)][(pos[1]+ori[1])%len(mundo)]:
-        acao = 'A'
-    elif 'W' in mundoCompartilhado[(pos[0]+ori[0])%len(mundoCompartilhado)][(pos[1]+ori[1])%len(mundoCompartilhado)] and nFlechas > 0:
-        acao = 'T'
-    else:
-        acao ='D'
-        tentativas +=1
-    if 'M' in mundoCompartilhado[(pos[0]+ori[0])%len(mundoCompartilhado)][(pos[1]+ori[1])%len(mundoCompartilhado)]\
-    or 'M' in mundo[(pos[0]+ori[0])%len(mundo)][(pos[1]+ori[1])%len(mundo)]:
-        acao = 'D'
-    if acao=="A":
-        pos[0] = (pos[0]+ori[0])%len(mundo)
-        pos[1] = (pos[1]+ori[1])%len(mundo)
-        tentativas = 0
-        encontros = 0
-        
-    if acao=="E":
-        if ori[0]==0:
-            ori[1] = -ori[1]
-        ori[0],ori[1] = ori[1],ori[0]
-    if acao=="D":
-        if ori[1]==0:
-            ori[0] = -ori[0]
-        ori[0],ori[1] = ori[1],ori[0]
-    
-    # ##### F I M   D O   T R E C H O   D E   I L U S T R A Ç Ã O #####
-    assert acao in ["A","D","E","T","C"]
-    return acao
+    agente.nFlechas = nFlechas
+    return agente.agir()
@@ -0,0 +1,125 @@
+
+""" Módulo planejador: calcula rotas mais curtas para uma personagem no
+    Mundo de Wumpus, usando apenas as salas que ela sabe serem seguras.
+
+    O custo de uma rota é o número de ações: andar uma sala ("A") e girar
+    para a direita ou para a esquerda ("D"/"E") custam uma ação cada, de
+    modo que a busca é feita sobre estados (sala, orientação). O mapa de
+    distâncias é calculado de trás para frente, a partir de todas as salas
+    alvo ao mesmo tempo, e fica guardado até que o conhecimento da
+    personagem mude: enquanto isso, cada decisão é só uma consulta.
+"""
+
+from collections import deque
+
+# orientações na ordem em que "E" (giro anti-horário) as percorre:
+# baixo, direita, cima, esquerda. "D" percorre a lista ao contrário.
+orientacoes = [ (1,0), (0,1), (-1,0), (0,-1) ]
+
+
+class Planejador:
+    """ Classe Planejador: guarda um mapa de distâncias (em número de
+        ações) de cada estado (sala, orientação) até a sala alvo mais
+        próxima, na geometria de toro NxN. As salas são identificadas
+        pelo índice k = i*N+j, como nas BaseConhecimento.
+    """
+    def __init__(self,N):
+        """ Construtor: cria um planejador ainda sem mapa de distâncias.
+        """
+        self.N = N
+        self.versao = None
+        self.distancias = {}
+
+    def atualize(self,versao,alvos,passavel):
+        """ Recalcula o mapa de distâncias, se a versão do conhecimento
+            mudou desde o último cálculo. alvos é uma coleção de salas
+            (índices k) e passavel(k) diz se a personagem pode atravessar
+            a sala k com segurança. Só as salas alcançáveis a partir dos
+            alvos são visitadas, e não o mundo inteiro.
+        """
+        if versao == self.versao:
+            return
+        self.versao = versao
+        N = self.N
+        distancias = {}
+        fila = deque()
+        for k in alvos:
+            for o in range(4):
+                distancias[k,o] = 0
+                fila.append((k,o))
+        while fila:
+            k,o = fila.popleft()
+            d = distancias[k,o]+1
+            # girando para a direita ("D") ou para a esquerda ("E") na sala k
+            for anterior in ((k,(o+1)%4),(k,(o-1)%4)):
+                if anterior not in distancias:
+                    distancias[anterior] = d
+                    fila.append(anterior)
+            # andando ("A") da sala de trás, na mesma orientação
+            i,j = divmod(k,N)
+            di,dj = orientacoes[o]
+            anterior = ((i-di)%N*N+(j-dj)%N,o)
+            if anterior not in distancias and passavel(anterior[0]):
+                distancias[anterior] = d
+                fila.append(anterior)
+        self.distancias = distancias
+
+    def proximaAcao(self,pos,ori):
+        """ Devolve a primeira ação ("A", "D" ou "E") de uma rota mais curta
+            da posição pos, com orientação ori, até algum alvo, ou None se
+            não houver rota conhecida (ou se a personagem já está no alvo).
+        """
+        N = self.N
+        k = pos[0]%N*N+pos[1]%N
+        o = orientacoes.index(tuple(ori))
+        d = self.distancias.get((k,o))
+        if not d:
+            return None
+        di,dj = orientacoes[o]
+        if self.distancias.get(((pos[0]+di)%N*N+(pos[1]+dj)%N,o)) == d-1:
+            return "A"
+        if self.distancias.get((k,(o-1)%4)) == d-1:
+            return "D"
+        return "E"
+
+
+class Fronteira:
+    """ Classe Fronteira: índice das salas alvo da exploração (por exemplo,
+        as salas seguras ainda não visitadas), atualizado sala a sala à
+        medida que o conhecimento muda, de modo que nunca é preciso
+        percorrer o mundo inteiro para encontrá-las. As rotas até elas
+        são do Planejador; aqui só se escolhe a mais próxima em linha reta
+        quando não há rota segura, o que é raro, e por isso é uma busca
+        simples pelo conjunto (que muda de ordem a cada passo).
+    """
+    def __init__(self,N,eAlvo):
+        """ Construtor: eAlvo(k) diz se a sala k (índice i*N+j) deve
+            estar na fronteira.
+        """
+        self.N = N
+        self.eAlvo = eAlvo
+        self.salas = set()
+
+    def atualize(self,k):
+        """ Reavalia a sala k, que teve o seu conhecimento alterado (pode
+            ser usada como observador de uma BaseConhecimento).
+        """
+        if self.eAlvo(k):
+            self.salas.add(k)
+        else:
+            self.salas.discard(k)
+
+    def maisProxima(self,pos):
+        """ Devolve a sala da fronteira mais próxima (no toro, sem contar
+            os giros; nos empates, a de menor índice) da posição pos, ou
+            None se a fronteira estiver vazia. Custa o tamanho da fronteira.
+        """
+        if not self.salas:
+            return None
+        N = self.N
+        oi,oj = pos[0]%N,pos[1]%N
+        def distancia(k):
+            i,j = divmod(k,N)
+            di,dj = abs(i-oi),abs(j-oj)
+            return min(di,N-di)+min(dj,N-dj),k
+        return min(self.salas,key=distancia)
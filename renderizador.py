@@ -0,0 +1,92 @@
+
+""" Módulo renderizador: desenha um tabuleiro NxN na tela para depuração.
+
+    Cada quadro é montado inteiro em um único buffer e escrito de uma vez
+    só (em vez de um print por sala). Quando a saída é um terminal, só as
+    salas que mudaram desde o quadro anterior são redesenhadas, usando as
+    sequências de escape ANSI de posicionamento do cursor; do contrário,
+    o quadro é escrito por inteiro, como texto comum.
+
+    Vários renderizadores podem dividir o mesmo terminal, cada um a
+    partir de uma linha diferente da tela (veja Renderizador.altura).
+"""
+
+import sys
+
+
+class Renderizador:
+    """ Classe Renderizador: mostra um tabuleiro NxN, com uma legenda de
+        uma linha acima dele. Cada sala ocupa largura caracteres (o texto
+        que não couber é cortado).
+    """
+    def __init__(self,N,titulo="",linha=1,largura=8,saida=None,diferencial=None):
+        """ Construtor: linha é a linha da tela (a partir de 1) onde o
+            quadro começa; se diferencial for None, só redesenha as salas
+            alteradas quando a saída for um terminal.
+        """
+        self.N = N
+        self.titulo = titulo
+        self.linha = linha
+        self.largura = largura
+        self.saida = sys.stdout if saida is None else saida
+        if diferencial is None:
+            diferencial = hasattr(self.saida,"isatty") and self.saida.isatty()
+        self.diferencial = diferencial
+        # salas e legenda do último quadro desenhado (None: nenhum ainda)
+        self.anterior = None
+        self.legenda = None
+
+    @staticmethod
+    def altura(N):
+        """ Número de linhas da tela ocupadas por um quadro NxN.
+        """
+        return 2*N+2
+
+    def sala(self,texto):
+        return texto[:self.largura].ljust(self.largura)+"| "
+
+    def desenhe(self,salas,legenda=""):
+        """ Desenha um quadro: salas é uma lista com o texto de cada uma
+            das N*N salas (indexadas por i*N+j).
+        """
+        N = self.N
+        buffer = []
+        if not self.diferencial:
+            buffer.append(self.titulo+" "+legenda if legenda else self.titulo)
+            buffer.append("\n")
+            for i in range(N):
+                buffer.extend(self.sala(salas[i*N+j]) for j in range(N))
+                buffer.append("\n"+"-"*((self.largura+2)*N+1)+"\n")
+        elif self.anterior is None:
+            # primeiro quadro: desenha tudo, limpando o resto de cada linha
+            buffer.append("\x1b[%d;1H%s %s\x1b[K" % (self.linha,self.titulo,legenda))
+            for i in range(N):
+                buffer.append("\x1b[%d;1H" % (self.linha+1+2*i))
+                buffer.extend(self.sala(salas[i*N+j]) for j in range(N))
+                buffer.append("\x1b[K\x1b[%d;1H%s\x1b[K" % (self.linha+2+2*i,"-"*((self.largura+2)*N+1)))
+            buffer.append("\x1b[%d;1H" % (self.linha+self.altura(N)))
+        else:
+            # quadros seguintes: só as salas (e a legenda) que mudaram
+            if legenda != self.legenda:
+                buffer.append("\x1b[%d;1H%s %s\x1b[K" % (self.linha,self.titulo,legenda))
+            anterior = self.anterior
+            for k in range(N*N):
+                if salas[k] != anterior[k]:
+                    i,j = divmod(k,N)
+                    buffer.append("\x1b[%d;%dH%s" % (self.linha+1+2*i,1+j*(self.largura+2),self.sala(salas[k])))
+            if buffer:
+                buffer.append("\x1b[%d;1H" % (self.linha+self.altura(N)))
+        self.anterior = list(salas)
+        self.legenda = legenda
+        if buffer:
+            self.saida.write("".join(buffer))
+            self.saida.flush()
+
+
+def marcador(orientacao):
+    """ Devolve o texto que indica uma personagem com a orientação dada
+        (como nos tabuleiros originais: "<X", "X>", "Xv" ou "X^").
+    """
+    if orientacao == [0,-1]:
+        return "<X"
+    return "X"+{ (0,1): ">", (1,0): "v", (-1,0): "^" }.get(tuple(orientacao),"")
@@ -0,0 +1,9 @@
+
+""" Configuração dos testes: os módulos do jogo ficam na raiz do
+    repositório, fora de qualquer pacote.
+"""
+
+import os
+import sys
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,68 @@
+
+""" Testes do analisador de mundos: os planos ótimos, jogados no
+    MundoDeWumpus, vencem exatamente no número de turnos previsto.
+"""
+
+import pytest
+
+import agentes
+from analisador import Analisador, solucaoOtima, hashMundo
+from gerador import geraMundo
+from mundo import MundoDeWumpus, LIVRE, VITORIA, WUMPUS
+
+
+class Roteiro(agentes.Agente):
+    """ Personagem que segue uma lista de ações dada.
+    """
+    def __init__(self,plano):
+        self.plano = list(plano)
+
+    def inicializa(self,N):
+        self.proxima = 0
+
+    def planejar(self,percepcao):
+        pass
+
+    def agir(self):
+        acao = self.plano[self.proxima]
+        self.proxima += 1
+        return acao
+
+
+@pytest.mark.parametrize("N,sementes",[(7,range(300)),(9,range(40))])
+def test_planos_otimos(N,sementes):
+    jogados = 0
+    for semente in sementes:
+        mundo = geraMundo(N,semente)
+        analise = solucaoOtima(mundo,N,plano=True)
+        if not analise.solucionavel():
+            continue
+        assert len(analise.plano) == analise.turnos
+        resultado = MundoDeWumpus(Roteiro(analise.plano),mundo=mundo,N=N,semente=semente,nDummies=0).jogue()
+        assert (resultado.desfecho,resultado.turnos) == (VITORIA,analise.turnos), semente
+        jogados += 1
+    assert jogados > len(sementes)//2
+
+
+def test_sem_wumpus_e_com_wumpus_demais():
+    N = 7
+    mundo = geraMundo(N,3)
+    assert mundo.count(WUMPUS) == 1
+    assert solucaoOtima(mundo,N,flechas=0).turnos is None
+    semWumpus = bytearray(LIVRE if sala == WUMPUS else sala for sala in mundo)
+    analise = solucaoOtima(semWumpus,N,plano=True)
+    assert (analise.turnos,analise.plano) == (0,[])
+
+
+def test_analisador_memoriza_e_grava(tmp_path):
+    arquivo = tmp_path/"analises.json"
+    analisador = Analisador(arquivo)
+    mundos = [ geraMundo(7,s) for s in range(5) ]
+    analises = [ analisador.analise(m) for m in mundos ]
+    assert analisador.analise(mundos[0]) is analises[0]
+    analisador.grave()
+    relido = Analisador(arquivo)
+    assert set(relido.analises) == { hashMundo(m,7) for m in mundos }
+    for m,a in zip(mundos,analises):
+        r = relido.analise(m)
+        assert (r.turnos,r.salas) == (a.turnos,a.salas)
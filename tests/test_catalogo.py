@@ -0,0 +1,79 @@
+
+""" Testes do catálogo de personagens (busca, arquivos com erro e
+    importação sob demanda).
+"""
+
+import os
+import sys
+
+import pytest
+
+import catalogo
+from catalogo import Catalogo, CONTRATO_MODULO, CONTRATO_OBJETOS
+
+arquivos = {
+    "personagemCatModulo.py": b"def inicializa(N): pass\ndef planejar(p): pass\ndef agir(): return 'A'\n",
+    "personagemCatObjetos.py": b"import agentes\nclass Agente(agentes.Agente):\n    pass\n",
+    "personagemCatSintaxe.py": b"def inicializa(N:\n",
+    "personagemCatCodificacao.py": b"def agir(): return '\xff'\n",
+    "personagemCatNulo.py": b"def agir(): pass\n\x00\n",
+    "personagemCatNada.py": b"x = 1\n",
+    "outroCat.py": b"def inicializa(N): pass\ndef planejar(p): pass\ndef agir(): pass\n",
+}
+
+
+@pytest.fixture
+def diretorio(tmp_path):
+    for arquivo,conteudo in arquivos.items():
+        (tmp_path/arquivo).write_bytes(conteudo)
+    # um diretório com nome de personagem não pode ser lido (OSError)
+    (tmp_path/"personagemCatPasta.py").mkdir()
+    yield tmp_path
+    for arquivo in arquivos:
+        sys.modules.pop(arquivo[:-3],None)
+
+
+def test_busca_com_arquivos_com_erro(diretorio):
+    c = Catalogo([str(diretorio)],pontosDeEntrada=False)
+    assert c.nomes() == ["CatCodificacao","CatModulo","CatNulo","CatObjetos","CatPasta","CatSintaxe"]
+    assert c.entrada("CatModulo").contrato == CONTRATO_MODULO
+    assert c.entrada("personagemCatObjetos").contrato == CONTRATO_OBJETOS
+    # os arquivos com erro ficam no catálogo, com o contrato desconhecido
+    for nome in ("CatCodificacao","CatNulo","CatPasta","CatSintaxe"):
+        assert c.entrada(nome).contrato is None
+    with pytest.raises(SyntaxError):
+        c.carregue("CatSintaxe")
+    # e não impedem a carga das outras personagens
+    assert c.carregue("CatModulo").agir() == "A"
+
+
+def test_importacao_sob_demanda(diretorio):
+    c = Catalogo([str(diretorio)],pontosDeEntrada=False)
+    entrada = c.entrada("CatObjetos")
+    assert entrada.carregado is None
+    assert "personagemCatObjetos" not in sys.modules
+    modulo = c.carregue("CatObjetos")
+    assert entrada.carregado is modulo
+    assert sys.modules["personagemCatObjetos"] is modulo
+    assert c.carregue(entrada) is modulo
+
+
+def test_arquivo_do_catalogo(diretorio,tmp_path_factory,monkeypatch):
+    dados = tmp_path_factory.mktemp("dados")/"catalogo.json"
+    c = Catalogo([str(diretorio)],arquivo=str(dados),pontosDeEntrada=False)
+    c.grave()
+    lidos = []
+    original = catalogo.contratoDoArquivo
+    monkeypatch.setattr(catalogo,"contratoDoArquivo",lambda caminho: lidos.append(caminho) or original(caminho))
+    relido = Catalogo([str(diretorio)],arquivo=str(dados),pontosDeEntrada=False)
+    assert relido.nomes() == c.nomes()
+    # só o arquivo que não é personagem (e não é guardado) é lido de novo
+    assert [ os.path.basename(caminho) for caminho in lidos ] == ["personagemCatNada.py"]
+    del lidos[:]
+    # só o arquivo modificado é lido de novo
+    modificado = diretorio/"personagemCatSintaxe.py"
+    modificado.write_bytes(arquivos["personagemCatModulo.py"])
+    os.utime(modificado,(1,1))
+    outro = Catalogo([str(diretorio)],arquivo=str(dados),pontosDeEntrada=False)
+    assert outro.entrada("CatSintaxe").contrato == CONTRATO_MODULO
+    assert sorted(os.path.basename(caminho) for caminho in lidos) == ["personagemCatNada.py","personagemCatSintaxe.py"]
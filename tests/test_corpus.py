@@ -0,0 +1,55 @@
+
+""" Testes do corpus de mundos (EscritorCorpus e Corpus).
+"""
+
+import pytest
+
+from corpus import Corpus, EscritorCorpus, geraCorpus
+from gerador import geraMundo
+from mundo import WUMPUS
+
+
+def test_ida_e_volta(tmp_path):
+    caminho = tmp_path/"mundos.wcrp"
+    mundos = [ (geraMundo(N,s,nWumpus=1+s%3),N) for s,N in enumerate((5,8,12,7)) ]
+    with EscritorCorpus(caminho) as escritor:
+        for mundo,N in mundos:
+            escritor.acrescente(mundo,N)
+    with Corpus(caminho) as corpus:
+        assert len(corpus) == len(mundos)
+        for k,(mundo,N) in enumerate(mundos):
+            assert corpus[k] == mundo
+            assert corpus.N(k) == N
+            assert corpus.nWumpus(k) == mundo.count(WUMPUS)
+        assert list(corpus) == [ mundo for mundo,N in mundos ]
+
+
+def test_copia_independente(tmp_path):
+    caminho = tmp_path/"mundos.wcrp"
+    geraCorpus(caminho,3,6)
+    with Corpus(caminho) as corpus:
+        mundo = corpus[1]
+        mundo[0] = WUMPUS if mundo[0] != WUMPUS else 0
+        assert corpus[1] == geraMundo(6,1)
+
+
+def test_indices_invalidos(tmp_path):
+    caminho = tmp_path/"mundos.wcrp"
+    geraCorpus(caminho,2,5)
+    with Corpus(caminho) as corpus:
+        for k in (-1,2):
+            with pytest.raises(IndexError):
+                corpus[k]
+
+
+def test_mundo_de_tamanho_errado(tmp_path):
+    with EscritorCorpus(tmp_path/"mundos.wcrp") as escritor:
+        with pytest.raises(ValueError):
+            escritor.acrescente(bytearray(10),3)
+
+
+def test_arquivo_que_nao_e_corpus(tmp_path):
+    caminho = tmp_path/"outro.bin"
+    caminho.write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        Corpus(caminho)
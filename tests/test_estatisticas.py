@@ -0,0 +1,87 @@
+
+""" Testes das estatísticas mescláveis (Momentos e Agregador).
+"""
+
+from random import Random
+
+import pytest
+
+from estatisticas import Agregador, Momentos
+from mundo import Resultado, VITORIA, desfechos
+
+
+def resultados(quantidade,semente=0):
+    aleatorio = Random(semente)
+    lista = []
+    for i in range(quantidade):
+        r = Resultado("teste",aleatorio.randrange(len(desfechos)),aleatorio.randint(1,5000),0,
+                      aleatorio.randint(0,3),aleatorio.randint(0,20))
+        if i%3 == 0:
+            r.otimo = r.turnos//2
+        lista.append(r)
+    return lista
+
+
+def partes(lista,cortes):
+    inicio = 0
+    for fim in cortes+[len(lista)]:
+        yield lista[inicio:fim]
+        inicio = fim
+
+
+@pytest.mark.parametrize("cortes",[[0],[1],[10,11,500],[250,800]])
+def test_momentos_mesclados(cortes):
+    valores = [ r.turnos for r in resultados(1000) ]
+    inteiro = Momentos()
+    for x in valores:
+        inteiro.registre(x)
+    mesclado = Momentos()
+    for parte in partes(valores,cortes):
+        m = Momentos()
+        for x in parte:
+            m.registre(x)
+        mesclado.mescle(m)
+    assert mesclado.n == inteiro.n
+    assert mesclado.media == pytest.approx(inteiro.media,rel=1e-12)
+    assert mesclado.variancia() == pytest.approx(inteiro.variancia(),rel=1e-9)
+
+
+def test_momentos_vazios():
+    m = Momentos()
+    m.mescle(Momentos())
+    assert (m.n,m.media,m.variancia()) == (0,0.0,0.0)
+
+
+@pytest.mark.parametrize("cortes",[[0],[333],[100,101,700]])
+def test_agregador_mesclado(cortes):
+    lista = resultados(1000,1)
+    inteiro = Agregador()
+    for r in lista:
+        inteiro.registre(r)
+    mesclado = Agregador()
+    for parte in partes(lista,cortes):
+        a = Agregador()
+        for r in parte:
+            a.registre(r)
+        mesclado.mescle(a)
+    assert mesclado.desfechos == inteiro.desfechos
+    assert mesclado.partidas() == inteiro.partidas() == len(lista)
+    assert mesclado.quantisTurnos.contagens == inteiro.quantisTurnos.contagens
+    assert mesclado.excesso.n == inteiro.excesso.n
+    resumo,esperado = mesclado.resumo(),inteiro.resumo()
+    for nome in ("turnos","flechasUsadas","compartilhamentos","excesso"):
+        assert resumo[nome]["media"] == pytest.approx(esperado[nome]["media"],rel=1e-12)
+        assert resumo[nome]["desvio"] == pytest.approx(esperado[nome]["desvio"],rel=1e-9)
+    assert (resumo["turnos"]["p50"],resumo["turnos"]["p99"]) == (esperado["turnos"]["p50"],esperado["turnos"]["p99"])
+    assert resumo[desfechos[VITORIA]] == esperado[desfechos[VITORIA]]
+
+
+def test_quantis_dos_turnos():
+    a = Agregador()
+    for r in resultados(1000,2):
+        a.registre(r)
+    turnos = sorted(r.turnos for r in resultados(1000,2))
+    # o quantil é o topo de uma faixa de ~19% (e nunca passa do máximo)
+    for q in (0.5,0.99):
+        exato = turnos[int(q*len(turnos))-1]
+        assert exato <= a.quantisTurnos.quantil(q) <= min(turnos[-1],exato*2**0.25+1)
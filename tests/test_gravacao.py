@@ -0,0 +1,87 @@
+
+""" Testes da gravação de partidas (Gravador e Leitor).
+"""
+
+import pytest
+
+import agentes
+from gerador import geraMundo
+from gravacao import Gravador, Leitor
+from mundo import MundoDeWumpus
+
+
+class Andarilha(agentes.Agente):
+    """ Personagem que anda em frente e vira à direita quando bate.
+    """
+    def inicializa(self,N):
+        pass
+
+    def planejar(self,percepcao):
+        self.percepcao = percepcao
+
+    def agir(self):
+        return "D" if "I" in self.percepcao else "A"
+
+
+class Copiadora(Gravador):
+    """ Gravador que também guarda os registros em uma lista.
+    """
+    def __init__(self,arquivo):
+        super().__init__(arquivo)
+        self.registros = []
+
+    def registre(self,*args):
+        turno,personagem,percepcao,acao,posicao,orientacao = args
+        self.registros.append((turno,personagem,percepcao,acao,*posicao,*orientacao))
+        super().registre(*args)
+
+
+def grave(caminho,semente,N=8):
+    mundo = geraMundo(N,semente)
+    inicial = bytearray(mundo)
+    with Copiadora(caminho) as gravador:
+        MundoDeWumpus([Andarilha(),Andarilha()],mundo=mundo,N=N,semente=semente,
+                      maxTurnos=200,nDummies=2,gravador=gravador).jogue()
+    return inicial,gravador.registros
+
+
+def test_ida_e_volta(tmp_path):
+    caminho = tmp_path/"partida.wgrv"
+    inicial,registros = grave(caminho,7)
+    assert registros
+    with Leitor(caminho) as leitor:
+        assert leitor.N == 8
+        assert leitor.semente == 7
+        assert leitor.mundo() == inicial
+        assert len(leitor) == len(registros)
+        assert list(leitor) == registros
+        assert [ leitor[r] for r in range(len(leitor)) ] == registros
+        assert leitor.turnos() == registros[-1][0]+1
+
+
+def test_busca_por_turno(tmp_path):
+    caminho = tmp_path/"partida.wgrv"
+    inicial,registros = grave(caminho,11)
+    with Leitor(caminho) as leitor:
+        for turno in range(leitor.turnos()+2):
+            esperado = next((r for r,reg in enumerate(registros) if reg[0] >= turno),len(registros))
+            assert leitor.procure(turno) == esperado
+            assert leitor.turno(turno) == [ reg for reg in registros if reg[0] == turno ]
+
+
+def test_sem_semente(tmp_path):
+    caminho = tmp_path/"partida.wgrv"
+    with Gravador(caminho) as gravador:
+        MundoDeWumpus(Andarilha(),maxTurnos=5,gravador=gravador).jogue()
+    with Leitor(caminho) as leitor:
+        assert leitor.semente is None
+
+
+@pytest.mark.parametrize("semente",["abc",1<<63,-3,2.5])
+def test_semente_que_nao_cabe(tmp_path,semente):
+    caminho = tmp_path/"partida.wgrv"
+    with Gravador(caminho) as gravador:
+        with pytest.raises(ValueError,match="semente"):
+            MundoDeWumpus(Andarilha(),semente=semente,gravador=gravador)
+    # a semente é recusada antes de qualquer coisa ser gravada
+    assert caminho.read_bytes() == b""
@@ -0,0 +1,105 @@
+
+""" Testes do Hospedeiro (personagens em processos trabalhadores).
+"""
+
+import asyncio
+
+import pytest
+
+import agentes
+from catalogo import catalogoPadrao
+from gerador import geraMundo
+from hospedeiro import Hospedeiro
+from mundo import MundoDeWumpus, TRAVADA
+
+
+class Falha(agentes.Agente):
+    """ Personagem que tem um erro na primeira ação.
+    """
+    def inicializa(self,N):
+        pass
+
+    def planejar(self,percepcao):
+        pass
+
+    def agir(self):
+        raise RuntimeError("falha proposital")
+
+
+class Vazia(Falha):
+    """ Personagem que só devolve planos vazios.
+    """
+    def agir(self):
+        return ""
+
+
+# os trabalhadores são criados (por fork) depois do registro
+catalogoPadrao().registre("teste-falha",Falha)
+catalogoPadrao().registre("teste-vazia",Vazia)
+
+
+def partida(semente,modulos):
+    return dict(modulo=modulos,mundo=geraMundo(8,semente),N=8,semente=semente)
+
+
+def jogueComPrazo(hospedeiro,partidas,simultaneas=None):
+    """ jogueTodas, mas falha em vez de esperar para sempre.
+    """
+    return asyncio.run(asyncio.wait_for(hospedeiro.jogueVarias(partidas,simultaneas),60))
+
+
+def test_partida_com_mais_personagens_que_processos():
+    with Hospedeiro(processos=2) as hospedeiro:
+        with pytest.raises(ValueError):
+            jogueComPrazo(hospedeiro,[partida(0,["10736987"]*3)])
+        assert hospedeiro.criados == 0
+
+
+def test_partidas_de_varias_personagens_como_no_mundo():
+    partidas = [ partida(semente,["10736987"]*2) for semente in range(6) ]
+    with Hospedeiro(processos=3) as hospedeiro:
+        resultados = jogueComPrazo(hospedeiro,partidas)
+        assert hospedeiro.criados <= 3
+    locais = [ MundoDeWumpus(**partida(semente,["10736987"]*2)).jogue() for semente in range(6) ]
+    assert [ (r.desfecho,r.turnos) for r in resultados ] == [ (r.desfecho,r.turnos) for r in locais ]
+
+
+def test_falha_devolve_os_trabalhadores_saudaveis():
+    with Hospedeiro(processos=2) as hospedeiro:
+        resultado, = jogueComPrazo(hospedeiro,[partida(0,["10736987","teste-falha"])])
+        assert resultado.desfecho == TRAVADA
+        assert "falha proposital" in resultado.falha
+        # só o trabalhador da personagem que falhou é substituído
+        assert hospedeiro.criados == 1 and len(hospedeiro.livres) == 1
+        resultado, = jogueComPrazo(hospedeiro,[partida(0,["10736987"]*2)])
+        assert resultado.desfecho != TRAVADA
+
+
+def test_erro_inesperado_nao_deixa_trabalhadores_presos():
+    with Hospedeiro(processos=2) as hospedeiro:
+        with pytest.raises(TypeError):
+            jogueComPrazo(hospedeiro,[dict(partida(0,["10736987"]*2),parametroInexistente=1)])
+        assert hospedeiro.criados == 0 and not hospedeiro.livres
+        resultado, = jogueComPrazo(hospedeiro,[partida(0,["10736987"]*2)])
+        assert resultado.desfecho != TRAVADA
+
+
+def test_plano_vazio_conta_como_acao_inviavel():
+    with Hospedeiro(processos=1) as hospedeiro:
+        resultado, = jogueComPrazo(hospedeiro,[partida(0,"teste-vazia")])
+        assert resultado.desfecho == TRAVADA
+        assert not getattr(resultado,"falha",None)
+        assert hospedeiro.criados == 1 and len(hospedeiro.livres) == 1
+
+
+def test_jogue_sem_jogue_varias():
+    with Hospedeiro(processos=2) as hospedeiro:
+        # duas partidas, cada uma no seu próprio laço de eventos
+        for semente in (0,1):
+            resultado = asyncio.run(asyncio.wait_for(hospedeiro.jogue(**partida(semente,["10736987"]*2)),60))
+            local = MundoDeWumpus(**partida(semente,["10736987"]*2)).jogue()
+            assert (resultado.desfecho,resultado.turnos) == (local.desfecho,local.turnos)
+        assert len(hospedeiro.livres) == 2
+        # e depois várias partidas que esperam umas pelos trabalhadores das outras
+        resultados = jogueComPrazo(hospedeiro,[ partida(semente,["10736987"]*2) for semente in range(3) ])
+        assert len(resultados) == 3 and hospedeiro.criados == 2
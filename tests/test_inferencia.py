@@ -0,0 +1,42 @@
+
+""" Testes da inferência de poços e Wumpus.
+"""
+
+from conhecimento import BaseConhecimento, P
+from inferencia import Inferencia
+import personagem10736987
+
+
+def test_observacoes_repetidas_nao_acumulam_restricoes():
+    inferencia = Inferencia(5,0.2)
+    for vez in range(100):
+        inferencia.observe((1,5,7,11),True)
+        inferencia.certeza(3)
+    assert len(inferencia.restricoes) == 2
+    assert inferencia.probabilidade(3) == 1.0
+
+
+def test_restricoes_iguais_depois_de_sala_segura():
+    inferencia = Inferencia(5,0.2)
+    inferencia.observe((1,2),True)
+    inferencia.observe((1,2,3),True)
+    inferencia.segura(3)
+    # as duas restrições viraram {1,2}: só uma é guardada
+    assert list(inferencia.restricoes.values()) == [frozenset((1,2))]
+    assert abs(inferencia.probabilidade(1)-0.2/(1-0.8**2)) < 1e-12
+    inferencia.segura(1)
+    assert inferencia.probabilidade(2) == 1.0
+
+
+def test_personagem_com_percepcoes_iguais_mantem_restricoes():
+    agente = personagem10736987.Agente()
+    agente.nFlechas = 1
+    agente.mundoCompartilhado = BaseConhecimento(6)
+    agente.inicializa(6)
+    # outra personagem viu um poço ao lado da sala inicial
+    agente.mundoCompartilhado.marque(1,0,P)
+    agente.planejar(["B"])
+    contagem = (len(agente.pocos.restricoes),len(agente.wumpus.restricoes))
+    for vez in range(200):
+        agente.planejar(["B"])
+    assert (len(agente.pocos.restricoes),len(agente.wumpus.restricoes)) == contagem
@@ -0,0 +1,62 @@
+
+""" Testes dos instantâneos do MundoDeWumpus (salve e restaure).
+"""
+
+import agentes
+from gerador import geraMundo
+from mundo import MundoDeWumpus
+
+
+class Reflexo(agentes.Agente):
+    """ Personagem cuja ação só depende da percepção do turno (de modo
+        que, restaurado o mundo, ela repete exatamente as mesmas ações),
+        e que anota todas as percepções.
+    """
+    def inicializa(self,N):
+        self.percepcoes = []
+
+    def planejar(self,percepcao):
+        self.percepcao = percepcao
+        self.percepcoes.append(tuple(percepcao))
+
+    def agir(self):
+        if "I" in self.percepcao:
+            return "D"
+        if len(self.percepcao) > 1 and self.percepcao[-1] not in "FBIU":
+            return "C"
+        return "E" if "B" in self.percepcao else "A"
+
+
+def fotografia(mundo):
+    """ Tudo o que o instantâneo deve guardar, em uma forma comparável.
+    """
+    personagens = [ (tuple(p.posicao),tuple(p.orientacao),p.nFlechas,p.estaviva,p.causa,p.compartilhamentos,
+                     p.invalidas,dict((id(o),v) for o,v in p.sincronizado.items()))
+                    for p in mundo.personagens ]
+    mapas = [ (list(o.alteracoes),dict(o.mapa)) for o in mundo.personagens+mundo.dummies ]
+    return (bytes(mundo.mundo),bytes(mundo.fedor),mundo.nWumpus,mundo.versao,mundo.turnos,mundo.travada,
+            [ (k,[ id(o) for o in lista ]) for k,lista in mundo.ocupantes.items() ],
+            personagens,[ tuple(d.posicao) for d in mundo.dummies ],mapas,mundo.aleatorio.getstate())
+
+
+def test_restaure_volta_ao_estado_salvo_e_repete_a_partida():
+    mundo = MundoDeWumpus(modulo=[Reflexo() for n in range(4)],mundo=geraMundo(6,3,pocos=0.05),N=6,semente=3,
+                          nDummies=3,maxRepeticoes=None)
+    for turno in range(10):
+        mundo.passo()
+    instantaneo = mundo.salve()
+    antes = fotografia(mundo)
+    inicio = [ len(p.agente.percepcoes) for p in mundo.personagens ]
+    for turno in range(40):
+        if not mundo.terminou():
+            mundo.passo()
+    depois = fotografia(mundo)
+    originais = [ p.agente.percepcoes[n:] for p,n in zip(mundo.personagens,inicio) ]
+    mundo.restaure(instantaneo)
+    assert fotografia(mundo) == antes
+    # a mesma partida, de novo a partir do instantâneo
+    for turno in range(40):
+        if not mundo.terminou():
+            mundo.passo()
+    assert fotografia(mundo) == depois
+    assert [ p.agente.percepcoes[n+len(o):] for p,n,o in zip(mundo.personagens,inicio,originais) ] == originais
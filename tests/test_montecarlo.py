@@ -0,0 +1,48 @@
+
+""" Testes do pool de processos do planejador de Monte Carlo.
+"""
+
+from multiprocessing import Pool
+
+from conhecimento import BaseConhecimento
+from montecarlo import PlanejadorMonteCarlo, acoesModelo
+import personagem10736987
+
+
+def personagem(N=7):
+    agente = personagem10736987.Agente()
+    agente.nFlechas = 1
+    agente.mundoCompartilhado = BaseConhecimento(N)
+    agente.inicializa(N)
+    agente.planejar([])
+    return agente
+
+
+def decidaEmDaemon(processos):
+    """ Roda em um processo do pool (que é daemon).
+    """
+    planejador = PlanejadorMonteCarlo(0.01,processos=processos,semente=1)
+    acao = planejador.decida(personagem())
+    return planejador.processos,planejador.pool,acao
+
+
+def test_pool_proprio_e_feche():
+    with PlanejadorMonteCarlo(0.02,processos=2,semente=1) as planejador:
+        assert planejador.pool is None
+        assert planejador.decida(personagem()) in acoesModelo
+        pool = planejador.pool
+        assert pool is not None
+    assert planejador.pool is None
+    # fechar de novo não faz nada, e o planejador cria outro pool se preciso
+    planejador.feche()
+    assert planejador.decida(personagem()) in acoesModelo
+    assert planejador.pool is not None and planejador.pool is not pool
+    planejador.feche()
+
+
+def test_dentro_de_processo_daemon():
+    with Pool(1) as pool:
+        processos,poolInterno,acao = pool.apply(decidaEmDaemon,(2,))
+    assert processos is None
+    assert poolInterno is None
+    assert acao in acoesModelo
@@ -0,0 +1,91 @@
+
+""" Testes do MundoDeWumpus com várias personagens.
+"""
+
+import agentes
+from gerador import geraMundo
+from mundo import MundoDeWumpus, TRAVADA
+
+
+class Giradora(agentes.Agente):
+    """ Personagem que só gira; na primeira tentativa de cada turno,
+        tenta compartilhar (o que é inviável se estiver sozinha).
+    """
+    def inicializa(self,N):
+        self.tentou = False
+
+    def planejar(self,percepcao):
+        self.tentou = False
+
+    def agir(self):
+        if not self.tentou:
+            self.tentou = True
+            return "C"
+        return "D"
+
+
+def test_varias_personagens_terminam_sem_travar():
+    for semente in range(5):
+        mundo = MundoDeWumpus(modulo="10736987",mundo=geraMundo(12,semente),N=12,semente=semente,
+                              nPersonagens=8,nDummies=3)
+        resultado = mundo.jogue()
+        assert resultado.desfecho != TRAVADA, (semente,resultado)
+
+
+def test_compartilhamento_entre_personagens():
+    mundo = MundoDeWumpus(modulo=[Giradora(),Giradora()],mundo=geraMundo(8,1),N=8,semente=1,nDummies=0)
+    primeira,segunda = mundo.personagens
+    inicio = tuple(segunda.posicao)
+    mundo.mova(segunda,*primeira.posicao)
+    assert mundo.aplique(primeira,0,"C")
+    # a sala inicial da segunda personagem chega ao mundo compartilhado da primeira
+    assert primeira.agente.mundoCompartilhado.rotulos(*primeira.referencial(*inicio)) == ["L"]
+    assert primeira.compartilhamentos == 1
+
+
+def test_acoes_inviaveis_contadas_por_personagem():
+    mundo = MundoDeWumpus(modulo=[Giradora(),Giradora()],mundo=geraMundo(8,1),N=8,semente=1,
+                          nDummies=0,maxInvalidas=6)
+    for turno in range(4):
+        mundo.passo()
+    assert not mundo.travada
+    assert [ p.invalidas for p in mundo.personagens ] == [4,4]
+    for turno in range(3):
+        mundo.passo()
+    assert mundo.travada
+
+
+class Parada(agentes.Agente):
+    """ Personagem que só gira no lugar.
+    """
+    def inicializa(self,N):
+        pass
+
+    def planejar(self,percepcao):
+        pass
+
+    def agir(self):
+        return "D"
+
+
+def test_ciclo_sem_progresso_trava():
+    mundo = MundoDeWumpus(modulo=Parada(),mundo=geraMundo(8,1),N=8,semente=1,nDummies=0)
+    resultado = mundo.jogue()
+    assert resultado.desfecho == TRAVADA
+    assert resultado.turnos <= 4*(mundo.maxRepeticoes+1)
+
+
+def test_repeticoes_contadas_desde_a_ultima_sala_nova():
+    mundo = MundoDeWumpus(modulo=Parada(),mundo=geraMundo(8,1),N=8,semente=1,nDummies=0,maxRepeticoes=3)
+    personagem = mundo.personagemNUSP
+    for vez in range(3):
+        mundo.verificaTravamento()
+    assert not mundo.travada
+    # a personagem conhece uma sala nova: as repetições voltam a zero
+    k = personagem.posicao[0]*8+(personagem.posicao[1]+1)%8
+    personagem.descubra(k,mundo.mundo[k])
+    for vez in range(3):
+        mundo.verificaTravamento()
+    assert not mundo.travada
+    mundo.verificaTravamento()
+    assert mundo.travada
@@ -0,0 +1,63 @@
+
+""" Testes dos planos (agentes.Plano) devolvidos por agir.
+"""
+
+import pytest
+
+import agentes
+from agentes import Plano
+from gerador import geraMundo
+from mundo import MundoDeWumpus, TRAVADA
+
+
+class Repetidora(agentes.Agente):
+    """ Personagem que devolve as respostas dadas, em ordem, e depois
+        repete a última.
+    """
+    def __init__(self,*respostas):
+        self.respostas = list(respostas)
+
+    def inicializa(self,N):
+        pass
+
+    def planejar(self,percepcao):
+        pass
+
+    def agir(self):
+        if len(self.respostas) > 1:
+            return self.respostas.pop(0)
+        return self.respostas[0]
+
+
+@pytest.mark.parametrize("resposta,acao",[("A","A"),("X","X"),(None,None),(3,3)])
+def test_resposta_com_uma_acao(resposta,acao):
+    assert agentes.interpreteResposta(resposta) == (acao,None)
+
+
+@pytest.mark.parametrize("resposta",["","AD",["A","D"],("A",),Plano("")])
+def test_resposta_com_um_plano(resposta):
+    acao,plano = agentes.interpreteResposta(resposta)
+    assert acao is None and isinstance(plano,Plano)
+    assert list(plano.acoes) == list(resposta.acoes if isinstance(resposta,Plano) else resposta)
+    if isinstance(resposta,Plano):
+        assert plano is resposta
+
+
+@pytest.mark.parametrize("resposta",["",[],(),Plano(""),"X",None,Plano("?A")])
+def test_resposta_invalida_conta_como_acao_inviavel(resposta):
+    mundo = MundoDeWumpus(modulo=Repetidora(resposta),mundo=geraMundo(8,1),N=8,semente=1,maxInvalidas=10)
+    resultado = mundo.jogue()
+    assert resultado.desfecho == TRAVADA
+    assert mundo.personagemNUSP.invalidas == 11
+
+
+def test_acao_invalida_interrompe_o_plano():
+    mundo = MundoDeWumpus(modulo=Repetidora(Plano("DXD",0),"E"),mundo=geraMundo(8,1),N=8,semente=1,nDummies=0)
+    personagem = mundo.personagemNUSP
+    mundo.passo()
+    assert personagem.plano is not None and personagem.plano.executadas == 1
+    # a segunda ação do plano é inviável: a personagem é chamada de novo
+    mundo.passo()
+    assert personagem.plano is None
+    assert personagem.invalidas == 1
+    assert personagem.orientacao == [0,1]
@@ -0,0 +1,182 @@
+
+""" TORNEIO DO MUNDO DE WUMPUS
+
+    Localiza todas as personagens do catálogo (os módulos personagem*.py
+    e as instaladas como pacotes, veja catalogo.py) e faz cada uma jogar
+    o mesmo conjunto de mundos sorteados (a partir de sementes), ou
+    os mundos de um corpus (veja corpus.py), de modo que as
+    personagens possam ser comparadas entre si. As partidas
+    são distribuídas entre vários processos (por padrão, um por núcleo);
+    cada processo resume as suas partidas em um Agregador por personagem
+    (veja estatisticas.py), e os agregadores são mesclados no final.
+
+    Uso:
+        python3 torneio.py [-p PARTIDAS] [-n N] [-s SEMENTE] [-j PROCESSOS] [-c CORPUS] [-o]
+"""
+
+import os
+from contextlib import redirect_stdout
+from multiprocessing import Pool
+
+from mundo import MundoDeWumpus, VITORIA, QUEDA, DEVORADA, TRAVADA
+from estatisticas import Agregador
+from gerador import geraMundo
+from corpus import Corpus
+from analisador import Analisador
+from catalogo import catalogoPadrao
+
+
+def localizaPersonagens():
+    """ Devolve os nomes de todas as personagens do catálogo padrão, em
+        ordem alfabética. O catálogo é varrido antes de o pool ser criado,
+        de modo que os processos do pool já o recebem pronto.
+    """
+    return catalogoPadrao().nomes()
+
+
+# corpus já abertos neste processo (arquivo -> Corpus)
+corpora = {}
+# análises dos mundos já jogados neste processo
+analisador = Analisador()
+
+
+def jogaPartida(tarefa):
+    """ Joga uma partida, dentro de um processo do pool. A tarefa é
+        uma tupla (modulo, N, semente, corpus, otimo): o mundo é sorteado
+        a partir da semente ou, se corpus for o nome de um arquivo de
+        corpus, é o mundo de índice semente desse corpus; assim todas
+        as personagens enfrentam os mesmos mundos. Tudo o que a
+        personagem imprimir é descartado. Se otimo for True, o mundo é
+        analisado antes (veja analisador.py): mundos sem solução não são
+        jogados (o Resultado é None), e o Resultado traz o ótimo.
+    """
+    modulo,N,semente,corpus,otimo = tarefa
+    if corpus is None:
+        mundo = geraMundo(N,semente)
+    else:
+        if corpus not in corpora:
+            corpora[corpus] = Corpus(corpus)
+        mundo = corpora[corpus][semente]
+        N = corpora[corpus].N(semente)
+    if otimo:
+        analise = analisador.analise(mundo,N)
+        if not analise.solucionavel():
+            return modulo,None
+    with open(os.devnull,"w") as nulo, redirect_stdout(nulo):
+        resultado = MundoDeWumpus(modulo=modulo,mundo=mundo,N=N,semente=semente).jogue()
+    if otimo:
+        resultado.otimo = analise.turnos
+    return modulo,resultado
+
+
+def jogaLote(tarefas):
+    """ Joga um lote de partidas, dentro de um processo do pool, e
+        devolve um dicionário modulo -> Agregador com os seus resultados
+        (em vez de um Resultado por partida).
+    """
+    agregadores = {}
+    for tarefa in tarefas:
+        modulo,resultado = jogaPartida(tarefa)
+        if resultado is None:
+            continue
+        if modulo not in agregadores:
+            agregadores[modulo] = Agregador()
+        agregadores[modulo].registre(resultado)
+    return agregadores
+
+
+class Placar:
+    """ Classe Placar: acumula os resultados de uma personagem ao
+        longo do torneio, em um Agregador.
+    """
+    def __init__(self,nome):
+        self.nome = nome
+        self.estatisticas = Agregador()
+
+    def registra(self,resultado):
+        """ Soma o Resultado de uma partida ao placar.
+        """
+        self.estatisticas.registre(resultado)
+
+    def mescla(self,agregador):
+        """ Soma ao placar as partidas resumidas em um Agregador.
+        """
+        self.estatisticas.mescle(agregador)
+
+    @property
+    def partidas(self):
+        return self.estatisticas.partidas()
+
+    @property
+    def vitorias(self):
+        return self.estatisticas.desfechos[VITORIA]
+
+    @property
+    def quedas(self):
+        return self.estatisticas.desfechos[QUEDA]
+
+    @property
+    def devoradas(self):
+        return self.estatisticas.desfechos[DEVORADA]
+
+    @property
+    def travadas(self):
+        return self.estatisticas.desfechos[TRAVADA]
+
+    def taxaVitorias(self):
+        return self.vitorias/self.partidas if self.partidas else 0.0
+
+    def mediaTurnos(self):
+        return self.estatisticas.turnos.media
+
+    def __str__(self):
+        return "%-20s %8d %8.1f%% %10.1f %8d %8d %8d" % (self.nome,self.partidas,
+                100*self.taxaVitorias(),self.mediaTurnos(),self.quedas,self.devoradas,self.travadas)
+
+
+def torneio(modulos=None,partidas=100,N=5,semente=0,processos=None,corpus=None,otimo=False):
+    """ Faz cada módulo de personagem jogar as mesmas partidas (mundos
+        NxN sorteados com as sementes semente, semente+1, ...) usando
+        um pool de processos, e devolve um dicionário modulo -> Placar.
+        Se for dado um arquivo de corpus, as partidas usam os mundos
+        semente, semente+1, ... do corpus (até o seu final). Com otimo,
+        os mundos sem solução são pulados e os placares mostram quantos
+        turnos as personagens gastam acima do ótimo.
+    """
+    if modulos is None:
+        modulos = localizaPersonagens()
+    if corpus is not None:
+        with Corpus(corpus) as c:
+            partidas = max(0,min(partidas,len(c)-semente))
+    placares = { modulo: Placar(catalogoPadrao().entrada(modulo).nome) for modulo in modulos }
+    tarefas = [ (modulo,N,s,corpus,otimo) for s in range(semente,semente+partidas) for modulo in modulos ]
+    with Pool(processos) as pool:
+        # várias partidas por lote, para diluir o custo da comunicação
+        lote = max(1,len(tarefas)//(4*(processos or os.cpu_count() or 1)))
+        lotes = [ tarefas[i:i+lote] for i in range(0,len(tarefas),lote) ]
+        for agregadores in pool.imap_unordered(jogaLote,lotes):
+            for modulo,agregador in agregadores.items():
+                placares[modulo].mescla(agregador)
+    return placares
+
+
+def imprimePlacares(placares):
+    print("%-20s %8s %9s %10s %8s %8s %8s" % ("personagem","partidas","vitórias","turnos","poço","Wumpus","travadas"))
+    for placar in sorted(placares.values(),key=Placar.taxaVitorias,reverse=True):
+        print(placar)
+    print()
+    for placar in sorted(placares.values(),key=Placar.taxaVitorias,reverse=True):
+        print("%s: %s" % (placar.nome,placar.estatisticas))
+
+
+if __name__=="__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Torneio entre as personagens do Mundo de Wumpus")
+    parser.add_argument("-p","--partidas",type=int,default=100,help="número de mundos sorteados")
+    parser.add_argument("-n","--N",type=int,default=5,help="dimensão dos mundos")
+    parser.add_argument("-s","--semente",type=int,default=0,help="semente do primeiro mundo")
+    parser.add_argument("-j","--processos",type=int,default=None,help="número de processos (padrão: um por núcleo)")
+    parser.add_argument("-c","--corpus",default=None,help="arquivo de corpus com os mundos (veja corpus.py)")
+    parser.add_argument("-o","--otimo",action="store_true",help="pula mundos sem solução e compara com o ótimo")
+    args = parser.parse_args()
+    imprimePlacares(torneio(None,args.partidas,args.N,args.semente,args.processos,args.corpus,args.otimo))